@@ -1,17 +1,30 @@
 """FastAPI entry point — CORS, routers, static file serving."""
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from .config import FRONTEND_DIR
-from .routers import health, materials, generate, onshape_upload
+from .routers import health, materials, generate, onshape_upload, stats, artifacts
+from .services import cadquery_executor, claude_service
 
 # Configure logging so app-level logs appear in uvicorn/journalctl output
 logging.basicConfig(level=logging.INFO, format="%(name)s %(levelname)s: %(message)s")
 
-app = FastAPI(title="3dprint-pipeline Onshape Extension", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the CadQuery workers and Claude CLI sessions before the first request arrives
+    await asyncio.gather(cadquery_executor.startup(), claude_service.startup())
+    yield
+    await cadquery_executor.shutdown()
+    await claude_service.shutdown()
+
+
+app = FastAPI(title="3dprint-pipeline Onshape Extension", version="0.1.0", lifespan=lifespan)
 
 # CORS — allow Onshape iframe + local dev
 app.add_middleware(
@@ -33,6 +46,8 @@ app.include_router(health.router)
 app.include_router(materials.router)
 app.include_router(generate.router)
 app.include_router(onshape_upload.router)
+app.include_router(stats.router)
+app.include_router(artifacts.router)
 
 # Serve frontend static files (must be last — catches all unmatched routes)
 if FRONTEND_DIR.exists():
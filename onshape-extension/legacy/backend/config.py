@@ -19,9 +19,137 @@ SKILL_FILES = [
 CLAUDE_CLI = os.environ.get("CLAUDE_CLI", shutil.which("claude") or "claude")
 CLAUDE_MODEL = os.environ.get("CLAUDE_MODEL", "sonnet")
 CLAUDE_TIMEOUT = int(os.environ.get("CLAUDE_TIMEOUT", "120"))  # [s]
+# Visual validation / dimension lookup calls are shorter than code generation
+CLAUDE_VALIDATE_TIMEOUT = int(os.environ.get("CLAUDE_VALIDATE_TIMEOUT", "60"))  # [s]
+CLAUDE_LOOKUP_TIMEOUT = int(os.environ.get("CLAUDE_LOOKUP_TIMEOUT", "30"))  # [s]
+# Claude calls in flight per model (queued beyond), overridable per model:
+# "haiku=6,opus=1"
+CLAUDE_MAX_IN_FLIGHT = int(os.environ.get("CLAUDE_MAX_IN_FLIGHT", "3"))
+CLAUDE_MODEL_LIMITS = {
+    model.strip(): int(limit)
+    for model, _, limit in (
+        item.partition("=") for item in os.environ.get("CLAUDE_MODEL_LIMITS", "haiku=6").split(",")
+    )
+    if model.strip() and limit
+}
+# Retries of failed CLI calls (rate limits, overload, crashes), exponential backoff
+CLAUDE_RETRIES = int(os.environ.get("CLAUDE_RETRIES", "2"))
+CLAUDE_BACKOFF_S = float(os.environ.get("CLAUDE_BACKOFF_S", "2"))  # [s] first delay, doubles
+# Hedging: a call still running past this latency quantile of its call type
+# gets a duplicate if the model has a free slot; first answer wins. 0 = off
+CLAUDE_HEDGE_QUANTILE = float(os.environ.get("CLAUDE_HEDGE_QUANTILE", "0.9"))
+CLAUDE_HEDGE_MIN_SAMPLES = int(os.environ.get("CLAUDE_HEDGE_MIN_SAMPLES", "20"))  # before hedging
+# Idle stream-JSON CLI sessions kept booted per model/system prompt, so a call
+# skips the CLI start-up; 0 = spawn a session per call
+CLAUDE_SESSION_POOL = int(os.environ.get("CLAUDE_SESSION_POOL", "1"))
+
+# Start generating from the bare prompt while the dimension lookup runs;
+# cancelled and re-issued enriched if the lookup finds real-world objects
+SPECULATIVE_GENERATION = os.environ.get("SPECULATIVE_GENERATION", "1") == "1"
+
+# Auto-retry after a failed execution. serial = rule-based rewrites, then one
+# Claude fix per round; speculative = rewrites + RETRY_FIX_VARIANTS Claude
+# fixes executed concurrently per round, first valid single solid wins
+RETRY_STRATEGY = os.environ.get("RETRY_STRATEGY", "serial")  # serial | speculative
+RETRY_FIX_VARIANTS = int(os.environ.get("RETRY_FIX_VARIANTS", "2"))  # Claude fixes per round
 
 # CadQuery execution
 EXEC_TIMEOUT = int(os.environ.get("EXEC_TIMEOUT", "60"))  # [s]
+# subprocess = fresh interpreter per job (cold start), pool = reuse warm
+# interpreters (throughput, opt-in), fork = fork per job from a warm zygote
+EXEC_BACKEND = os.environ.get("EXEC_BACKEND", "subprocess")  # subprocess | pool | fork
+EXEC_POOL_SIZE = int(os.environ.get("EXEC_POOL_SIZE", "2"))  # warm workers
+EXEC_CONCURRENCY = int(os.environ.get("EXEC_CONCURRENCY", str(EXEC_POOL_SIZE)))  # jobs in flight
+EXEC_POOL_MAX_JOBS = int(os.environ.get("EXEC_POOL_MAX_JOBS", "50"))  # recycle after N jobs
+EXEC_POOL_MAX_RSS_MB = int(os.environ.get("EXEC_POOL_MAX_RSS_MB", "1500"))  # [MB] recycle above
+# Per-job rlimits, 0 = unlimited. CPU time kills CPU-bound runaways (SIGXCPU).
+# RLIMIT_AS counts virtual mappings (interpreter, cadquery/OCP libraries,
+# thread stacks, allocator arenas), not resident memory, so it is off by default
+EXEC_MAX_CPU_S = int(os.environ.get("EXEC_MAX_CPU_S", str(EXEC_TIMEOUT)))  # [s]
+EXEC_MAX_MEM_MB = int(os.environ.get("EXEC_MAX_MEM_MB", "0"))  # [MB] RLIMIT_AS
+# Kill a job stuck in one CadQuery/OCC call (heartbeat from a profile hook)
+# for longer than its budget, 0 = off. EXEC_OP_BUDGETS overrides per operation,
+# by bare or qualified name: "fillet=15,Workplane.sweep=45"
+EXEC_OP_BUDGET_S = float(os.environ.get("EXEC_OP_BUDGET_S", "30"))  # [s]
+EXEC_OP_BUDGETS = {
+    op.strip(): float(budget)
+    for op, _, budget in (
+        item.partition("=") for item in
+        os.environ.get("EXEC_OP_BUDGETS", "fillet=15,chamfer=15,shell=20").split(",")
+    )
+    if op.strip() and budget
+}
+
+
+def _default_scratch_dir() -> str | None:
+    """tmpfs (/dev/shm) if it has room, else None (= system temp dir)."""
+    try:
+        if os.access("/dev/shm", os.W_OK) and shutil.disk_usage("/dev/shm").free >= 512 * 2**20:
+            return "/dev/shm"
+    except OSError:
+        pass
+    return None
+
+
+# Scratch space for job files (script, harness outputs), tmpfs by default so
+# executions don't touch the disk; successful results are persisted from there
+# into the result cache / artifact store
+EXEC_SCRATCH_DIR = os.environ.get("EXEC_SCRATCH_DIR") or _default_scratch_dir()
+
+# SVG previews (visual validation). Views render concurrently; iso + front
+# are always included. poly = HLR on the tessellation, much faster than exact
+# HLR on threads/sweeps at the cost of slightly faceted curves.
+PREVIEW_VIEWS = [v.strip() for v in os.environ.get("PREVIEW_VIEWS", "iso,front").split(",") if v.strip()]
+PREVIEW_HLR = os.environ.get("PREVIEW_HLR", "exact")  # exact | poly
+
+# Tessellation shared by STL export, poly previews and mesh metrics
+# (one pass per result and quality tier, cached as mesh_<tier>.npz next to the BREP)
+MESH_TOLERANCE = float(os.environ.get("MESH_TOLERANCE", "0.1"))  # linear deflection, relative
+MESH_ANGULAR_TOLERANCE = float(os.environ.get("MESH_ANGULAR_TOLERANCE", "0.1"))  # [rad]
+# Default quality tier (preview | standard | print), see cadquery_service.QUALITY_TIERS;
+# the tolerances above define "standard"
+MESH_QUALITY = os.environ.get("MESH_QUALITY", "standard")
+
+# Content-addressed result cache (STEP/STL/SVG + metrics per unique code)
+RESULT_CACHE_DIR = Path(os.environ.get(
+    "RESULT_CACHE_DIR",
+    Path.home() / ".cache" / "onshape-cadgen" / "results",
+))
+RESULT_CACHE_MAX_MB = int(os.environ.get("RESULT_CACHE_MAX_MB", "500"))  # [MB], 0 = disabled
+RESULT_CACHE_TTL = int(os.environ.get("RESULT_CACHE_TTL", "0"))  # [s], 0 = no expiry
+
+# Geometry checkpoints: snapshots of the user code's intermediate shapes keyed
+# by the hash of the statements so far, so a modified script (fix retry, edit)
+# resumes after its longest unchanged prefix instead of rebuilding everything
+CHECKPOINT_DIR = Path(os.environ.get(
+    "CHECKPOINT_DIR",
+    Path.home() / ".cache" / "onshape-cadgen" / "checkpoints",
+))
+CHECKPOINT_MAX_MB = int(os.environ.get("CHECKPOINT_MAX_MB", "1000"))  # [MB], 0 = disabled
+CHECKPOINT_MIN_S = float(os.environ.get("CHECKPOINT_MIN_S", "0.5"))  # [s] of work between snapshots
+
+# Claude response cache (SQLite) for generate/modify: identical prompt +
+# material + system prompt + model reuses the earlier response's code
+LLM_CACHE_PATH = Path(os.environ.get(
+    "LLM_CACHE_PATH",
+    Path.home() / ".cache" / "onshape-cadgen" / "llm_cache.sqlite3",
+))
+LLM_CACHE_MAX_MB = int(os.environ.get("LLM_CACHE_MAX_MB", "50"))  # [MB] of responses, 0 = disabled
+
+# Dimension lookup memo: OBJECT blocks per normalized object name, reused
+# for later prompts mentioning the same object
+DIMENSION_MEMO_PATH = Path(os.environ.get(
+    "DIMENSION_MEMO_PATH",
+    Path.home() / ".cache" / "onshape-cadgen" / "dimensions.sqlite3",
+))
+DIMENSION_MEMO_TTL = int(os.environ.get("DIMENSION_MEMO_TTL", str(30 * 24 * 3600)))  # [s], 0 = no expiry
+
+# Artifact store (generated models kept server-side by ID, see artifact_store.py)
+ARTIFACT_DIR = Path(os.environ.get(
+    "ARTIFACT_DIR",
+    Path.home() / ".cache" / "onshape-cadgen" / "artifacts",
+))
+ARTIFACT_TTL = int(os.environ.get("ARTIFACT_TTL", str(24 * 3600)))  # [s] since last use
 
 # Onshape API keys (loaded from file)
 ONSHAPE_KEYS_FILE = Path(os.environ.get(
@@ -0,0 +1,126 @@
+"""Artifact endpoints — stream generated models, exporting formats on demand.
+
+Files are streamed from disk (never base64/JSON), with ETag and single
+byte-range support so browsers can cache and resume downloads.
+"""
+import re
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from ..services.cadquery_service import export_artifact
+
+router = APIRouter()
+
+MEDIA_TYPES = {
+    "step": "application/step",
+    "stl": "model/stl",
+    "3mf": "model/3mf",
+    "glb": "model/gltf-binary",
+    "svg": "image/svg+xml",
+}
+
+CHUNK_SIZE = 64 * 1024
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def _etag(path: Path) -> str:
+    # Files of an artifact are immutable once written (replaced atomically),
+    # so inode + size + mtime identify the content.
+    st = path.stat()
+    return f'"{st.st_ino:x}-{st.st_size:x}-{int(st.st_mtime_ns):x}"'
+
+
+def _iter_range(path: Path, start: int, length: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+class RangeNotSatisfiable(ValueError):
+    """A well-formed range that lies entirely outside the file."""
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parse a single `bytes=a-b` range into (start, end) inclusive.
+
+    Returns None for a header to ignore (malformed, or several ranges —
+    the full file is served then); raises RangeNotSatisfiable if the
+    range starts past the end of the file or is an empty suffix.
+    """
+    match = _RANGE_RE.fullmatch(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":  # suffix range: last N bytes
+        if int(last) == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None  # invalid byte-range-spec
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+@router.get("/api/artifacts/{artifact_id}.{fmt}")
+async def get_artifact(
+    request: Request,
+    artifact_id: str,
+    fmt: str,
+    view: str = "iso",
+    quality: str | None = None,
+    material: str | None = None,
+):
+    """Return one format of a generated model.
+
+    Formats that were not exported at generation time (lazy mode) are
+    produced from the stored BREP on first request, then kept. Mesh formats
+    (stl, 3mf, glb) take a `quality` tier (preview | standard | print);
+    3MF records `material`.
+    """
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail=f"Unknown format: {fmt}")
+    path = await export_artifact(artifact_id, fmt, view, quality, material)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Artifact not found or export failed")
+
+    size = path.stat().st_size
+    headers = {
+        "ETag": _etag(path),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=86400, immutable",
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if range_header and request.headers.get("if-range", headers["ETag"]) == headers["ETag"]:
+        try:
+            byte_range = _parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                _iter_range(path, start, end - start + 1),
+                status_code=206,
+                media_type=MEDIA_TYPES[fmt],
+                headers=headers,
+            )
+
+    return FileResponse(
+        path,
+        media_type=MEDIA_TYPES[fmt],
+        filename=f"{artifact_id}.{fmt}",
+        headers=headers,
+    )
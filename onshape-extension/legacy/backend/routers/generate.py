@@ -1,23 +1,60 @@
 """Generate endpoint — text prompt to STEP file with auto-retry."""
 import asyncio
+import base64
 import logging
+import time
+from collections import Counter
+from typing import Literal
+from urllib.parse import quote
 
 from pydantic import BaseModel, Field
 
 from fastapi import APIRouter
 
+from ..config import EXEC_BACKEND, RETRY_FIX_VARIANTS, RETRY_STRATEGY, SPECULATIVE_GENERATION
 from ..services.skill_loader import load_system_prompt
 from ..services.claude_service import (
     generate_cadquery_code, modify_cadquery_code, lookup_dimensions,
     validate_shape_visually,
 )
 from ..services.reference_loader import find_matching_references
-from ..services.cadquery_service import execute_and_export
+from ..services.cadquery_service import execute_and_export, export_artifact
+from ..services.code_lint import CERTAIN_RULES, certain_failures, lint_code
+from ..services.code_autofix import autofix_candidates
+from ..services.latency_stats import LatencyStats
+from ..services.llm_cache import get_llm_cache
+from ..services.result_cache import code_fingerprint
 
 router = APIRouter()
 log = logging.getLogger(__name__)
 
 MAX_AUTO_RETRIES = 2
+MEMO_WAIT_S = 0.05  # [s] a dimension memo hit answers the lookup within this
+MAX_AUTOFIX_CANDIDATES = 3  # rule-based rewrites executed per failure before asking Claude
+# Appended to the fix instruction of speculative Claude variants so they diverge
+FIX_VARIANT_HINTS = (
+    "",
+    "\n\nIf the failing feature can't be built reliably, simplify or drop it "
+    "rather than changing the rest of the model.",
+    "\n\nRebuild the failing feature with a different CadQuery construction "
+    "(other primitives or operation order) instead of tweaking parameters.",
+)
+
+# Prepended when a fix only differs from already-failed code in comments/whitespace
+DUPLICATE_FIX_INSTRUCTION = (
+    "Your previous fix returned code that is functionally IDENTICAL to code that "
+    "already failed — only comments or whitespace changed. Do not return it again. "
+    "Make a real change to the geometry code that addresses this error:\n\n"
+)
+MAX_DUPLICATE_REPROMPTS = 1
+
+_repair_latency = LatencyStats()
+_repair_outcomes: dict[str, Counter] = {}
+_strategies = Counter()  # requests per retry strategy used (request override or default)
+_detached: set[asyncio.Task] = set()  # pool executions of losing speculative candidates
+_duplicate_fixes = Counter()  # detected / unresolved
+_static_rejections = Counter()  # code not executed, per certain static finding
+_speculation = Counter()  # used / cancelled / not_needed
 
 _system_prompt = None
 
@@ -29,12 +66,39 @@ def _get_system_prompt() -> str:
     return _system_prompt
 
 
+def error_signature(error: str, metrics: dict | None) -> str:
+    """Classify an execution error into a failure signature."""
+    if not error:
+        return "unknown"
+    if "StdFail_NotDone" in error:
+        return "fillet"
+    if "stalled at line" in error:
+        op = error.split()[1] if error.startswith("Operation ") else ""
+        return "fillet" if op.endswith(("fillet", "chamfer")) else "stalled"
+    if "exceeded the CPU time limit" in error or "exceeded the memory limit" in error \
+            or "timed out" in error:
+        return "resources"
+    if metrics and metrics.get("solid_count") is not None and metrics["solid_count"] != 1:
+        return "solids"
+    if "SyntaxError" in error:
+        return "syntax"
+    if "Wire not closed" in error:
+        return "wire"
+    if "swept along a helix" in error:
+        return "sweep_thread"
+    if "no output" in error.lower() or "STEP file not produced" in error:
+        return "no_output"
+    return "generic"
+
+
 def diagnose_error(error: str, metrics: dict | None) -> str:
     """Map execution error to a targeted fix instruction for Claude."""
-    if not error:
+    signature = error_signature(error, metrics)
+
+    if signature == "unknown":
         return "Fix the error in this code."
 
-    if "StdFail_NotDone" in error:
+    if signature == "fillet":
         return (
             "The .fillet() call crashed the OCC kernel (StdFail_NotDone). "
             "Move ALL .fillet() calls BEFORE any union()/cut()/shell() operations. "
@@ -43,7 +107,22 @@ def diagnose_error(error: str, metrics: dict | None) -> str:
             '.edges("|Z").fillet(r) after boolean ops.'
         )
 
-    if metrics and metrics.get("solid_count") is not None and metrics["solid_count"] != 1:
+    if signature == "stalled":
+        return (
+            f"{error.splitlines()[0]} — the OCC kernel hung in this operation. Replace "
+            "it with a simpler construction (e.g. build the feature from primitives, "
+            "split a complex sweep/loft/shell into smaller steps) or drop it."
+        )
+
+    if signature == "resources":
+        return (
+            f"The script ran out of resources ({error.splitlines()[0]}). Reduce the "
+            "geometric complexity: fewer and simpler features, shorter helices or a "
+            "coarser pitch, no large patterns of booleans — union features once "
+            "instead of repeatedly in a loop."
+        )
+
+    if signature == "solids":
         n = metrics["solid_count"]
         return (
             f"Got {n} disconnected solids instead of 1. "
@@ -52,16 +131,24 @@ def diagnose_error(error: str, metrics: dict | None) -> str:
             "Check that features are positioned within the body's coordinate span."
         )
 
-    if "SyntaxError" in error:
+    if signature == "syntax":
         return f"Fix this Python syntax error:\n{error}"
 
-    if "Wire not closed" in error:
+    if signature == "wire":
         return (
             "Wire not closed error. Check that polyline points form a closed loop "
             "with no coincident consecutive points and no self-intersections."
         )
 
-    if "no output" in error.lower() or "STEP file not produced" in error:
+    if signature == "sweep_thread":
+        return (
+            "Threads swept with cq.Solid.sweep()/.sweep() twist the V-profile into "
+            "malformed geometry. Build the thread with BRepOffsetAPI_MakePipeShell along "
+            "cq.Wire.makeHelix, with builder.SetMode(gp_Dir(0, 0, 1)) as binormal, then "
+            "MakeSolid() and core.union(thread)."
+        )
+
+    if signature == "no_output":
         return (
             "Code ran but produced no geometry. Ensure the `result` variable "
             "holds a valid CadQuery Workplane object with solid geometry."
@@ -75,12 +162,40 @@ class GenerateRequest(BaseModel):
     prompt: str = Field(..., min_length=3, max_length=2000)
     material: str = Field(default="PLA")
     previous_code: str | None = Field(default=None, max_length=50000)
+    lazy_export: bool = Field(
+        default=False,
+        description="Export STEP only; fetch STL/SVG later via /api/artifacts/{artifact_id}",
+    )
+    inline_artifacts: bool = Field(
+        default=False,
+        description="Also inline STEP/STL as base64 (legacy clients); prefer step_url/stl_url",
+    )
+    quality: Literal["preview", "standard", "print"] | None = Field(
+        default=None,
+        description="Mesh tessellation tier (default: server MESH_QUALITY)",
+    )
+    mesh_formats: list[Literal["stl", "3mf", "glb"]] = Field(
+        default=["stl"],
+        description="Mesh formats to export (eagerly unless lazy_export); see mesh_urls",
+    )
+    retry_strategy: Literal["serial", "speculative"] | None = Field(
+        default=None,
+        description="Auto-retry strategy (default: server RETRY_STRATEGY)",
+    )
+    llm_cache: bool = Field(
+        default=True,
+        description="Reuse the cached Claude response of an identical request (false = always ask Claude)",
+    )
 
 
 class GenerateResponse(BaseModel):
     success: bool
-    step_base64: str | None = None
-    stl_base64: str | None = None
+    artifact_id: str | None = None
+    step_url: str | None = None
+    stl_url: str | None = None
+    mesh_urls: dict[str, str] | None = None  # format -> download URL
+    step_base64: str | None = None  # only with inline_artifacts
+    stl_base64: str | None = None  # only with inline_artifacts
     filename: str | None = None
     metrics: dict | None = None
     error: str | None = None
@@ -88,20 +203,11 @@ class GenerateResponse(BaseModel):
     code: str | None = None
     attempts: int = 1
     visual_check: dict | None = None
+    llm_cached: bool = False  # code came from the LLM response cache
 
 
-async def _enrich_prompt(prompt: str) -> str:
-    """Enrich the user prompt with real-world dimensions from two sources.
-
-    Runs in parallel:
-    1. Dynamic lookup — fast Claude call for any real-world object (phones, etc.)
-    2. Static references — keyword-matched hardware standards (fasteners, bearings, PCBs)
-    """
-    dynamic_task = asyncio.create_task(lookup_dimensions(prompt))
-    static_refs = find_matching_references(prompt)
-
-    dynamic_dims = await dynamic_task
-
+def _with_references(prompt: str, dynamic_dims: str | None, static_refs: str | None) -> str:
+    """Prefix the user prompt with the dimensions found for it."""
     parts = []
     if dynamic_dims:
         parts.append(dynamic_dims)
@@ -116,24 +222,314 @@ async def _enrich_prompt(prompt: str) -> str:
     return "\n\n".join(parts) + "\n\nUser request:\n" + prompt
 
 
+async def _generate_new(system_prompt: str, req: GenerateRequest) -> dict:
+    """Generate code for a new design, enriched with real-world dimensions.
+
+    Two sources: the dynamic lookup (fast Claude call for any real-world
+    object — phones, etc.) and static references (keyword-matched hardware
+    standards — fasteners, bearings, PCBs). Most prompts name no object,
+    so with SPECULATIVE_GENERATION the generation from the static
+    references alone starts alongside the lookup; it is used if the lookup
+    finds nothing, otherwise cancelled in favour of an enriched one.
+    """
+    lookup = asyncio.create_task(lookup_dimensions(req.prompt))
+    static_refs = find_matching_references(req.prompt)
+    await asyncio.wait({lookup}, timeout=MEMO_WAIT_S)  # a dimension memo hit completes it right here
+
+    speculative = None
+    if SPECULATIVE_GENERATION and not lookup.done():
+        speculative = asyncio.create_task(generate_cadquery_code(
+            system_prompt, _with_references(req.prompt, None, static_refs), req.material,
+            cache=req.llm_cache,
+        ))
+    try:
+        dynamic_dims = await lookup
+    except asyncio.CancelledError:
+        if speculative is not None:
+            speculative.cancel()
+        raise
+
+    if speculative is not None:
+        if not dynamic_dims:
+            _speculation["used"] += 1
+            return await speculative
+        log.info("Dimension lookup found objects — cancelling speculative generation")
+        speculative.cancel()
+        _speculation["cancelled"] += 1
+    elif SPECULATIVE_GENERATION:
+        _speculation["not_needed"] += 1  # lookup answered from the memo
+
+    return await generate_cadquery_code(
+        system_prompt, _with_references(req.prompt, dynamic_dims, static_refs), req.material,
+        cache=req.llm_cache,
+    )
+
+
+async def _ensure_previews(exec_result: dict):
+    """Fill in the SVG previews of a lazy result from its stored BREP.
+
+    Both views are exported concurrently, so they overlap on the executor.
+    """
+    if exec_result.get("svg_iso") or not exec_result.get("artifact_id"):
+        return
+    paths = await asyncio.gather(*(
+        export_artifact(exec_result["artifact_id"], "svg", view)
+        for view in ("iso", "front")
+    ))
+    exec_result["svg_iso"], exec_result["svg_front"] = (
+        path.read_text() if path else None for path in paths
+    )
+
+
+def _mesh_url(artifact_id: str, fmt: str, req: GenerateRequest) -> str:
+    params = {"quality": req.quality, "material": req.material if fmt == "3mf" else None}
+    query = "&".join(f"{k}={quote(v)}" for k, v in params.items() if v)
+    return f"/api/artifacts/{artifact_id}.{fmt}" + (f"?{query}" if query else "")
+
+
+async def _inline_artifacts(
+    artifact_id: str, quality: str | None,
+) -> tuple[str | None, str | None]:
+    """Base64 STEP + STL of an artifact, for clients that can't fetch URLs."""
+    encoded = []
+    for fmt in ("step", "stl"):
+        path = await export_artifact(artifact_id, fmt, quality=quality)
+        encoded.append(base64.b64encode(path.read_bytes()).decode() if path else None)
+    return encoded[0], encoded[1]
+
+
+def _static_failure(code: str) -> dict | None:
+    """Failed exec_result for code the static check proves would fail.
+
+    Only certain findings (code_lint.CERTAIN_RULES) count, so the code goes
+    back to Claude without a 5-60 s execution; None = execute it.
+    """
+    issues = certain_failures(code)
+    if not issues:
+        return None
+    log.info("Static check rejected code: %s", ", ".join(i["rule"] for i in issues))
+    _static_rejections.update(i["rule"] for i in issues)
+    return {
+        "success": False,
+        "error": "\n".join(i["error"] for i in issues),
+        "metrics": None,
+        "static": True,
+    }
+
+
+def _diagnose(exec_result: dict, code: str) -> tuple[list[str], str]:
+    """Error signatures and fix instruction for a failed exec_result."""
+    error, metrics = exec_result["error"], exec_result["metrics"]
+    if exec_result.get("static"):
+        errors = error.splitlines()  # one certain finding per line
+        signatures = list(dict.fromkeys(error_signature(e, None) for e in errors))
+        return signatures, "\n\n".join(dict.fromkeys(diagnose_error(e, None) for e in errors))
+    return [error_signature(error, metrics)], diagnose_error(error, metrics) + _lint_advice(code)
+
+
+def _lint_advice(code: str) -> str:
+    """Static check findings on failed code, appended to its fix instruction.
+
+    Advisory only — the runtime error decides the fix; the findings point
+    Claude at known crash patterns that may have caused it.
+    """
+    issues = [i for i in lint_code(code) if i["rule"] not in CERTAIN_RULES]
+    if not issues:
+        return ""
+    return "\n\nThe static check also flagged (may or may not be the cause):\n" + "\n".join(
+        f"- {i['error']}" for i in issues
+    )
+
+
+async def _execute(code: str, req: GenerateRequest) -> dict:
+    return await execute_and_export(
+        code, lazy=req.lazy_export, quality=req.quality,
+        mesh_formats=req.mesh_formats, material=req.material,
+    )
+
+
+async def _modify_unseen(
+    system_prompt: str, code: str, instruction: str, material: str, seen: set[str],
+) -> dict:
+    """modify_cadquery_code that never hands back code already tried.
+
+    A fix whose code_fingerprint is in `seen` (byte-identical or differing
+    only in comments/whitespace) is re-prompted with DUPLICATE_FIX_INSTRUCTION;
+    if it still repeats, the result carries an error instead of the code.
+    """
+    def repeats(result: dict) -> bool:
+        if result["error"] or not result["code"] or code_fingerprint(result["code"]) not in seen:
+            return False
+        _duplicate_fixes["detected"] += 1
+        return True
+
+    fix_result = await modify_cadquery_code(system_prompt, code, instruction, material)
+    for _ in range(MAX_DUPLICATE_REPROMPTS):
+        if not repeats(fix_result):
+            return fix_result
+        log.info("Fix repeats already-tried code — re-prompting")
+        fix_result = await modify_cadquery_code(
+            system_prompt, code, DUPLICATE_FIX_INSTRUCTION + instruction, material
+        )
+    if repeats(fix_result):
+        _duplicate_fixes["unresolved"] += 1
+        return {**fix_result, "code": None, "error": "Fix repeats code that already failed"}
+    return fix_result
+
+
+async def _try_autofixes(
+    code: str, signatures: list[str], error: str, req: GenerateRequest, seen: set[str],
+) -> tuple[str | None, dict | None, int]:
+    """Execute rule-based rewrites of failing code, cheapest fix first.
+
+    Rewrites already in `seen` are skipped; executed ones are added.
+    Returns (code, exec_result, executions); code and exec_result are None
+    if no candidate produced a valid shape.
+    """
+    executed = 0
+    for candidate in autofix_candidates(code, signatures, error):
+        if executed >= MAX_AUTOFIX_CANDIDATES:
+            break
+        fingerprint = code_fingerprint(candidate["code"])
+        if fingerprint in seen:
+            continue
+        seen.add(fingerprint)
+        exec_result = await _execute(candidate["code"], req)
+        executed += 1
+        if exec_result["success"]:
+            log.info("Autofix %s succeeded", candidate["rule"])
+            return candidate["code"], exec_result, executed
+        log.info("Autofix %s failed: %s", candidate["rule"], (exec_result["error"] or "")[:80])
+    return None, None, executed
+
+
+async def _speculative_fix(
+    system_prompt: str, code: str, signatures: list[str], error: str,
+    fix_instruction: str, req: GenerateRequest, seen: set[str],
+) -> dict:
+    """One retry round with every fix candidate in flight at once.
+
+    Rule-based rewrites execute immediately; RETRY_FIX_VARIANTS Claude fixes
+    (same instruction, different hints) execute as soon as each arrives.
+    The first valid result wins; the candidates still pending are
+    cancelled, which kills their subprocess/fork-server jobs and frees
+    their EXEC_CONCURRENCY slots. On the pool backend cancelling would
+    kill a warm worker, so executions already running finish in the
+    background there and their results are dropped.
+
+    Candidates certain to fail (`_static_failure`) are not executed.
+
+    Returns dict with keys: winner ("rule" | "llm" | None), code,
+    exec_result, executions. Without a winner, code/exec_result belong to
+    the first Claude variant (None if Claude failed), so the next round
+    continues from it without executing it again. Every candidate run is
+    added to `seen`; candidates already in it are dropped.
+    """
+    executed = 0
+
+    async def run(candidate: str) -> dict:
+        nonlocal executed
+        seen.add(code_fingerprint(candidate))
+        rejected = _static_failure(candidate)
+        if rejected:
+            return rejected
+        executed += 1
+        if EXEC_BACKEND != "pool":
+            return await _execute(candidate, req)
+        execution = asyncio.create_task(_execute(candidate, req))
+        _detached.add(execution)
+        execution.add_done_callback(_detached.discard)
+        execution.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return await asyncio.shield(execution)
+
+    async def rule_fix(candidate: dict) -> tuple[str, int, str, dict]:
+        return "rule", 0, candidate["code"], await run(candidate["code"])
+
+    async def llm_fix(variant: int) -> tuple[str, int, str | None, dict | None]:
+        hint = FIX_VARIANT_HINTS[variant % len(FIX_VARIANT_HINTS)]
+        fix_result = await _modify_unseen(
+            system_prompt, code, fix_instruction + hint, req.material, seen
+        )
+        if fix_result["error"] or not fix_result["code"]:
+            return "llm", variant, None, None
+        return "llm", variant, fix_result["code"], await run(fix_result["code"])
+
+    rules = [
+        c for c in autofix_candidates(code, signatures, error)
+        if code_fingerprint(c["code"]) not in seen
+    ][:MAX_AUTOFIX_CANDIDATES]
+    tasks = [asyncio.create_task(rule_fix(c)) for c in rules] + [
+        asyncio.create_task(llm_fix(v)) for v in range(max(RETRY_FIX_VARIANTS, 1))
+    ]
+    llm_fixes = {}
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            kind, variant, fixed, exec_result = await next_done
+            if exec_result and exec_result["success"]:
+                log.info("Speculative fix won by %s%s", kind, f" #{variant}" if kind == "llm" else "")
+                return {"winner": kind, "code": fixed, "exec_result": exec_result, "executions": executed}
+            if kind == "llm" and fixed:
+                llm_fixes[variant] = (fixed, exec_result)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    fixed, exec_result = llm_fixes[min(llm_fixes)] if llm_fixes else (None, None)
+    return {"winner": None, "code": fixed, "exec_result": exec_result, "executions": executed}
+
+
+async def _settle_llm_cache(claude_result: dict, final_code: str | None):
+    """Store what the request ended with as the cached answer to its prompt.
+
+    Only answers a request actually used get here, so discarded ones (a
+    cancelled speculative generation) are never cached. A response whose
+    code never yielded a valid shape is not stored (or dropped, if it came
+    from the cache); one that needed auto-retry/visual fixes is stored as
+    the fixed code, so an identical request starts from working code.
+    """
+    key = claude_result.get("cache_key")
+    if not key:
+        return
+    cache = get_llm_cache()
+    if final_code is None:
+        if claude_result["cached"]:
+            await asyncio.to_thread(cache.discard, key)
+    elif code_fingerprint(final_code) != code_fingerprint(claude_result["code"]):
+        await asyncio.to_thread(cache.put, key, claude_result["model"], f"```python\n{final_code}\n```")
+    elif not claude_result["cached"]:
+        await asyncio.to_thread(cache.put, key, claude_result["model"], claude_result["response_text"])
+
+
+def speculation_stats() -> dict:
+    """Outcomes of generations started alongside the dimension lookup, for /api/stats."""
+    return {"enabled": SPECULATIVE_GENERATION, **_speculation}
+
+
+def retry_stats() -> dict:
+    """Repair latency (first failure -> final outcome) per strategy, for /api/stats."""
+    return {
+        "default_strategy": RETRY_STRATEGY,
+        "strategies": dict(_strategies),
+        "fix_variants": RETRY_FIX_VARIANTS,
+        "repair_latency": _repair_latency.stats(),
+        "outcomes": {strategy: dict(c) for strategy, c in _repair_outcomes.items()},
+        "duplicate_fixes": dict(_duplicate_fixes),
+        "static_rejections": dict(_static_rejections),
+    }
+
+
 @router.post("/api/generate", response_model=GenerateResponse)
 async def generate(req: GenerateRequest):
     system_prompt = _get_system_prompt()
+    strategy = req.retry_strategy or RETRY_STRATEGY
 
-    # Step 0: Enrich prompt with real-world dimensions (only for new generations)
-    enriched_prompt = req.prompt
-    if not req.previous_code:
-        enriched_prompt = await _enrich_prompt(req.prompt)
-
-    # Step 1: Generate or modify CadQuery code via Claude
+    # Step 1: Generate (prompt enriched with real-world dimensions) or modify CadQuery code via Claude
     if req.previous_code:
         claude_result = await modify_cadquery_code(
-            system_prompt, req.previous_code, req.prompt, req.material
+            system_prompt, req.previous_code, req.prompt, req.material, cache=req.llm_cache
         )
     else:
-        claude_result = await generate_cadquery_code(
-            system_prompt, enriched_prompt, req.material
-        )
+        claude_result = await _generate_new(system_prompt, req)
 
     if claude_result["error"] or not claude_result["code"]:
         return GenerateResponse(
@@ -148,37 +544,93 @@ async def generate(req: GenerateRequest):
     last_metrics = None
     exec_ok = None
     total_attempts = 0
+    repaired_by = None
+    repair_t0 = None
+    known = None  # exec_result of `code` when a speculative round already ran it
+    seen = set()  # code_fingerprint of every version executed or rejected in this request
 
     # Step 2: Execute with auto-retry loop
     for attempt in range(MAX_AUTO_RETRIES + 1):
-        exec_result = await execute_and_export(code)
-        total_attempts = attempt + 1
+        if known:
+            exec_result = known
+            known = None
+        else:
+            # Code certain to fail goes straight back to Claude. The last
+            # attempt always executes, so the response carries a real error.
+            exec_result = _static_failure(code) if attempt < MAX_AUTO_RETRIES else None
+            if exec_result is None:
+                exec_result = await _execute(code, req)
+                total_attempts += 1
+            seen.add(code_fingerprint(code))
 
         if exec_result["success"]:
             if attempt > 0:
                 log.info("Auto-retry succeeded on attempt %d", attempt + 1)
+                repaired_by = "llm"
             exec_ok = exec_result
             break
 
         last_error = exec_result["error"]
         last_metrics = exec_result["metrics"]
+        if repair_t0 is None:
+            repair_t0 = time.monotonic()
+
+        signatures, fix_instruction = _diagnose(exec_result, code)
+
+        # Speculative: rewrites and Claude fix variants race each other
+        if strategy == "speculative" and attempt < MAX_AUTO_RETRIES:
+            log.info(
+                "Speculative auto-retry %d/%d: %s",
+                attempt + 1, MAX_AUTO_RETRIES, fix_instruction[:80],
+            )
+            round_ = await _speculative_fix(
+                system_prompt, code, signatures, last_error, fix_instruction, req, seen=seen,
+            )
+            total_attempts += round_["executions"]
+            if round_["winner"]:
+                code = round_["code"]
+                exec_ok = round_["exec_result"]
+                repaired_by = round_["winner"]
+                break
+            if not round_["code"]:
+                break
+            code = round_["code"]
+            known = round_["exec_result"]
+            continue
+
+        # Deterministic rewrites first — no LLM round trip for known patterns
+        fixed_code, fixed_result, executed = await _try_autofixes(
+            code, signatures, last_error, req, seen,
+        )
+        total_attempts += executed
+        if fixed_result:
+            code = fixed_code
+            exec_ok = fixed_result
+            repaired_by = "rule"
+            break
 
         # Auto-retry: ask Claude to fix the error
         if attempt < MAX_AUTO_RETRIES:
-            fix_instruction = diagnose_error(last_error, last_metrics)
             log.info(
                 "Auto-retry %d/%d: %s",
                 attempt + 1, MAX_AUTO_RETRIES,
                 fix_instruction[:80],
             )
-            fix_result = await modify_cadquery_code(
-                system_prompt, code, fix_instruction, req.material
+            fix_result = await _modify_unseen(
+                system_prompt, code, fix_instruction, req.material, seen
             )
             if fix_result["error"] or not fix_result["code"]:
                 break
             code = fix_result["code"]
 
+    _strategies[strategy] += 1
+    if repair_t0 is not None:
+        _repair_latency.record(strategy, time.monotonic() - repair_t0)
+        outcome = f"repaired_{repaired_by}" if exec_ok else "failed"
+        _repair_outcomes.setdefault(strategy, Counter())[outcome] += 1
+
     if not exec_ok:
+        await _settle_llm_cache(claude_result, None)
         return GenerateResponse(
             success=False,
             error=last_error,
@@ -186,10 +638,13 @@ async def generate(req: GenerateRequest):
             model=claude_result["model"],
             code=code,
             attempts=total_attempts,
+            llm_cached=claude_result["cached"],
         )
 
     # Step 3: Visual shape validation (new generations only)
     visual_check = None
+    if not req.previous_code:
+        await _ensure_previews(exec_ok)
     if not req.previous_code and exec_ok.get("svg_iso"):
         log.info("Running visual shape validation")
         visual_check = await validate_shape_visually(
@@ -208,11 +663,17 @@ async def generate(req: GenerateRequest):
         # Visual retry: if shape is wrong and we have a critique, fix once
         if not visual_check["valid"] and visual_check.get("critique"):
             log.info("Visual retry: %s", visual_check["critique"])
-            fix_result = await modify_cadquery_code(
-                system_prompt, code, visual_check["critique"], req.material
+            fix_result = await _modify_unseen(
+                system_prompt, code, visual_check["critique"], req.material, seen
             )
-            if fix_result.get("code"):
-                retry_exec = await execute_and_export(fix_result["code"])
+            if not fix_result.get("code"):
+                log.info("Visual retry produced no new code — keeping original shape")
+                visual_check["retried"] = False
+            elif _static_failure(fix_result["code"]):
+                log.info("Visual retry rejected by static check — keeping original shape")
+                visual_check["retried"] = False
+            else:
+                retry_exec = await _execute(fix_result["code"], req)
                 total_attempts += 1
                 if retry_exec["success"]:
                     log.info("Visual retry succeeded")
@@ -223,18 +684,30 @@ async def generate(req: GenerateRequest):
                     log.info("Visual retry failed — keeping original shape")
                     visual_check["retried"] = False
 
+    await _settle_llm_cache(claude_result, code)
+
     slug = req.prompt[:40].lower().replace(" ", "_")
     slug = "".join(c for c in slug if c.isalnum() or c == "_")
     filename = f"{slug}.step"
 
+    artifact_id = exec_ok["artifact_id"]
+    step_b64 = stl_b64 = None
+    if req.inline_artifacts:
+        step_b64, stl_b64 = await _inline_artifacts(artifact_id, req.quality)
+
     return GenerateResponse(
         success=True,
-        step_base64=exec_ok["step_base64"],
-        stl_base64=exec_ok["stl_base64"],
+        artifact_id=artifact_id,
+        step_url=f"/api/artifacts/{artifact_id}.step",
+        stl_url=_mesh_url(artifact_id, "stl", req),
+        mesh_urls={fmt: _mesh_url(artifact_id, fmt, req) for fmt in req.mesh_formats},
+        step_base64=step_b64,
+        stl_base64=stl_b64,
         filename=filename,
         metrics=exec_ok["metrics"],
         model=claude_result["model"],
         code=code,
         attempts=total_attempts,
+        llm_cached=claude_result["cached"],
         visual_check=visual_check,
     )
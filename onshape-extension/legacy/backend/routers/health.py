@@ -1,5 +1,5 @@
 """Health check endpoint."""
-import subprocess
+import asyncio
 
 from fastapi import APIRouter
 
@@ -8,17 +8,20 @@ router = APIRouter()
 
 @router.get("/api/health")
 async def health():
-    # Check CadQuery availability
+    # Check CadQuery availability (async — must not block the event loop)
     cq_ok = False
     try:
-        proc = subprocess.run(
-            ["python3", "-c", "import cadquery; print('ok')"],
-            capture_output=True,
-            text=True,
-            timeout=10,
+        proc = await asyncio.create_subprocess_exec(
+            "python3", "-c", "import cadquery; print('ok')",
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
         )
-        cq_ok = proc.returncode == 0
-    except (subprocess.TimeoutExpired, FileNotFoundError):
+        try:
+            cq_ok = await asyncio.wait_for(proc.wait(), timeout=10) == 0
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+    except FileNotFoundError:
         pass
 
     return {"status": "ok", "cadquery": cq_ok}
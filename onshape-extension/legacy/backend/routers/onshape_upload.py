@@ -24,6 +24,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 
 from ..config import ONSHAPE_KEYS_FILE, ONSHAPE_API_BASE
+from ..services.cadquery_service import export_artifact
 
 log = logging.getLogger(__name__)
 
@@ -54,7 +55,14 @@ def _load_onshape_keys() -> tuple[str, str]:
 
 
 class UploadRequest(BaseModel):
-    step_base64: str = Field(..., description="Base64-encoded STEP file")
+    artifact_id: str | None = Field(
+        default=None,
+        description="Generated artifact to upload — STEP is read server-side",
+    )
+    step_base64: str | None = Field(
+        default=None,
+        description="Base64-encoded STEP file (legacy, when no artifact_id)",
+    )
     filename: str = Field(default="output.step")
     document_id: str = Field(..., min_length=1)
     workspace_id: str = Field(..., min_length=1)
@@ -299,10 +307,18 @@ async def upload_to_onshape(req: UploadRequest):
 
     ak, sk = _load_onshape_keys()
 
-    try:
-        step_bytes = base64.b64decode(req.step_base64)
-    except Exception as e:
-        return UploadResponse(success=False, error=f"Invalid base64: {e}")
+    if req.artifact_id:
+        step_path = await export_artifact(req.artifact_id, "step")
+        if step_path is None:
+            return UploadResponse(success=False, error="Artifact not found (expired?)")
+        step_bytes = step_path.read_bytes()
+    elif req.step_base64:
+        try:
+            step_bytes = base64.b64decode(req.step_base64)
+        except Exception as e:
+            return UploadResponse(success=False, error=f"Invalid base64: {e}")
+    else:
+        return UploadResponse(success=False, error="Provide artifact_id or step_base64")
 
     auth = httpx.BasicAuth(ak, sk)
 
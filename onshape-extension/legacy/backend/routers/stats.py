@@ -0,0 +1,31 @@
+"""Runtime statistics endpoint — execution, result/checkpoint/LLM caches, dimension memo, mesh tiers, auto-retry and Claude calls."""
+import asyncio
+
+from fastapi import APIRouter
+
+from ..services import cadquery_executor
+from ..services.cadquery_service import checkpoint_stats, mesh_stats
+from ..services.claude_sessions import get_session_pool
+from ..services.dimension_memo import get_dimension_memo
+from ..services.llm_cache import get_llm_cache
+from ..services.llm_client import get_llm_client
+from ..services.result_cache import get_result_cache
+from .generate import retry_stats, speculation_stats
+
+router = APIRouter()
+
+
+@router.get("/api/stats")
+async def get_stats():
+    return {
+        "execution": cadquery_executor.stats(),
+        "result_cache": get_result_cache().stats(),
+        "checkpoints": checkpoint_stats(),
+        "mesh_quality": mesh_stats(),
+        "auto_retry": retry_stats(),
+        "speculative_generation": speculation_stats(),
+        "claude_sessions": get_session_pool().stats(),
+        "llm": get_llm_client().stats(),
+        "llm_cache": await asyncio.to_thread(get_llm_cache().stats),
+        "dimension_memo": await asyncio.to_thread(get_dimension_memo().stats),
+    }
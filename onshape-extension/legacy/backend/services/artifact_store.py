@@ -0,0 +1,93 @@
+"""Artifact store — generated models kept server-side under an artifact ID.
+
+Each artifact is a directory holding the exact shape (`model.brep`) and
+whatever formats were exported so far. Formats that were not exported at
+generation time are added later by `cadquery_service.export_artifact`.
+Artifacts expire ARTIFACT_TTL seconds after their last use.
+"""
+import logging
+import os
+import re
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+from ..config import ARTIFACT_DIR, ARTIFACT_TTL
+
+log = logging.getLogger(__name__)
+
+_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+
+def _link_or_copy(src: Path, dst: Path):
+    """Hard-link when possible (same filesystem), copy otherwise."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class ArtifactStore:
+    def __init__(self, root: Path, ttl: int):
+        self.root = root
+        self.ttl = ttl  # [s]
+
+    def _dir(self, artifact_id: str) -> Path | None:
+        if not _ID_RE.fullmatch(artifact_id or ""):
+            return None  # also keeps path traversal out
+        return self.root / artifact_id
+
+    def create(self, src_dir: Path, files: list[str]) -> str:
+        """Store the existing `files` of `src_dir` as a new artifact, return its ID."""
+        self._cleanup()
+        artifact_id = uuid.uuid4().hex
+        dest = self.root / artifact_id
+        dest.mkdir(parents=True)
+        for name in files:
+            if (src_dir / name).exists():
+                _link_or_copy(src_dir / name, dest / name)
+        return artifact_id
+
+    def path(self, artifact_id: str, name: str) -> Path | None:
+        """Path of one file of an artifact, None if it doesn't exist (yet)."""
+        art_dir = self._dir(artifact_id)
+        if art_dir is None or "/" in name:
+            return None
+        path = art_dir / name
+        if not path.is_file():
+            return None
+        os.utime(art_dir)  # keep the artifact alive while it is used
+        return path
+
+    def add(self, artifact_id: str, src: Path) -> Path | None:
+        """Add an exported file to an existing artifact. Returns its new path."""
+        art_dir = self._dir(artifact_id)
+        if art_dir is None or not art_dir.is_dir():
+            return None
+        staging = art_dir / f".tmp-{uuid.uuid4().hex}"
+        shutil.copyfile(src, staging)
+        dest = art_dir / src.name
+        os.replace(staging, dest)  # atomic — concurrent readers never see half a file
+        return dest
+
+    def _cleanup(self):
+        if not self.root.exists():
+            return
+        cutoff = time.time() - self.ttl
+        for art_dir in self.root.iterdir():
+            try:
+                if art_dir.is_dir() and art_dir.stat().st_mtime < cutoff:
+                    shutil.rmtree(art_dir, ignore_errors=True)
+            except FileNotFoundError:
+                continue
+
+
+_store: ArtifactStore | None = None
+
+
+def get_artifact_store() -> ArtifactStore:
+    global _store
+    if _store is None:
+        _store = ArtifactStore(ARTIFACT_DIR, ARTIFACT_TTL)
+    return _store
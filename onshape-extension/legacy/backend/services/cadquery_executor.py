@@ -0,0 +1,644 @@
+"""CadQuery execution backends — run a script file, capture stdout/stderr.
+
+Backends (selected by EXEC_BACKEND):
+- "subprocess" (default): fresh interpreter per job (pays the cadquery import every time)
+- "pool": long-lived workers with cadquery pre-imported (see cadquery_runner.py)
+- "fork": one zygote with cadquery pre-imported that fork()s a child per job —
+  clean OCC state per job like "subprocess", without the import cost
+
+Every backend returns the same dict:
+    {"returncode": int | None, "stdout": str, "stderr": str, "timed_out": bool,
+     "peak_rss_mb": float | None, "cpu_s": float | None, "exit_reason": str}
+
+Jobs run under EXEC_MAX_CPU_S / EXEC_MAX_MEM_MB rlimits (applied by the
+runner); exit_reason tells a limit hit apart from a crash or a plain error.
+A supervisor polls the runner's heartbeat and cancels (= kills) jobs stuck
+in one CadQuery/OCC operation past its budget (EXEC_OP_BUDGET_S /
+EXEC_OP_BUDGETS), long before EXEC_TIMEOUT; exit_reason is then "stalled".
+
+All backends are fully async, and at most EXEC_CONCURRENCY jobs run at
+once; the rest wait in a FIFO queue whose depth and wait times are
+reported by `stats()`.
+"""
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import signal
+import time
+from collections import Counter, deque
+from pathlib import Path
+
+from ..config import (
+    EXEC_BACKEND, EXEC_TIMEOUT, EXEC_CONCURRENCY,
+    EXEC_POOL_SIZE, EXEC_POOL_MAX_JOBS, EXEC_POOL_MAX_RSS_MB,
+    EXEC_MAX_CPU_S, EXEC_MAX_MEM_MB, EXEC_OP_BUDGET_S, EXEC_OP_BUDGETS,
+)
+
+log = logging.getLogger(__name__)
+
+RUNNER_SCRIPT = Path(__file__).resolve().parent / "cadquery_runner.py"
+STDOUT_FILE = ".stdout"  # must match cadquery_runner.py
+STDERR_FILE = ".stderr"
+USAGE_FILE = ".usage"
+HEARTBEAT_FILE = ".heartbeat"
+HEARTBEAT_POLL = 0.5  # [s]
+WORKER_START_TIMEOUT = 60  # [s] cold import of cadquery/OCP
+
+# Per-job rlimits sent to the runner (0 = unlimited)
+JOB_LIMITS = {"cpu_s": EXEC_MAX_CPU_S, "mem_mb": EXEC_MAX_MEM_MB}
+# Markers of a failed allocation under RLIMIT_AS (Python and OCC side)
+OUT_OF_MEMORY_MARKERS = ("MemoryError", "Standard_OutOfMemory", "std::bad_alloc")
+CRASH_SIGNALS = {signal.SIGSEGV, signal.SIGABRT, signal.SIGBUS, signal.SIGFPE, signal.SIGILL}
+
+
+def exit_reason(returncode: int | None, stderr: str, timed_out: bool) -> str:
+    """Classify how a job ended.
+
+    ok | error | timeout | cpu_limit | memory_limit | crash (OCC segfault/
+    abort) | killed (SIGKILL from outside, e.g. the OOM killer) | signal
+    """
+    if timed_out:
+        return "timeout"
+    if returncode == 0:
+        return "ok"
+    if returncode is not None and returncode < 0:
+        sig = -returncode
+        if sig == signal.SIGXCPU:
+            return "cpu_limit"
+        if sig in CRASH_SIGNALS:
+            return "memory_limit" if any(m in stderr for m in OUT_OF_MEMORY_MARKERS) else "crash"
+        return "killed" if sig == signal.SIGKILL else "signal"
+    if any(m in stderr for m in OUT_OF_MEMORY_MARKERS):
+        return "memory_limit"
+    return "error"
+
+
+def _outcome(returncode, stdout="", stderr="", timed_out=False, usage=None, reason=None) -> dict:
+    usage = usage or {}
+    return {
+        "returncode": returncode,
+        "stdout": stdout,
+        "stderr": stderr,
+        "timed_out": timed_out,
+        "peak_rss_mb": usage.get("peak_rss_mb"),
+        "cpu_s": usage.get("cpu_s"),
+        "exit_reason": reason or exit_reason(returncode, stderr, timed_out),
+    }
+
+
+def _read_capture(out_dir: str, name: str) -> str:
+    path = Path(out_dir) / name
+    try:
+        return path.read_text(errors="replace")
+    except FileNotFoundError:
+        return ""
+
+
+# ---------------------------------------------------------------------------
+# Subprocess backend
+# ---------------------------------------------------------------------------
+
+async def _run_subprocess(script_path: str, out_dir: str, timeout: int, options: dict) -> dict:
+    proc = await asyncio.create_subprocess_exec(
+        "python3", str(RUNNER_SCRIPT), "run", script_path, out_dir,
+        json.dumps({"limits": JOB_LIMITS, **options}),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env={**os.environ, "OUT_DIR": out_dir},
+    )
+    try:
+        _, runner_err = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return _outcome(None, timed_out=True)
+    except asyncio.CancelledError:
+        proc.kill()
+        raise
+    # The job's own output is captured to files; the pipe only carries
+    # runner-level failures (e.g. interpreter crash before the job started)
+    stderr = _read_capture(out_dir, STDERR_FILE) + runner_err.decode(errors="replace")
+    try:
+        usage = json.loads(_read_capture(out_dir, USAGE_FILE) or "{}")
+    except ValueError:
+        usage = None
+    if proc.returncode is not None and proc.returncode < 0:
+        stderr += f"\nCadQuery process killed by signal {-proc.returncode}"
+    return _outcome(proc.returncode, _read_capture(out_dir, STDOUT_FILE), stderr, usage=usage)
+
+
+# ---------------------------------------------------------------------------
+# Worker pool backend
+# ---------------------------------------------------------------------------
+
+class _Worker:
+    def __init__(self, proc: asyncio.subprocess.Process):
+        self.proc = proc
+        self.jobs = 0
+        self.rss_mb = 0.0
+
+    def kill(self):
+        if self.proc.returncode is None:
+            try:
+                self.proc.kill()
+            except ProcessLookupError:
+                pass
+
+
+class WorkerPool:
+    """Fixed-size pool of warm CadQuery interpreters.
+
+    A worker is recycled after `max_jobs` jobs or once its RSS exceeds
+    `max_rss_mb`. A worker that crashes (segfault in OCC) or times out is
+    killed and replaced in the background — the job fails, the pool survives.
+    """
+
+    def __init__(self, size: int, max_jobs: int, max_rss_mb: int):
+        self.size = size
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self._idle: asyncio.Queue[_Worker | None] = asyncio.Queue()
+        self._live = 0  # idle + busy + spawning
+        self._job_id = 0
+        self._started = False
+        self._workers: set[_Worker] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def _spawn(self) -> _Worker:
+        proc = await asyncio.create_subprocess_exec(
+            "python3", "-u", str(RUNNER_SCRIPT), "pool",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+        )
+        worker = _Worker(proc)
+        self._workers.add(worker)
+        try:
+            line = await asyncio.wait_for(proc.stdout.readline(), WORKER_START_TIMEOUT)
+            ready = json.loads(line) if line else {}
+        except (asyncio.TimeoutError, ValueError):
+            ready = {}
+        except asyncio.CancelledError:
+            worker.kill()  # no orphaned half-started worker
+            self._workers.discard(worker)
+            self._background(proc.wait())
+            raise
+        if not ready.get("ready"):
+            worker.kill()
+            await proc.wait()
+            self._workers.discard(worker)
+            raise RuntimeError(f"CadQuery worker failed to start (exit {proc.returncode})")
+        log.info("CadQuery worker pid=%d ready (import %.2fs)", proc.pid, ready["import_s"])
+        return worker
+
+    async def _replenish(self):
+        """Spawn one worker into the idle queue.
+
+        On failure the slot is dropped and a None sentinel wakes up any
+        waiter, which then retries the spawn itself and reports the error.
+        """
+        try:
+            self._idle.put_nowait(await self._spawn())
+        except asyncio.CancelledError:
+            self._live -= 1
+            raise
+        except Exception as e:
+            self._live -= 1
+            log.error("Could not spawn CadQuery worker: %s", e)
+            self._idle.put_nowait(None)
+
+    async def _claim_new(self) -> _Worker | None:
+        """Spawn a worker for the caller in a free slot."""
+        self._live += 1
+        try:
+            return await self._spawn()
+        except asyncio.CancelledError:
+            self._live -= 1  # caller cancelled mid-spawn: give the slot back
+            raise
+        except Exception as e:
+            self._live -= 1
+            log.error("Could not spawn CadQuery worker: %s", e)
+            return None
+
+    async def start(self):
+        if self._started:
+            return
+        self._started = True
+        self._live = self.size
+        await asyncio.gather(*(self._replenish() for _ in range(self.size)))
+
+    async def close(self):
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for worker in list(self._workers):
+            worker.kill()
+            await worker.proc.wait()
+        self._workers.clear()
+        self._idle = asyncio.Queue()
+        self._live = 0
+        self._started = False
+
+    def _background(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _retire(self, worker: _Worker, reason: str):
+        log.info("Recycling CadQuery worker pid=%d: %s", worker.proc.pid, reason)
+        worker.kill()
+        self._workers.discard(worker)
+        self._background(worker.proc.wait())
+        self._background(self._replenish())
+
+    async def run(self, script_path: str, out_dir: str, timeout: int, options: dict | None = None) -> dict:
+        await self.start()
+        if self._idle.empty() and self._live < self.size:
+            # Slot lost to an earlier failed spawn — pay the cold start once
+            worker = await self._claim_new()
+        else:
+            worker = await self._idle.get()
+            if worker is None:
+                worker = await self._claim_new()
+        if worker is None:
+            return _outcome(None, stderr="No CadQuery worker available (spawn failed)")
+
+        self._job_id += 1
+        job = {
+            "id": self._job_id, "script": script_path, "out_dir": out_dir,
+            "limits": JOB_LIMITS, **(options or {}),
+        }
+
+        try:
+            worker.proc.stdin.write((json.dumps(job) + "\n").encode())
+            await worker.proc.stdin.drain()
+            line = await asyncio.wait_for(worker.proc.stdout.readline(), timeout)
+        except asyncio.TimeoutError:
+            self._retire(worker, "job timed out")
+            return _outcome(None, timed_out=True)
+        except asyncio.CancelledError:
+            self._retire(worker, "job cancelled")
+            raise
+        except (BrokenPipeError, ConnectionResetError):
+            line = b""
+
+        stdout = _read_capture(out_dir, STDOUT_FILE)
+        stderr = _read_capture(out_dir, STDERR_FILE)
+
+        if not line:
+            # Worker died mid-job (OCC segfault, OOM kill, ...)
+            returncode = await worker.proc.wait()
+            self._retire(worker, f"crashed (exit {returncode})")
+            stderr += f"\nCadQuery worker crashed (exit {returncode})"
+            return _outcome(returncode if returncode else 1, stdout, stderr)
+
+        reply = json.loads(line)
+        worker.jobs += 1
+        worker.rss_mb = reply.get("rss_mb", 0.0)
+        if worker.jobs >= self.max_jobs:
+            self._retire(worker, f"{worker.jobs} jobs")
+        elif worker.rss_mb > self.max_rss_mb:
+            self._retire(worker, f"RSS {worker.rss_mb:.0f} MB")
+        else:
+            self._idle.put_nowait(worker)
+        return _outcome(reply["returncode"], stdout, stderr, usage=reply)
+
+
+# ---------------------------------------------------------------------------
+# Fork-server backend
+# ---------------------------------------------------------------------------
+
+class ForkServer:
+    """Client for a `cadquery_runner.py forkserver` zygote process.
+
+    Jobs are multiplexed over one pipe; a reader task routes the zygote's
+    replies to per-job futures. On timeout the child is SIGKILLed directly
+    (same uid), the zygote reaps it. If the zygote itself dies, all pending
+    jobs fail and the next job starts a fresh one.
+    """
+
+    def __init__(self):
+        self._proc: asyncio.subprocess.Process | None = None
+        self._reader: asyncio.Task | None = None
+        self._pending: dict[int, asyncio.Future] = {}
+        self._pids: dict[int, int] = {}
+        self._job_id = 0
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        async with self._lock:
+            if self._proc is not None and self._proc.returncode is None:
+                return
+            proc = await asyncio.create_subprocess_exec(
+                "python3", "-u", str(RUNNER_SCRIPT), "forkserver",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+            )
+            try:
+                line = await asyncio.wait_for(proc.stdout.readline(), WORKER_START_TIMEOUT)
+                ready = json.loads(line) if line else {}
+            except (asyncio.TimeoutError, ValueError):
+                ready = {}
+            if not ready.get("ready"):
+                if proc.returncode is None:
+                    proc.kill()
+                await proc.wait()
+                raise RuntimeError(f"CadQuery fork server failed to start (exit {proc.returncode})")
+            log.info("CadQuery fork server pid=%d ready (import %.2fs)", proc.pid, ready["import_s"])
+            self._proc = proc
+            self._reader = asyncio.create_task(self._read_loop(proc))
+
+    async def _read_loop(self, proc: asyncio.subprocess.Process):
+        while True:
+            line = await proc.stdout.readline()
+            if not line:
+                break
+            msg = json.loads(line)
+            job_id = msg.get("id")
+            if "pid" in msg:
+                self._pids[job_id] = msg["pid"]
+            elif "returncode" in msg:
+                self._pids.pop(job_id, None)
+                fut = self._pending.pop(job_id, None)
+                if fut is not None and not fut.done():
+                    fut.set_result(msg)
+        returncode = await proc.wait()
+        if proc is self._proc:  # not a deliberate close()
+            log.error("CadQuery fork server exited (%d)", returncode)
+        for fut in self._pending.values():
+            if not fut.done():
+                fut.set_exception(RuntimeError(f"fork server exited ({returncode})"))
+        self._pending.clear()
+        self._pids.clear()
+
+    def _kill_child(self, job_id: int):
+        pid = self._pids.pop(job_id, None)
+        if pid is not None:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    async def close(self):
+        proc, self._proc = self._proc, None
+        if proc is not None and proc.returncode is None:
+            for job_id in list(self._pids):
+                self._kill_child(job_id)
+            proc.kill()
+            await proc.wait()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+    async def run(self, script_path: str, out_dir: str, timeout: int, options: dict | None = None) -> dict:
+        try:
+            await self.start()
+        except RuntimeError as e:
+            return _outcome(None, stderr=str(e))
+
+        self._job_id += 1
+        job_id = self._job_id
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[job_id] = fut
+        job = {
+            "id": job_id, "script": script_path, "out_dir": out_dir,
+            "limits": JOB_LIMITS, **(options or {}),
+        }
+
+        try:
+            self._proc.stdin.write((json.dumps(job) + "\n").encode())
+            await self._proc.stdin.drain()
+            reply = await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            self._kill_child(job_id)
+            return _outcome(None, timed_out=True)
+        except asyncio.CancelledError:
+            self._kill_child(job_id)
+            raise
+        except (RuntimeError, BrokenPipeError, ConnectionResetError) as e:
+            self._kill_child(job_id)
+            return _outcome(None, stderr=f"CadQuery fork server error: {e}")
+        finally:
+            self._pending.pop(job_id, None)
+
+        returncode = reply["returncode"]
+        stdout = _read_capture(out_dir, STDOUT_FILE)
+        stderr = _read_capture(out_dir, STDERR_FILE)
+        if returncode < 0:
+            stderr += f"\nCadQuery process killed by signal {-returncode}"
+        return _outcome(returncode, stdout, stderr, usage=reply)
+
+
+_pool: WorkerPool | None = None
+_fork_server: ForkServer | None = None
+
+
+def _get_pool() -> WorkerPool:
+    global _pool
+    if _pool is None:
+        _pool = WorkerPool(EXEC_POOL_SIZE, EXEC_POOL_MAX_JOBS, EXEC_POOL_MAX_RSS_MB)
+    return _pool
+
+
+def _get_fork_server() -> ForkServer:
+    global _fork_server
+    if _fork_server is None:
+        _fork_server = ForkServer()
+    return _fork_server
+
+
+# ---------------------------------------------------------------------------
+# Admission queue
+# ---------------------------------------------------------------------------
+
+class _ExecQueue:
+    """Bounded concurrency with a FIFO wait queue and wait-time accounting.
+
+    asyncio.Semaphore wakes waiters in arrival order, so it doubles as the
+    FIFO queue; this class only adds the bookkeeping around it.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._sem = asyncio.Semaphore(limit)
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self._waits: deque[float] = deque(maxlen=200)  # [s] recent queue waits
+
+    async def run(self, coro_fn, *args):
+        self.waiting += 1
+        t0 = time.monotonic()
+        try:
+            await self._sem.acquire()
+        finally:
+            self.waiting -= 1
+        wait_s = time.monotonic() - t0
+        self._waits.append(wait_s)
+        if wait_s > 1:
+            log.info("CadQuery job waited %.1fs in queue", wait_s)
+        self.running += 1
+        try:
+            return await coro_fn(*args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._sem.release()
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+        return {
+            "concurrency": self.limit,
+            "running": self.running,
+            "queue_depth": self.waiting,
+            "completed": self.completed,
+            "wait_avg_s": round(sum(waits) / len(waits), 3) if waits else None,
+            "wait_p95_s": round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else None,
+            "wait_max_s": round(waits[-1], 3) if waits else None,
+        }
+
+
+_queue: _ExecQueue | None = None
+
+
+def _get_queue() -> _ExecQueue:
+    global _queue
+    if _queue is None:
+        _queue = _ExecQueue(EXEC_CONCURRENCY)
+    return _queue
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+async def startup():
+    """Warm up the configured backend (called from the app lifespan)."""
+    if EXEC_BACKEND == "pool":
+        await _get_pool().start()
+    elif EXEC_BACKEND == "fork":
+        await _get_fork_server().start()
+
+
+async def shutdown():
+    if _pool is not None:
+        await _pool.close()
+    if _fork_server is not None:
+        await _fork_server.close()
+
+
+_peak_rss: deque[float] = deque(maxlen=200)  # [MB] recent per-job peaks
+_cpu: deque[float] = deque(maxlen=200)  # [s] recent per-job CPU times
+_exit_reasons: Counter = Counter()
+
+
+def _record_usage(outcome: dict):
+    _exit_reasons[outcome["exit_reason"]] += 1
+    if outcome["peak_rss_mb"] is not None:
+        _peak_rss.append(outcome["peak_rss_mb"])
+    if outcome["cpu_s"] is not None:
+        _cpu.append(outcome["cpu_s"])
+    if outcome["exit_reason"] in ("cpu_limit", "memory_limit", "killed"):
+        log.warning(
+            "CadQuery job stopped: %s (peak RSS %s MB, CPU %s s)",
+            outcome["exit_reason"], outcome["peak_rss_mb"], outcome["cpu_s"],
+        )
+
+
+def _p95(values) -> float | None:
+    values = sorted(values)
+    return round(values[int(0.95 * (len(values) - 1))], 3) if values else None
+
+
+def stats() -> dict:
+    """Queue depth, wait times, per-job resource use and backend info for /api/stats."""
+    data = {"backend": EXEC_BACKEND, **_get_queue().stats()}
+    if _pool is not None:
+        data["pool_workers"] = len(_pool._workers)
+    data.update({
+        "limits": JOB_LIMITS,
+        "peak_rss_mb_p95": _p95(_peak_rss),
+        "peak_rss_mb_max": max(_peak_rss, default=None),
+        "cpu_s_p95": _p95(_cpu),
+        "exit_reasons": dict(_exit_reasons),
+    })
+    return data
+
+
+async def _dispatch(script_path: str, out_dir: str, timeout: int, options: dict) -> dict:
+    if EXEC_BACKEND == "pool":
+        return await _get_pool().run(script_path, out_dir, timeout, options)
+    if EXEC_BACKEND == "fork":
+        return await _get_fork_server().run(script_path, out_dir, timeout, options)
+    return await _run_subprocess(script_path, out_dir, timeout, options)
+
+
+def op_budget(op: str) -> float:
+    """Stall budget of an operation [s]: EXEC_OP_BUDGETS by qualified or bare name."""
+    return EXEC_OP_BUDGETS.get(op, EXEC_OP_BUDGETS.get(op.rsplit(".", 1)[-1], EXEC_OP_BUDGET_S))
+
+
+async def _watch_heartbeat(out_dir: str) -> dict:
+    """Return the heartbeat once the job sat in one operation past its budget."""
+    path = Path(out_dir) / HEARTBEAT_FILE
+    while True:
+        await asyncio.sleep(HEARTBEAT_POLL)
+        try:
+            beat = json.loads(path.read_bytes())
+        except (OSError, ValueError):  # not written yet / torn read
+            continue
+        if not beat.get("op"):
+            continue
+        budget = op_budget(beat["op"])
+        elapsed = time.time() - beat["t"]
+        if budget and elapsed > budget:
+            return {**beat, "elapsed": elapsed, "budget": budget}
+
+
+async def _supervised(script_path: str, out_dir: str, timeout: int, options: dict) -> dict:
+    """Run a job, cancelling (= killing) it if an operation stalls."""
+    job = asyncio.create_task(_dispatch(script_path, out_dir, timeout, options))
+    if not options.get("watch_lines") or not (EXEC_OP_BUDGET_S or EXEC_OP_BUDGETS):
+        return await job
+    watchdog = asyncio.create_task(_watch_heartbeat(out_dir))
+    try:
+        await asyncio.wait({job, watchdog}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        stalled = not job.done()
+        job.cancel()
+        watchdog.cancel()
+    if not stalled:
+        return job.result()
+
+    stall = watchdog.result()
+    with contextlib.suppress(asyncio.CancelledError):
+        await job
+    log.warning(
+        "Killed CadQuery job stalled in %s at line %s (%.1fs > %.0fs budget)",
+        stall["op"], stall["line"], stall["elapsed"], stall["budget"],
+    )
+    return _outcome(None, stderr=(
+        f"Operation {stall['op']} stalled at line {stall['line']}: no progress for "
+        f"{stall['elapsed']:.1f}s (budget {stall['budget']:.0f}s)"
+    ), reason="stalled")
+
+
+async def run_script(
+    script_path: str, out_dir: str, timeout: int = EXEC_TIMEOUT, watch_lines: int = 0,
+    checkpoint: dict | None = None,
+) -> dict:
+    """Run a CadQuery script with OUT_DIR=out_dir on the configured backend.
+
+    The timeout covers execution only, not the time spent queued.
+    `watch_lines` enables stall detection for operations called from the
+    first lines of the script (the user code). `checkpoint` ({"dir",
+    "min_s"}) additionally runs those lines from/with geometry checkpoints,
+    see cadquery_runner.
+    """
+    options = {"watch_lines": watch_lines}
+    if checkpoint:
+        options["checkpoint"] = checkpoint
+    outcome = await _get_queue().run(_supervised, script_path, out_dir, timeout, options)
+    _record_usage(outcome)
+    return outcome
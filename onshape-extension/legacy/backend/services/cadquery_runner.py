@@ -0,0 +1,621 @@
+"""CadQuery job runner — long-lived process with cadquery pre-imported.
+
+This file is executed directly by the CadQuery interpreter (`python3
+cadquery_runner.py pool|forkserver|run`) and is never imported by the
+backend, so it must stay standalone: stdlib + cadquery only, no
+package-relative imports.
+
+Modes:
+- pool:        run jobs one after another in this interpreter
+- forkserver:  fork() a child per job — clean OCC state, no import cost
+- run:         run a single job (`run <script> <out_dir> [options]`) and exit with its code;
+               options is the job JSON below without id/script/out_dir
+
+Scripts run with a `__cadgen__` dict in their globals that the appended
+measurement/export harness uses for timings:
+    {"t_start": perf_counter at job start, "timings": {"import": s}}
+where "import" is the cadquery import time this job actually paid (0 for
+the warm pool/forkserver modes).
+
+Protocol (one JSON object per line):
+  parent → runner stdin:   {"id": 1, "script": "/tmp/.../code.py", "out_dir": "/tmp/...",
+                            "limits": {"cpu_s": 60, "mem_mb": 4096}, "watch_lines": 40,
+                            "checkpoint": {"dir": "~/.cache/.../checkpoints", "min_s": 0.5}}
+  runner → parent stdout:  {"ready": true, "import_s": 2.31}                 (once, at start)
+                           {"id": 1, "pid": 4242}                            (forkserver only)
+                           {"id": 1, "returncode": 0, "rss_mb": 412.0,       (per job)
+                            "peak_rss_mb": 530.2, "cpu_s": 3.1}
+
+Limits are rlimits (0 = unlimited): cpu_s is RLIMIT_CPU (the kernel sends
+SIGXCPU, which kills the job), mem_mb is RLIMIT_AS (allocations fail with
+MemoryError / Standard_OutOfMemory). peak_rss_mb and cpu_s describe the job
+alone; `run` mode writes them to `.usage` in out_dir instead.
+
+With watch_lines > 0, a profile hook publishes the CadQuery/OCC call that
+the first watch_lines lines of the script (the user code, not the appended
+harness) are currently inside to `.heartbeat` in out_dir:
+    {"op": "Workplane.fillet", "line": 12, "t": <time.time() at entry>}
+({"op": null} once the call returned). The parent polls it and kills jobs
+stuck in one operation past its budget.
+
+With checkpoint set, the top-level statements of the user code (the first
+watch_lines lines) run one by one. Whenever at least min_s of work piled up
+since the last checkpoint, the namespace is snapshotted into
+`<dir>/<prefix hash>/` (shapes and Workplanes as BREP, plain values
+pickled, modules by name; defs/imports are replayed). Workplanes are only
+snapshotted when plane + solids rebuild them exactly (no selections,
+`.workplane()` planes, tags or pending 2D state), otherwise no checkpoint
+is taken at that statement. A later script whose leading statements hash
+the same (AST, so comments and formatting don't matter) resumes from the
+longest such prefix; if the resumed run raises, that snapshot is deleted
+and the script re-runs from scratch. `__cadgen__["checkpoint"]` reports
+{"statements", "resumed_at", "saved"} (+ "resume_failed").
+
+The job's stdout/stderr (including C-level output from OCC) are redirected
+to `.stdout` / `.stderr` inside `out_dir`, so user `print()` calls can never
+corrupt the protocol channel.
+"""
+import ast
+import hashlib
+import importlib
+import json
+import os
+import pickle
+import resource
+import select
+import shutil
+import sys
+import time
+import traceback
+import types
+import uuid
+
+STDOUT_FILE = ".stdout"
+STDERR_FILE = ".stderr"
+USAGE_FILE = ".usage"
+HEARTBEAT_FILE = ".heartbeat"
+HEARTBEAT_SIZE = 256  # fixed record size, rewritten in place
+CHECKPOINT_STATE = "state.pkl"
+CHECKPOINT_FORMAT = 1
+MAX_CHECKPOINTS_PER_JOB = 4
+# Statements re-executed on resume instead of restored (bind code, not data)
+REPLAY_STMTS = (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+def _rss_mb() -> float:
+    """Current resident set size of this process [MB]."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process since the last reset [MB]."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024 / 1e6
+    except (OSError, ValueError):
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 / 1e6
+
+
+def _reset_peak_rss():
+    """Start a new VmHWM measurement (Linux >= 4.0), best effort."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _cpu_s(usage: resource.struct_rusage) -> float:
+    return usage.ru_utime + usage.ru_stime
+
+
+def set_limits(limits: dict | None) -> dict:
+    """Lower the soft CPU / address-space rlimits for one job.
+
+    The CPU limit counts from the CPU time already used, so it also works
+    inside a long-lived pool worker. Returns the previous soft limits for
+    `restore_limits`.
+    """
+    limits = limits or {}
+    saved = {}
+    cpu_s = limits.get("cpu_s") or 0
+    mem_mb = limits.get("mem_mb") or 0
+    for res, soft in (
+        (resource.RLIMIT_CPU, int(_cpu_s(resource.getrusage(resource.RUSAGE_SELF))) + cpu_s if cpu_s else 0),
+        (resource.RLIMIT_AS, mem_mb * 1024 * 1024 if mem_mb else 0),
+    ):
+        if not soft:
+            continue
+        old_soft, hard = resource.getrlimit(res)
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        try:
+            resource.setrlimit(res, (soft, hard))
+            saved[res] = old_soft
+        except (ValueError, OSError):
+            pass
+    return saved
+
+
+def restore_limits(saved: dict):
+    for res, soft in saved.items():
+        resource.setrlimit(res, (soft, resource.getrlimit(res)[1]))
+
+
+def _occ_name(fn) -> str | None:
+    """Qualified name of an OCP (OCC binding) callable, None for anything else."""
+    owner = getattr(fn, "__self__", None)
+    module = getattr(fn, "__module__", None)
+    if not (isinstance(module, str) and module.startswith("OCP")):
+        module = type(owner).__module__ if owner is not None else ""
+    if not module.startswith("OCP"):
+        return None
+    name = getattr(fn, "__name__", "?")
+    if owner is not None and not isinstance(owner, type(sys)):
+        return f"{type(owner).__name__}.{name}"
+    return name
+
+
+class _Heartbeat:
+    """Profile hook tracking the top-level CadQuery/OCC call of the user code.
+
+    Only calls made from the first `watch_lines` lines of `script` count;
+    nested calls inside cadquery are part of the tracked operation.
+    """
+
+    def __init__(self, script: str, out_dir: str, watch_lines: int):
+        self.script = script
+        self.watch_lines = watch_lines
+        self.active = None  # frame (Python call) or callable (C call) being tracked
+        self.fd = os.open(
+            os.path.join(out_dir, HEARTBEAT_FILE), os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        )
+
+    def _beat(self, op: str | None, line: int | None):
+        record = json.dumps({"op": op, "line": line, "t": time.time()}).encode()
+        os.pwrite(self.fd, record[:HEARTBEAT_SIZE].ljust(HEARTBEAT_SIZE), 0)
+
+    def _from_user(self, frame) -> bool:
+        return (frame is not None and frame.f_code.co_filename == self.script
+                and frame.f_lineno <= self.watch_lines)
+
+    def __call__(self, frame, event, arg):
+        if self.active is None:
+            if event == "call" and "cadquery" in frame.f_code.co_filename \
+                    and self._from_user(frame.f_back):
+                self.active = frame
+                code = frame.f_code
+                self._beat(getattr(code, "co_qualname", code.co_name), frame.f_back.f_lineno)
+            elif event == "c_call" and self._from_user(frame):
+                name = _occ_name(arg)
+                if name:
+                    self.active = arg
+                    self._beat(name, frame.f_lineno)
+        elif (event == "return" and frame is self.active) or (
+            event in ("c_return", "c_exception") and arg is self.active
+        ):
+            self.active = None
+            self._beat(None, None)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _plane_spec(plane) -> list:
+    return [plane.origin.toTuple(), plane.xDir.toTuple(), plane.zDir.toTuple()]
+
+
+def _restorable(cq, wp) -> bool:
+    """A Workplane that plane + shapes rebuild exactly.
+
+    Only solids/compounds on the plane its chain started with: selections
+    (faces, edges), `.workplane()` planes, tags and pending 2D state all
+    depend on the parent chain/context, which a snapshot doesn't keep.
+    """
+    if not wp.objects or not all(isinstance(o, (cq.Solid, cq.Compound)) for o in wp.objects):
+        return False
+    ctx = getattr(wp, "ctx", None)
+    if getattr(ctx, "pendingWires", None) or getattr(ctx, "pendingEdges", None) or getattr(ctx, "tags", None):
+        return False
+    root = wp
+    while getattr(root, "parent", None) is not None:
+        root = root.parent
+    return _plane_spec(root.plane) == _plane_spec(wp.plane)
+
+
+class _Checkpoints:
+    """Statement-level snapshots of the user code's namespace."""
+
+    def __init__(self, root: str, min_s: float, stmts: list[ast.stmt]):
+        self.root = os.path.expanduser(root)
+        self.min_s = min_s
+        self.stmts = stmts
+        cq = sys.modules.get("cadquery")
+        seed = f"{CHECKPOINT_FORMAT}|{sys.version}|{getattr(cq, '__version__', '')}"
+        h = hashlib.sha256(seed.encode())
+        self.hashes = []  # hashes[i] = prefix stmts[:i + 1]
+        for stmt in stmts:
+            h.update(ast.dump(stmt).encode())
+            self.hashes.append(h.copy().hexdigest()[:32])
+        self.saved = 0
+
+    def _replayed(self, upto: int) -> set[str]:
+        """Names bound by the replayable statements of stmts[:upto]."""
+        names = set()
+        for stmt in self.stmts[:upto]:
+            if isinstance(stmt, (ast.Import, ast.ImportFrom)):
+                names.update((a.asname or a.name).split(".")[0] for a in stmt.names)
+            elif isinstance(stmt, REPLAY_STMTS):
+                names.add(stmt.name)
+        return names
+
+    def discard(self, upto: int):
+        """Delete the snapshot after stmts[:upto] (a resume from it failed)."""
+        shutil.rmtree(os.path.join(self.root, self.hashes[upto - 1]), ignore_errors=True)
+
+    def latest(self) -> int:
+        """Number of statements covered by the longest stored prefix (0 = none)."""
+        for i in range(len(self.hashes) - 1, -1, -1):
+            path = os.path.join(self.root, self.hashes[i])
+            if os.path.isfile(os.path.join(path, CHECKPOINT_STATE)):
+                os.utime(path)  # LRU: in use
+                return i + 1
+        return 0
+
+    def save(self, namespace: dict, upto: int) -> bool:
+        """Snapshot `namespace` after stmts[:upto]; False if it can't be serialized."""
+        import cadquery as cq
+
+        path = os.path.join(self.root, self.hashes[upto - 1])
+        if os.path.isdir(path):
+            return True
+        replayed = self._replayed(upto)
+        state = {"upto": upto, "modules": {}, "values": {}, "shapes": {}}
+        shapes = {}  # id -> (file, shape), shared between names
+        for name, value in namespace.items():
+            if name.startswith("__"):
+                continue
+            if isinstance(value, types.ModuleType):
+                state["modules"][name] = value.__name__
+            elif isinstance(value, (cq.Workplane, cq.Shape)):
+                if isinstance(value, cq.Workplane) and not _restorable(cq, value):
+                    return False
+                objs = value.objects if isinstance(value, cq.Workplane) else [value]
+                files = []
+                for obj in objs:
+                    shapes.setdefault(id(obj), (f"s{len(shapes)}.brep", obj))
+                    files.append(shapes[id(obj)][0])
+                spec = {"files": files}
+                if isinstance(value, cq.Workplane):
+                    spec["plane"] = _plane_spec(value.plane)
+                state["shapes"][name] = spec
+            elif getattr(value, "__module__", None) == "__main__" and callable(value):
+                if name not in replayed:
+                    return False  # e.g. a lambda — can't be rebuilt
+            else:
+                try:
+                    state["values"][name] = pickle.dumps(value)
+                except Exception:  # noqa: BLE001 — unpicklable (OCP handles, generators, ...)
+                    return False
+
+        staging = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        try:
+            os.makedirs(staging)
+            for fname, shape in shapes.values():
+                shape.exportBrep(os.path.join(staging, fname))
+            with open(os.path.join(staging, CHECKPOINT_STATE), "wb") as f:
+                pickle.dump(state, f)
+            os.replace(staging, path)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            return False
+        self.saved += 1
+        return True
+
+    def load(self, namespace: dict, upto: int, script: str):
+        """Restore the snapshot after stmts[:upto] into `namespace`."""
+        import cadquery as cq
+
+        path = os.path.join(self.root, self.hashes[upto - 1])
+        with open(os.path.join(path, CHECKPOINT_STATE), "rb") as f:
+            state = pickle.load(f)
+        for stmt in self.stmts[:upto]:
+            if isinstance(stmt, REPLAY_STMTS):
+                exec(compile(ast.Module([stmt], []), script, "exec"), namespace)
+        for name, module in state["modules"].items():
+            namespace[name] = importlib.import_module(module)
+        for name, data in state["values"].items():
+            namespace[name] = pickle.loads(data)
+        loaded = {}
+        for name, spec in state["shapes"].items():
+            objs = [
+                loaded.setdefault(fname, cq.Shape.importBrep(os.path.join(path, fname)))
+                for fname in spec["files"]
+            ]
+            if "plane" in spec:
+                origin, x_dir, normal = spec["plane"]
+                namespace[name] = cq.Workplane(cq.Plane(origin, x_dir, normal)).add(objs)
+            else:
+                namespace[name] = objs[0]
+
+
+def _exec_checkpointed(source: str, script: str, namespace: dict, user_lines: int, options: dict):
+    """Run the user statements one by one with checkpoints, then the rest.
+
+    If a run resumed from a snapshot raises, the snapshot is dropped and
+    the script re-runs from scratch — only that run's error is reported.
+    """
+    tree = ast.parse(source, script)
+    user = [s for s in tree.body if s.end_lineno <= user_lines]
+    rest = tree.body[len(user):]
+    checkpoints = _Checkpoints(options["dir"], options.get("min_s", 0.5), user)
+    timings = namespace["__cadgen__"]["timings"]
+    info = namespace["__cadgen__"]["checkpoint"] = {
+        "statements": len(user), "resumed_at": 0, "saved": 0,
+    }
+
+    def reset():
+        for name in [n for n in namespace if not n.startswith("__")]:
+            del namespace[name]
+
+    start = checkpoints.latest()
+    if start:
+        t0 = time.perf_counter()
+        try:
+            checkpoints.load(namespace, start, script)
+            info["resumed_at"] = start
+        except Exception:  # noqa: BLE001 — damaged/incompatible snapshot: run from scratch
+            reset()
+            start = 0
+        timings["checkpoint_load"] = time.perf_counter() - t0
+
+    try:
+        _run_statements(checkpoints, user, rest, start, script, namespace)
+    except Exception:
+        if not start:
+            raise
+        checkpoints.discard(start)
+        reset()
+        info["resumed_at"] = 0
+        info["resume_failed"] = start
+        _run_statements(checkpoints, user, rest, 0, script, namespace)
+
+
+def _run_statements(
+    checkpoints: _Checkpoints, user: list[ast.stmt], rest: list[ast.stmt], start: int,
+    script: str, namespace: dict,
+):
+    timings = namespace["__cadgen__"]["timings"]
+    info = namespace["__cadgen__"]["checkpoint"]
+    t_work = time.perf_counter()
+    save_s = 0.0
+    for i in range(start, len(user)):
+        exec(compile(ast.Module([user[i]], []), script, "exec"), namespace)
+        now = time.perf_counter()
+        if now - t_work >= checkpoints.min_s and checkpoints.saved < MAX_CHECKPOINTS_PER_JOB:
+            checkpoints.save(namespace, i + 1)
+            t_work = time.perf_counter()
+            save_s += t_work - now
+    if save_s:
+        timings["checkpoint_save"] = timings.get("checkpoint_save", 0.0) + save_s
+    info["saved"] = checkpoints.saved
+    exec(compile(ast.Module(rest, []), script, "exec"), namespace)
+
+
+def run_script(
+    script: str, out_dir: str, import_s: float = 0.0, watch_lines: int = 0,
+    checkpoint: dict | None = None,
+) -> int:
+    """Execute one script file in a fresh namespace. Returns an exit code.
+
+    stdout/stderr are redirected at fd level into `out_dir`, cwd and
+    OUT_DIR point at `out_dir` for the duration of the job. With
+    `watch_lines`, operations of those first lines are heartbeat-tracked;
+    with `checkpoint` too, they run from/with statement checkpoints.
+    """
+    saved_fds = (os.dup(1), os.dup(2))
+    saved_cwd = os.getcwd()
+    saved_out_dir = os.environ.get("OUT_DIR")
+    out_f = open(os.path.join(out_dir, STDOUT_FILE), "w")
+    err_f = open(os.path.join(out_dir, STDERR_FILE), "w")
+    returncode = 0
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(out_f.fileno(), 1)
+        os.dup2(err_f.fileno(), 2)
+        os.environ["OUT_DIR"] = out_dir
+        os.chdir(out_dir)
+
+        with open(script) as f:
+            source = f.read()
+        namespace = {
+            "__name__": "__main__",
+            "__file__": script,
+            "__cadgen__": {
+                "t_start": time.perf_counter(),
+                "timings": {"import": import_s},
+            },
+        }
+        heartbeat = _Heartbeat(script, out_dir, watch_lines) if watch_lines else None
+        try:
+            if heartbeat:
+                sys.setprofile(heartbeat)
+            if checkpoint and watch_lines:
+                _exec_checkpointed(source, script, namespace, watch_lines, checkpoint)
+            else:
+                exec(compile(source, script, "exec"), namespace)
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                returncode = e.code if isinstance(e.code, int) else 1
+                if not isinstance(e.code, int):
+                    print(e.code, file=sys.stderr)
+        except BaseException as e:  # noqa: BLE001 — report like the interpreter would
+            # Skip the runner's frames so the traceback starts at the user's script
+            tb = e.__traceback__
+            while tb is not None and tb.tb_frame.f_code.co_filename != script:
+                tb = tb.tb_next
+            traceback.print_exception(type(e), e, tb or e.__traceback__.tb_next)
+            returncode = 1
+        finally:
+            if heartbeat:
+                sys.setprofile(None)
+                heartbeat.close()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved_fds[0], 1)
+        os.dup2(saved_fds[1], 2)
+        for fd in saved_fds:
+            os.close(fd)
+        out_f.close()
+        err_f.close()
+        os.chdir(saved_cwd)
+        if saved_out_dir is None:
+            os.environ.pop("OUT_DIR", None)
+        else:
+            os.environ["OUT_DIR"] = saved_out_dir
+    return returncode
+
+
+def _startup():
+    """Reserve the protocol channel and pre-import cadquery.
+
+    Returns the protocol file. Everything else printed to fd 1 (stray
+    prints, OCC messages) goes to /dev/null between jobs.
+    """
+    proto = os.fdopen(os.dup(1), "w", buffering=1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+    t0 = time.perf_counter()
+    import cadquery  # noqa: F401 — the whole point of this process
+    import_s = time.perf_counter() - t0
+    proto.write(json.dumps({"ready": True, "import_s": round(import_s, 3)}) + "\n")
+    return proto
+
+
+def serve_pool() -> None:
+    """Worker loop: run jobs read from stdin in this interpreter."""
+    proto = _startup()
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        _reset_peak_rss()
+        cpu0 = _cpu_s(resource.getrusage(resource.RUSAGE_SELF))
+        saved = set_limits(job.get("limits"))
+        try:
+            returncode = run_script(
+                job["script"], job["out_dir"], watch_lines=job.get("watch_lines", 0),
+                checkpoint=job.get("checkpoint"),
+            )
+        finally:
+            restore_limits(saved)
+        proto.write(json.dumps({
+            "id": job["id"],
+            "returncode": returncode,
+            "rss_mb": round(_rss_mb(), 1),
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+            "cpu_s": round(_cpu_s(resource.getrusage(resource.RUSAGE_SELF)) - cpu0, 3),
+        }) + "\n")
+
+
+def _exit_code(status: int) -> int:
+    """waitpid status → subprocess-style return code (negative = signal)."""
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def serve_forkserver() -> None:
+    """Zygote loop: fork a child per job, report pid, exit code and usage.
+
+    Single-threaded on purpose (fork + threads don't mix): stdin is
+    polled with select() and children are reaped with wait4(WNOHANG) in
+    between, which also yields their peak RSS and CPU time.
+    """
+    proto = _startup()
+    children: dict[int, int] = {}  # pid -> job id
+    buf = b""
+    stdin_open = True
+
+    while stdin_open or children:
+        if stdin_open:
+            ready, _, _ = select.select([0], [], [], 0.05)
+        else:
+            ready = []
+            time.sleep(0.05)
+        if ready:
+            chunk = os.read(0, 65536)
+            if not chunk:
+                stdin_open = False
+            buf += chunk
+            while b"\n" in buf:
+                line, buf = buf.split(b"\n", 1)
+                if not line.strip():
+                    continue
+                job = json.loads(line)
+                pid = os.fork()
+                if pid == 0:
+                    # Child: run the job and leave without running atexit/finalizers
+                    code = 1
+                    try:
+                        os.close(0)
+                        set_limits(job.get("limits"))
+                        code = run_script(
+                            job["script"], job["out_dir"], watch_lines=job.get("watch_lines", 0),
+                            checkpoint=job.get("checkpoint"),
+                        )
+                    finally:
+                        os._exit(code)
+                children[pid] = job["id"]
+                proto.write(json.dumps({"id": job["id"], "pid": pid}) + "\n")
+
+        while children:
+            pid, status, usage = os.wait4(-1, os.WNOHANG)
+            if pid == 0:
+                break
+            job_id = children.pop(pid, None)
+            if job_id is not None:
+                proto.write(json.dumps({
+                    "id": job_id,
+                    "returncode": _exit_code(status),
+                    "peak_rss_mb": round(usage.ru_maxrss * 1024 / 1e6, 1),
+                    "cpu_s": round(_cpu_s(usage), 3),
+                }) + "\n")
+
+
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else "pool"
+    if mode == "pool":
+        serve_pool()
+    elif mode == "forkserver":
+        serve_forkserver()
+    elif mode == "run":
+        options = json.loads(sys.argv[4]) if len(sys.argv) > 4 else {}
+        set_limits(options.get("limits"))
+        t0 = time.perf_counter()
+        import cadquery  # noqa: F401 — timed separately from the user script
+        code = run_script(
+            sys.argv[2], sys.argv[3], time.perf_counter() - t0,
+            options.get("watch_lines", 0), options.get("checkpoint"),
+        )
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        with open(os.path.join(sys.argv[3], USAGE_FILE), "w") as f:
+            json.dump({"peak_rss_mb": round(usage.ru_maxrss * 1024 / 1e6, 1),
+                       "cpu_s": round(_cpu_s(usage), 3)}, f)
+        sys.exit(code)
+    else:
+        print(f"Unknown runner mode: {mode}", file=sys.stderr)
+        sys.exit(2)
@@ -1,176 +1,796 @@
-"""CadQuery execution — subprocess with validation and STEP export."""
-import base64
-import os
-import re
-import subprocess
+"""CadQuery execution — harness, validation and STEP export."""
+import asyncio
+import hashlib
+import json
+import logging
 import tempfile
+import time
 from pathlib import Path
 
-from ..config import EXEC_TIMEOUT
+from ..config import (
+    CHECKPOINT_DIR, CHECKPOINT_MAX_MB, CHECKPOINT_MIN_S,
+    EXEC_MAX_CPU_S, EXEC_MAX_MEM_MB, EXEC_SCRATCH_DIR, EXEC_TIMEOUT, MATERIALS_FILE,
+    MESH_ANGULAR_TOLERANCE, MESH_QUALITY, MESH_TOLERANCE,
+    PREVIEW_HLR, PREVIEW_VIEWS,
+)
+from .artifact_store import get_artifact_store
+from .cadquery_executor import run_script
+from .result_cache import ResultCache, cache_key, get_result_cache
+
+log = logging.getLogger(__name__)
+
+# Projection direction of every named SVG view
+VIEW_DIRECTIONS = {
+    "iso": (1, -1, 0.5),
+    "front": (0, -1, 0),
+    "back": (0, 1, 0),
+    "left": (-1, 0, 0),
+    "right": (1, 0, 0),
+    "top": (0, 0, 1),
+    "bottom": (0, 0, -1),
+    "iso_back": (-1, 1, 0.5),
+}
+# Views rendered with every eager export (iso + front feed the visual check)
+SVG_VIEWS = list(dict.fromkeys(["iso", "front"] + [v for v in PREVIEW_VIEWS if v in VIEW_DIRECTIONS]))
+
+# Tessellation quality tiers: (linear deflection, relative to edge size;
+# angular deflection [rad]). "standard" is the configured MESH_TOLERANCE.
+QUALITY_TIERS = {
+    "preview": (0.5, 0.5),
+    "standard": (MESH_TOLERANCE, MESH_ANGULAR_TOLERANCE),
+    "print": (0.01, 0.05),
+}
+
+# Files the harness writes into OUT_DIR that make up a result
+ARTIFACT_FILES = [
+    "model.brep", "output.step",
+    *(f"mesh_{q}.npz" for q in QUALITY_TIERS),
+    *(f"output_{q}.{fmt}" for q in QUALITY_TIERS for fmt in ("stl", "3mf", "glb")),
+    *(f"preview_{v}.svg" for v in SVG_VIEWS),
+]
+METRICS_FILE = "metrics.json"
+BREP_FILE = "model.brep"
+# Mesh formats, all written from the shared tessellation buffer
+MESH_FORMATS = {"stl", "3mf", "glb"}
+DEFAULT_MESH_FORMATS = ["stl"]
+
+# Formats exported up front; lazy mode defers everything but STEP
+LAZY_FORMATS = ["step"]
+
+
+def mesh_filename(quality: str) -> str:
+    """Tessellation buffer (float32 vertices + uint32 triangles) of one tier."""
+    return f"mesh_{quality}.npz"
+
+
+def artifact_filename(fmt: str, view: str = "iso", quality: str = MESH_QUALITY) -> str | None:
+    """File name of an exported format inside an artifact, None if unknown."""
+    if fmt == "step":
+        return "output.step"
+    if fmt in MESH_FORMATS and quality in QUALITY_TIERS:
+        return f"output_{quality}.{fmt}"
+    if fmt == "svg" and view in VIEW_DIRECTIONS:
+        return f"preview_{view}.svg"
+    return None
+
+
+def _preview_opts(views: list[str]) -> dict:
+    """export.json options selecting the SVG views to render."""
+    return {"views": {v: VIEW_DIRECTIONS[v] for v in views}, "hlr": PREVIEW_HLR}
+
+
+def _mesh_opts(quality: str) -> dict:
+    """export.json options for the shared tessellation pass."""
+    return {"quality": quality, "mesh_tolerance": list(QUALITY_TIERS[quality])}
+
+
+_materials = None
+
+
+def _material_opts(material: str | None) -> dict:
+    """export.json material metadata (3MF) from materials.json."""
+    global _materials
+    if not material:
+        return {}
+    if _materials is None:
+        try:
+            with open(MATERIALS_FILE) as f:
+                _materials = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning("Material metadata unavailable: %s", e)
+            _materials = {}
+    info = _materials.get(material, {})
+    return {"material": {
+        "id": material,
+        "name": info.get("full_name", material),
+        "density_g_cm3": info.get("density_g_cm3"),
+    }}
+
+
+# Mesh size / export time per quality tier and format, for /api/stats
+_tier_stats: dict[str, dict] = {}
+
+
+def _record_mesh(metrics: dict | None):
+    mesh = (metrics or {}).get("mesh")
+    if not mesh:
+        return
+    timings = metrics.get("timings") or {}
+    tier = _tier_stats.setdefault(mesh["quality"], {
+        "meshes": 0, "triangles": 0, "tessellate_s": 0.0, "formats": {},
+    })
+    tier["meshes"] += 1
+    tier["triangles"] += mesh["triangles"]
+    tier["tessellate_s"] += timings.get("tessellate", 0.0)
+    for fmt, size in mesh.get("bytes", {}).items():
+        stat = tier["formats"].setdefault(fmt, {"exports": 0, "bytes": 0, "export_s": 0.0})
+        stat["exports"] += 1
+        stat["bytes"] += size
+        stat["export_s"] += timings.get(f"export_{fmt}", 0.0)
+
+
+# Geometry checkpoints (written by the runner, evicted LRU from here)
+_checkpoints = ResultCache(CHECKPOINT_DIR, CHECKPOINT_MAX_MB * 1_000_000, 0)
+_checkpoint_runs = {
+    "runs": 0, "resumed": 0, "resume_failed": 0, "statements": 0, "skipped": 0, "saved": 0,
+}
+
+
+def _record_checkpoint(metrics: dict | None):
+    info = (metrics or {}).get("checkpoint")
+    if not info:
+        return
+    _checkpoint_runs["runs"] += 1
+    _checkpoint_runs["resumed"] += bool(info["resumed_at"])
+    _checkpoint_runs["resume_failed"] += bool(info.get("resume_failed"))
+    _checkpoint_runs["statements"] += info["statements"]
+    _checkpoint_runs["skipped"] += info["resumed_at"]
+    _checkpoint_runs["saved"] += info["saved"]
+
+
+def checkpoint_stats() -> dict:
+    """Resume rate, share of user statements skipped and checkpoint store size."""
+    runs = _checkpoint_runs
+    store = _checkpoints.stats()
+    return {
+        "enabled": _checkpoints.enabled,
+        **runs,
+        "resume_ratio": round(runs["resumed"] / runs["runs"], 3) if runs["runs"] else None,
+        "skipped_ratio": round(runs["skipped"] / runs["statements"], 3) if runs["statements"] else None,
+        "entries": store["entries"],
+        "bytes": store["bytes"],
+    }
+
+
+def mesh_stats() -> dict:
+    """Average mesh size and export time per quality tier and format."""
+    return {
+        quality: {
+            "tolerance": QUALITY_TIERS[quality],
+            "meshes": t["meshes"],
+            "avg_triangles": round(t["triangles"] / t["meshes"]),
+            "avg_tessellate_s": round(t["tessellate_s"] / t["meshes"], 4),
+            "formats": {
+                fmt: {
+                    "exports": f["exports"],
+                    "avg_bytes": round(f["bytes"] / f["exports"]),
+                    "avg_export_s": round(f["export_s"] / f["exports"], 4),
+                }
+                for fmt, f in t["formats"].items()
+            },
+        }
+        for quality, t in _tier_stats.items()
+    }
+
 
 MEASUREMENT_CODE = """
 # === MEASUREMENT ===
-_r = result
-_bb = _r.val().BoundingBox()
-_vol = _r.val().Volume()
-_solids = len(_r.val().Solids())
-print(f"BBOX:{_bb.xmin:.2f},{_bb.ymin:.2f},{_bb.zmin:.2f},{_bb.xmax:.2f},{_bb.ymax:.2f},{_bb.zmax:.2f}")
-print(f"SIZE:{_bb.xlen:.2f}x{_bb.ylen:.2f}x{_bb.zlen:.2f}")
-print(f"VOLUME:{_vol:.2f}")
-print(f"SOLIDS:{_solids}")
+import json as _json
+import os as _os
+import time as _time
+_cg = globals().get("__cadgen__", {})
+_timings = dict(_cg.get("timings", {}))
+_t_measure = _time.perf_counter()
+if "t_start" in _cg:
+    _timings["execute"] = _t_measure - _cg["t_start"]
+_shape = result.val()
+_bb = _shape.BoundingBox()
+_com = _shape.Center()
+_solids = _shape.Solids()
+_metrics = {
+    "bounding_box": {
+        "min": [round(_bb.xmin, 2), round(_bb.ymin, 2), round(_bb.zmin, 2)],
+        "max": [round(_bb.xmax, 2), round(_bb.ymax, 2), round(_bb.zmax, 2)],
+    },
+    "size": [round(_bb.xlen, 2), round(_bb.ylen, 2), round(_bb.zlen, 2)],
+    "volume": round(_shape.Volume(), 2),
+    "surface_area": round(_shape.Area(), 2),
+    "center_of_mass": [round(_com.x, 3), round(_com.y, 3), round(_com.z, 3)],
+    "solid_count": len(_solids),
+    "solid_volumes": [round(_s.Volume(), 2) for _s in _solids],
+    "face_count": len(_shape.Faces()),
+    "edge_count": len(_shape.Edges()),
+}
+if "checkpoint" in _cg:
+    _metrics["checkpoint"] = _cg["checkpoint"]
+_timings["measure"] = _time.perf_counter() - _t_measure
+
+
+def _write_metrics():
+    _metrics["timings"] = {_k: round(_v, 4) for _k, _v in _timings.items()}
+    with open(_os.path.join(_os.environ.get("OUT_DIR", "."), "metrics.json"), "w") as _f:
+        _json.dump(_metrics, _f)
+
+
+_write_metrics()
 """
 
 EXPORT_CODE = """
 # === EXPORT ===
-import os as _os
+_t_export = _time.perf_counter()
 _out = _os.environ.get("OUT_DIR", ".")
 import cadquery as _cq
-_cq.exporters.export(result, _os.path.join(_out, "output.step"))
-_cq.exporters.export(result, _os.path.join(_out, "output.stl"))
+try:
+    with open(_os.path.join(_out, "export.json")) as _f:
+        _opts = _json.load(_f)
+except (OSError, ValueError):
+    _opts = {}
+_formats = _opts.get("formats", ["step", "stl", "svg"])
+
+if _opts.get("brep"):
+    # Keep the exact shape so other formats can be produced later on demand
+    _t = _time.perf_counter()
+    result.val().exportBrep(_os.path.join(_out, "model.brep"))
+    _timings["export_brep"] = _time.perf_counter() - _t
+if "step" in _formats:
+    _t = _time.perf_counter()
+    _cq.exporters.export(result, _os.path.join(_out, "output.step"))
+    _timings["export_step"] = _time.perf_counter() - _t
+
+# === TESSELLATION (one pass shared by mesh formats, poly previews, metrics) ===
+import numpy as _np
+_MESH_FORMATS = {"stl", "3mf", "glb"}
+_quality = _opts.get("quality", "standard")
+_mesh_tol = _opts.get("mesh_tolerance", [0.1, 0.1])  # linear (relative), angular [rad]
+_mesh = None
+if _MESH_FORMATS & set(_formats):
+    _t = _time.perf_counter()
+    if _opts.get("mesh_in"):
+        with _np.load(_opts["mesh_in"]) as _z:
+            _mesh = (_z["vertices"], _z["triangles"])
+    else:
+        _verts, _tris = result.val().tessellate(*_mesh_tol)
+        _verts = _np.array([_v.toTuple() for _v in _verts], dtype=_np.float32).reshape(-1, 3)
+        _tris = _np.array(_tris, dtype=_np.uint32).reshape(-1, 3)
+        # Weld the per-face copies of shared vertices (smaller, manifold for 3MF)
+        _verts, _inv = _np.unique(_verts, axis=0, return_inverse=True)
+        _tris = _inv.reshape(-1).astype(_np.uint32)[_tris]
+        _tris = _tris[(_tris[:, 0] != _tris[:, 1]) & (_tris[:, 1] != _tris[:, 2]) & (_tris[:, 0] != _tris[:, 2])]
+        _mesh = (_verts, _tris)
+        _np.savez(_os.path.join(_out, f"mesh_{_quality}.npz"), vertices=_mesh[0], triangles=_mesh[1])
+    _timings["tessellate"] = _time.perf_counter() - _t
+    _metrics["mesh"] = {
+        "quality": _quality,
+        "tolerance": _mesh_tol,
+        "vertices": len(_mesh[0]),
+        "triangles": len(_mesh[1]),
+        "bytes": {},
+    }
+
+
+def _write_stl(_path, _vertices, _triangles):
+    # Binary STL straight from the shared buffer
+    _tri = _vertices[_triangles]
+    _n = _np.cross(_tri[:, 1] - _tri[:, 0], _tri[:, 2] - _tri[:, 0])
+    _len = _np.linalg.norm(_n, axis=1, keepdims=True)
+    _n = _np.divide(_n, _len, out=_np.zeros_like(_n), where=_len > 0)
+    _rec = _np.zeros(len(_tri), dtype=[("n", "<f4", 3), ("v", "<f4", (3, 3)), ("attr", "<u2")])
+    _rec["n"] = _n
+    _rec["v"] = _tri
+    with open(_path, "wb") as _f:
+        _f.write(b"cadgen".ljust(80, b" "))
+        _f.write(_np.uint32(len(_rec)).tobytes())
+        _f.write(_rec.tobytes())
+
 
+def _write_3mf(_path, _vertices, _triangles, _material):
+    # 3MF core: zipped XML model in millimeters, material as a base material
+    import zipfile as _zipfile
+    from xml.sax.saxutils import escape as _esc
+    _name = _material.get("name") or "default"
+    _desc = f"Material: {_material.get('id', '')} ({_name})"
+    if _material.get("density_g_cm3"):
+        _desc += f", density {_material['density_g_cm3']} g/cm3"
+    _v = "".join(f'<vertex x="{_x:.4f}" y="{_y:.4f}" z="{_z:.4f}"/>' for _x, _y, _z in _vertices.tolist())
+    _tr = "".join(f'<triangle v1="{_a}" v2="{_b}" v3="{_c}"/>' for _a, _b, _c in _triangles.tolist())
+    _model = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<model unit="millimeter" xml:lang="en-US" '
+        'xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">'
+        '<metadata name="Application">cadgen</metadata>'
+        f'<metadata name="Description">{_esc(_desc)}</metadata>'
+        '<resources>'
+        f'<basematerials id="1"><base name="{_esc(_name, {chr(34): "&quot;"})}" displaycolor="#C8C8C8FF"/></basematerials>'
+        f'<object id="2" type="model" pid="1" pindex="0"><mesh><vertices>{_v}</vertices>'
+        f'<triangles>{_tr}</triangles></mesh></object>'
+        '</resources><build><item objectid="2"/></build></model>'
+    )
+    with _zipfile.ZipFile(_path, "w", _zipfile.ZIP_DEFLATED) as _z:
+        _z.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+            '</Types>'
+        ))
+        _z.writestr("_rels/.rels", (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Target="/3D/3dmodel.model" Id="rel0" '
+            'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>'
+            '</Relationships>'
+        ))
+        _z.writestr("3D/3dmodel.model", _model)
+
+
+def _write_glb(_path, _vertices, _triangles):
+    # glTF 2.0 binary with KHR_mesh_quantization: uint16 positions, dequantized
+    # by the node scale/translation; no normals (viewers derive flat normals)
+    import struct as _struct
+    _lo = _vertices.min(axis=0).astype(_np.float64)
+    _span = _np.maximum(_vertices.max(axis=0) - _lo, 1e-6)
+    _q = _np.zeros((len(_vertices), 4), dtype="<u2")  # 4th lane pads the stride to 8 bytes
+    _q[:, :3] = _np.round((_vertices - _lo) / _span * 65535)
+    _idx = _triangles.reshape(-1).astype("<u2" if len(_vertices) <= 65535 else "<u4")
+    _pos_bytes = _q.tobytes()
+    _idx_bytes = _idx.tobytes()
+    _bin = _pos_bytes + _idx_bytes + b"\\0" * (-len(_idx_bytes) % 4)
+    _gltf = {
+        "asset": {"version": "2.0", "generator": "cadgen"},
+        "extensionsUsed": ["KHR_mesh_quantization"],
+        "extensionsRequired": ["KHR_mesh_quantization"],
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{
+            "mesh": 0,
+            # Z-up (CAD) to Y-up (glTF): -90 deg about X, applied after the scale
+            "rotation": [-0.70710678, 0.0, 0.0, 0.70710678],
+            "translation": [float(_lo[0]), float(_lo[2]), float(-_lo[1])],
+            "scale": (_span / 65535).tolist(),
+        }],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}, "indices": 1, "material": 0}]}],
+        "materials": [{"pbrMetallicRoughness": {
+            "baseColorFactor": [0.78, 0.78, 0.78, 1.0], "metallicFactor": 0.0, "roughnessFactor": 0.8,
+        }}],
+        "buffers": [{"byteLength": len(_bin)}],
+        "bufferViews": [
+            {"buffer": 0, "byteOffset": 0, "byteLength": len(_pos_bytes), "byteStride": 8, "target": 34962},
+            {"buffer": 0, "byteOffset": len(_pos_bytes), "byteLength": len(_idx_bytes), "target": 34963},
+        ],
+        "accessors": [
+            {
+                "bufferView": 0, "componentType": 5123, "count": len(_q), "type": "VEC3",
+                "min": _q[:, :3].min(axis=0).tolist(), "max": _q[:, :3].max(axis=0).tolist(),
+            },
+            {
+                "bufferView": 1, "componentType": 5123 if _idx.itemsize == 2 else 5125,
+                "count": len(_idx), "type": "SCALAR",
+            },
+        ],
+    }
+    _doc = _json.dumps(_gltf, separators=(",", ":")).encode()
+    _doc += b" " * (-len(_doc) % 4)
+    with open(_path, "wb") as _f:
+        _f.write(_struct.pack("<4sII", b"glTF", 2, 12 + 8 + len(_doc) + 8 + len(_bin)))
+        _f.write(_struct.pack("<II", len(_doc), 0x4E4F534A) + _doc)
+        _f.write(_struct.pack("<II", len(_bin), 0x004E4942) + _bin)
+
+
+_MESH_WRITERS = {
+    "stl": _write_stl,
+    "3mf": lambda _p, _v, _t: _write_3mf(_p, _v, _t, _opts.get("material") or {}),
+    "glb": _write_glb,
+}
+for _fmt in [_f for _f in _formats if _f in _MESH_WRITERS]:
+    _t = _time.perf_counter()
+    _path = _os.path.join(_out, f"output_{_quality}.{_fmt}")
+    _MESH_WRITERS[_fmt](_path, *_mesh)
+    _timings[f"export_{_fmt}"] = _time.perf_counter() - _t
+    _metrics["mesh"]["bytes"][_fmt] = _os.path.getsize(_path)
+"""
+
+# Runs after EXPORT_CODE (shares _out/_opts/_formats); writes the final metrics
+PREVIEW_CODE = """
 # === SVG PREVIEWS (for visual validation) ===
-try:
-    _cq.exporters.export(result, _os.path.join(_out, "preview_iso.svg"),
-        exportType='SVG', opt={
-            "projectionDir": (1, -1, 0.5),
-            "width": 400, "height": 400,
-            "showAxes": False, "strokeWidth": 0.5,
-        })
-    _cq.exporters.export(result, _os.path.join(_out, "preview_front.svg"),
-        exportType='SVG', opt={
-            "projectionDir": (0, -1, 0),
-            "width": 400, "height": 400,
-            "showAxes": False, "strokeWidth": 0.5,
-        })
-except Exception:
-    pass  # SVG export is optional — don't fail the build
+def _svg_poly(_shape, _direction, _size=400):
+    # Hidden-line removal on the tessellation instead of the exact surfaces
+    from OCP.BRepMesh import BRepMesh_IncrementalMesh
+    from OCP.BRepTools import BRepTools
+    from OCP.HLRAlgo import HLRAlgo_Projector
+    from OCP.HLRBRep import HLRBRep_PolyAlgo, HLRBRep_PolyHLRToShape
+    from OCP.gp import gp_Ax2, gp_Dir, gp_Pnt
+    if not BRepTools.Triangulation_s(_shape.wrapped, _mesh_tol[0]):
+        # Same parameters as the tessellation pass, whose triangulation is reused
+        BRepMesh_IncrementalMesh(_shape.wrapped, _mesh_tol[0], True, _mesh_tol[1], True)
+    _algo = HLRBRep_PolyAlgo(_shape.wrapped)
+    _algo.Projector(HLRAlgo_Projector(gp_Ax2(gp_Pnt(0, 0, 0), gp_Dir(*_direction))))
+    _algo.Update()
+    _hlr = HLRBRep_PolyHLRToShape()
+    _hlr.Update(_algo)
+
+    def _polylines(*_compounds):
+        _lines = []
+        for _c in _compounds:
+            if _c.IsNull():
+                continue
+            for _e in _cq.Shape.cast(_c).Edges():
+                _n = 1 if _e.geomType() == "LINE" else 8
+                _pts = [_e.positionAt(_i / _n) for _i in range(_n + 1)]
+                _lines.append([(_p.x, -_p.y) for _p in _pts])  # SVG y points down
+        return _lines
+
+    _visible = _polylines(_hlr.VCompound(), _hlr.OutLineVCompound())
+    _hidden = _polylines(_hlr.HCompound(), _hlr.OutLineHCompound())
+    _xy = [_p for _l in _visible + _hidden for _p in _l] or [(0.0, 0.0)]
+    _x0, _x1 = min(_p[0] for _p in _xy), max(_p[0] for _p in _xy)
+    _y0, _y1 = min(_p[1] for _p in _xy), max(_p[1] for _p in _xy)
+    _m = max(_x1 - _x0, _y1 - _y0, 1e-6) * 0.1
+
+    def _path(_lines):
+        return " ".join(
+            "M" + " L".join(f"{_x:.3f},{_y:.3f}" for _x, _y in _l) for _l in _lines
+        )
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{_size}" height="{_size}" '
+        f'viewBox="{_x0 - _m:.3f} {_y0 - _m:.3f} {_x1 - _x0 + 2 * _m:.3f} {_y1 - _y0 + 2 * _m:.3f}">'
+        '<g fill="none" stroke-width="0.5" vector-effect="non-scaling-stroke">'
+        f'<path stroke="rgb(160,160,160)" stroke-dasharray="2,2" vector-effect="non-scaling-stroke" d="{_path(_hidden)}"/>'
+        f'<path stroke="rgb(0,0,0)" vector-effect="non-scaling-stroke" d="{_path(_visible)}"/>'
+        "</g></svg>"
+    )
+
+
+def _render_view(_view, _direction, _hlr):
+    _path = _os.path.join(_out, f"preview_{_view}.svg")
+    if _hlr == "poly":
+        try:
+            _svg = _svg_poly(result.val(), _direction)
+            with open(_path, "w") as _f:
+                _f.write(_svg)
+            return
+        except Exception:
+            pass  # fall back to exact HLR
+    _cq.exporters.export(result, _path, exportType='SVG', opt={
+        "projectionDir": tuple(_direction),
+        "width": 400, "height": 400,
+        "showAxes": False, "strokeWidth": 0.5,
+    })
+
+
+_views = _opts.get("views", {"iso": (1, -1, 0.5), "front": (0, -1, 0)}) if "svg" in _formats else {}
+_hlr_mode = _opts.get("hlr", "exact")
+_t_svg = _time.perf_counter()
+if len(_views) > 1 and hasattr(_os, "fork"):
+    # One forked child per view: the shape is shared copy-on-write and the
+    # views render in parallel, so extra angles cost cores, not latency.
+    _children = {}
+    for _view, _direction in _views.items():
+        _pid = _os.fork()
+        if _pid == 0:
+            _code = 1
+            try:
+                _render_view(_view, _direction, _hlr_mode)
+                _code = 0
+            except BaseException:
+                pass  # SVG export is optional — don't fail the build
+            finally:
+                _os._exit(_code)
+        _children[_pid] = _view
+    while _children:
+        _pid, _ = _os.waitpid(-1, 0)
+        if _pid in _children:
+            _timings[f"export_svg_{_children.pop(_pid)}"] = _time.perf_counter() - _t_svg
+else:
+    for _view, _direction in _views.items():
+        _t = _time.perf_counter()
+        try:
+            _render_view(_view, _direction, _hlr_mode)
+        except Exception:
+            pass  # SVG export is optional — don't fail the build
+        _timings[f"export_svg_{_view}"] = _time.perf_counter() - _t
+if _views:
+    _timings["export_svg"] = _time.perf_counter() - _t_svg
+
+_timings["export"] = _time.perf_counter() - _t_export
+_write_metrics()
+"""
+
+# Code that reloads a stored BREP as `result`, for on-demand exports
+REIMPORT_CODE = """import cadquery as cq
+result = cq.Workplane("XY").add(cq.Shape.importBrep({brep_path!r}))
 """
 
 
-def parse_metrics(stdout: str) -> dict:
-    """Parse BBOX, SIZE, VOLUME, SOLIDS from CadQuery output."""
+def parse_metrics(out_dir: Path) -> dict:
+    """Load the metrics document the harness wrote to OUT_DIR/metrics.json.
+
+    The four core keys (bounding_box, size, volume, solid_count) are always
+    present, None if the harness didn't get that far.
+    """
     metrics = {
         "bounding_box": None,
         "size": None,
         "volume": None,
         "solid_count": None,
     }
-    bbox_match = re.search(
-        r"BBOX:([-\d.]+),([-\d.]+),([-\d.]+),([-\d.]+),([-\d.]+),([-\d.]+)",
-        stdout,
-    )
-    if bbox_match:
-        metrics["bounding_box"] = {
-            "min": [float(bbox_match.group(i)) for i in range(1, 4)],
-            "max": [float(bbox_match.group(i)) for i in range(4, 7)],
-        }
-    size_match = re.search(r"SIZE:([-\d.]+)x([-\d.]+)x([-\d.]+)", stdout)
-    if size_match:
-        metrics["size"] = [float(size_match.group(i)) for i in range(1, 4)]
-    vol_match = re.search(r"VOLUME:([-\d.]+)", stdout)
-    if vol_match:
-        metrics["volume"] = float(vol_match.group(1))
-    sol_match = re.search(r"SOLIDS:(\d+)", stdout)
-    if sol_match:
-        metrics["solid_count"] = int(sol_match.group(1))
+    try:
+        metrics.update(json.loads((out_dir / METRICS_FILE).read_text()))
+    except (FileNotFoundError, ValueError):
+        pass
     return metrics
 
 
-async def execute_and_export(code: str) -> dict:
-    """Execute CadQuery code in subprocess, return STEP bytes + metrics.
+def _failure(error: str, metrics: dict | None = None) -> dict:
+    return {
+        "success": False,
+        "svg_iso": None,
+        "svg_front": None,
+        "metrics": metrics,
+        "error": error,
+        "cached": False,
+        "timings": {},
+        "artifact_id": None,
+        "resources": None,
+    }
+
 
-    Returns dict with keys: success, step_base64, stl_base64, metrics, error
+def _read_artifacts(out_dir: Path, metrics: dict) -> dict:
+    """Build the execute_and_export result from the files in `out_dir`.
+
+    STEP/STL stay on disk (served from the artifact store); only the small
+    SVG previews needed for visual validation are read into memory.
     """
-    with tempfile.TemporaryDirectory(prefix="cadgen_") as tmpdir:
-        script_path = Path(tmpdir) / "code.py"
-        full_code = code + "\n" + MEASUREMENT_CODE + "\n" + EXPORT_CODE
-        script_path.write_text(full_code)
+    step_path = out_dir / "output.step"
+    if not step_path.exists() or step_path.stat().st_size == 0:
+        return _failure("STEP file not produced", metrics)
 
-        try:
-            proc = subprocess.run(
-                ["python3", str(script_path)],
-                capture_output=True,
-                text=True,
-                timeout=EXEC_TIMEOUT,
-                env={**os.environ, "OUT_DIR": tmpdir},
+    # Read SVG previews (optional — may not exist if export failed)
+    svg_iso = None
+    svg_front = None
+    svg_iso_path = out_dir / "preview_iso.svg"
+    svg_front_path = out_dir / "preview_front.svg"
+    if svg_iso_path.exists():
+        svg_iso = svg_iso_path.read_text()
+    if svg_front_path.exists():
+        svg_front = svg_front_path.read_text()
+
+    return {
+        "success": True,
+        "svg_iso": svg_iso,
+        "svg_front": svg_front,
+        "metrics": metrics,
+        "error": None,
+        "cached": False,
+        "timings": {},
+        "artifact_id": None,
+        "resources": None,
+    }
+
+
+def _export_opts(formats: list[str], views: list[str], quality: str, material: str | None) -> dict:
+    """export.json for the harness; material metadata only matters for 3MF."""
+    return {
+        "formats": formats,
+        **_preview_opts(views), **_mesh_opts(quality),
+        **(_material_opts(material) if "3mf" in formats else {}),
+    }
+
+
+def _export_settings(export_opts: dict) -> dict:
+    """Everything besides the code that shapes the artifacts (part of the cache key)."""
+    harness = hashlib.sha256((MEASUREMENT_CODE + EXPORT_CODE + PREVIEW_CODE).encode()).hexdigest()
+    return {"harness": harness[:16], **export_opts}
+
+
+async def execute_and_export(
+    code: str,
+    lazy: bool = False,
+    quality: str | None = None,
+    mesh_formats: list[str] | None = None,
+    material: str | None = None,
+) -> dict:
+    """Execute CadQuery code on the configured backend, return artifact ID + metrics.
+
+    Successful results are served from the content-addressed result cache
+    when the same code (modulo comments/formatting) was executed before.
+
+    Every successful result is kept in the artifact store (exact BREP +
+    exported files) under `artifact_id`. With `lazy=True` only STEP is
+    exported up front; STL/SVG are produced later by `export_artifact`
+    from the stored BREP, without re-running the user code.
+
+    `mesh_formats` selects the mesh files exported up front (stl, 3mf,
+    glb; default stl), all written from one shared tessellation. `quality`
+    picks its tier (see QUALITY_TIERS, default MESH_QUALITY) and
+    metrics["mesh"] reports the triangle count and file size per format.
+    `material` (a materials.json key) is recorded in the 3MF.
+
+    Returns dict with keys: success, svg_iso, svg_front, metrics, error,
+    cached, timings, artifact_id, resources
+
+    The user code runs with geometry checkpoints: if an earlier script
+    shared its leading statements, execution resumes from the snapshot
+    after them, and metrics["checkpoint"] tells how many statements were
+    skipped (resumed_at) and how many snapshots were saved.
+
+    `resources` is the job's peak_rss_mb, cpu_s and exit_reason (see
+    cadquery_executor.exit_reason), None for cache hits.
+
+    `timings` holds the per-stage durations reported by the harness
+    (import, checkpoint_load, checkpoint_save, execute, measure, export_step, tessellate, export_<mesh format>,
+    export_svg_<view>, export_svg, export) plus `wall`, the end-to-end
+    time seen by the backend [s].
+    """
+    t0 = time.perf_counter()
+    quality = quality or MESH_QUALITY
+    if quality not in QUALITY_TIERS:
+        return _failure(f"Unknown quality tier: {quality}")
+    mesh_formats = mesh_formats or DEFAULT_MESH_FORMATS
+    if not set(mesh_formats) <= MESH_FORMATS:
+        return _failure(f"Unknown mesh format: {', '.join(sorted(set(mesh_formats) - MESH_FORMATS))}")
+    formats = LAZY_FORMATS if lazy else ["step", *mesh_formats, "svg"]
+    export_opts = _export_opts(formats, SVG_VIEWS, quality, material)
+    key = cache_key(code, _export_settings(export_opts))
+    result = await asyncio.to_thread(_from_cache, key)
+    if result is not None:
+        result["timings"] = {"wall": round(time.perf_counter() - t0, 4)}
+        return result
+
+    with tempfile.TemporaryDirectory(prefix="cadgen_", dir=EXEC_SCRATCH_DIR) as tmpdir:
+        result = await _execute(code, Path(tmpdir), {**export_opts, "brep": True}, checkpoint=True)
+        timings = {}
+        if (Path(tmpdir) / METRICS_FILE).exists():
+            timings = dict(parse_metrics(Path(tmpdir)).get("timings") or {})
+        timings["wall"] = round(time.perf_counter() - t0, 4)
+        result["timings"] = timings
+        log.info(
+            "CadQuery %s in %.2fs: %s",
+            "ok" if result["success"] else "failed", timings["wall"],
+            ", ".join(f"{k}={v:.2f}" for k, v in timings.items() if k != "wall"),
+        )
+        if result["success"]:
+            _record_mesh(result["metrics"])
+            result["artifact_id"] = await asyncio.to_thread(
+                _persist, key, Path(tmpdir), result["metrics"],
             )
-            success = proc.returncode == 0
-            stdout = proc.stdout
-            stderr = proc.stderr
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "step_base64": None,
-                "stl_base64": None,
-                "svg_iso": None,
-                "svg_front": None,
-                "metrics": None,
-                "error": f"Execution timed out after {EXEC_TIMEOUT}s",
-            }
-
-        if not success:
-            return {
-                "success": False,
-                "step_base64": None,
-                "stl_base64": None,
-                "svg_iso": None,
-                "svg_front": None,
-                "metrics": None,
-                "error": stderr[:500] if stderr else "CadQuery execution failed",
-            }
-
-        metrics = parse_metrics(stdout)
-
-        # Validate single solid
-        if metrics["solid_count"] is not None and metrics["solid_count"] != 1:
-            return {
-                "success": False,
-                "step_base64": None,
-                "stl_base64": None,
-                "svg_iso": None,
-                "svg_front": None,
-                "metrics": metrics,
-                "error": f"Expected 1 solid, got {metrics['solid_count']}",
-            }
-
-        # Read STEP file
-        step_path = Path(tmpdir) / "output.step"
-        stl_path = Path(tmpdir) / "output.stl"
-
-        step_b64 = None
-        stl_b64 = None
-        if step_path.exists():
-            step_b64 = base64.b64encode(step_path.read_bytes()).decode()
-        if stl_path.exists():
-            stl_b64 = base64.b64encode(stl_path.read_bytes()).decode()
-
-        if not step_b64:
-            return {
-                "success": False,
-                "step_base64": None,
-                "stl_base64": None,
-                "svg_iso": None,
-                "svg_front": None,
-                "metrics": metrics,
-                "error": "STEP file not produced",
-            }
-
-        # Read SVG previews (optional — may not exist if export failed)
-        svg_iso = None
-        svg_front = None
-        svg_iso_path = Path(tmpdir) / "preview_iso.svg"
-        svg_front_path = Path(tmpdir) / "preview_front.svg"
-        if svg_iso_path.exists():
-            svg_iso = svg_iso_path.read_text()
-        if svg_front_path.exists():
-            svg_front = svg_front_path.read_text()
-
-        return {
-            "success": True,
-            "step_base64": step_b64,
-            "stl_base64": stl_b64,
-            "svg_iso": svg_iso,
-            "svg_front": svg_front,
-            "metrics": metrics,
-            "error": None,
-        }
+        return result
+
+
+def _from_cache(key: str) -> dict | None:
+    """The result cached under `key`, published to the artifact store; None
+    on a miss. Runs in a thread, off the event loop — the artifact store
+    cleans up expired artifacts on create.
+    """
+    entry = get_result_cache().get(key)
+    if entry is None:
+        return None
+    result = _read_artifacts(entry["dir"], entry["meta"]["metrics"])
+    if not result["success"]:
+        return None
+    log.info("Result cache hit %s", key[:12])
+    result["cached"] = True
+    result["artifact_id"] = get_artifact_store().create(entry["dir"], ARTIFACT_FILES)
+    return result
+
+
+def _persist(key: str, out_dir: Path, metrics: dict) -> str:
+    """Copy a fresh result from scratch into the result cache and artifact store.
+
+    The artifact is hard-linked from the cache entry, so the files cross
+    from scratch (tmpfs) to disk once. Runs in a thread, off the event loop.
+    """
+    entry = get_result_cache().put(key, out_dir, ARTIFACT_FILES, {"metrics": metrics})
+    return get_artifact_store().create(entry or out_dir, ARTIFACT_FILES)
+
+
+async def export_artifact(
+    artifact_id: str,
+    fmt: str,
+    view: str = "iso",
+    quality: str | None = None,
+    material: str | None = None,
+) -> Path | None:
+    """Path of `fmt` for a stored artifact, exporting it from the BREP if needed.
+
+    Mesh formats are kept per quality tier, so a preview-quality artifact
+    can still be downloaded at print quality. `material` is only used when
+    a 3MF is exported for the first time.
+
+    Returns None if the artifact or format is unknown or the export failed.
+    """
+    store = get_artifact_store()
+    quality = quality or MESH_QUALITY
+    name = artifact_filename(fmt, view, quality)
+    if name is None:
+        return None
+    existing = store.path(artifact_id, name)
+    if existing is not None:
+        return existing
+    brep = store.path(artifact_id, BREP_FILE)
+    if brep is None:
+        return None
+
+    export_opts = _export_opts([fmt], [view] if fmt == "svg" else [], quality, material)
+    mesh_name = mesh_filename(quality)
+    mesh = store.path(artifact_id, mesh_name) if fmt in MESH_FORMATS else None
+    if mesh is not None:
+        export_opts["mesh_in"] = str(mesh)  # reuse the tessellation, don't re-mesh
+
+    with tempfile.TemporaryDirectory(prefix="cadgen_", dir=EXEC_SCRATCH_DIR) as tmpdir:
+        code = REIMPORT_CODE.format(brep_path=str(brep))
+        result = await _execute(code, Path(tmpdir), export_opts)
+        produced = Path(tmpdir) / name
+        if not produced.exists():
+            log.warning("On-demand %s export failed for %s: %s", name, artifact_id, result["error"])
+            return None
+        log.info("On-demand export %s/%s", artifact_id, name)
+        _record_mesh(result["metrics"])
+        if mesh is None and (Path(tmpdir) / mesh_name).exists():
+            store.add(artifact_id, Path(tmpdir) / mesh_name)
+        return store.add(artifact_id, produced)
+
+
+async def _execute(code: str, out_dir: Path, export_opts: dict, checkpoint: bool = False) -> dict:
+    """Run code + harness in `out_dir` and turn the outcome into a result dict.
+
+    With `checkpoint`, the user code resumes from / saves geometry
+    checkpoints (see cadquery_runner).
+    """
+    script_path = out_dir / "code.py"
+    full_code = code + "\n" + MEASUREMENT_CODE + "\n" + EXPORT_CODE + "\n" + PREVIEW_CODE
+    script_path.write_text(full_code)
+    (out_dir / "export.json").write_text(json.dumps(export_opts))
+
+    checkpoint = checkpoint and _checkpoints.enabled
+    # Heartbeat-watch (and checkpoint) the user code's operations, not the harness
+    outcome = await run_script(
+        str(script_path), str(out_dir), EXEC_TIMEOUT, watch_lines=len(code.splitlines()),
+        checkpoint={"dir": str(CHECKPOINT_DIR), "min_s": CHECKPOINT_MIN_S} if checkpoint else None,
+    )
+    result = _evaluate(outcome, out_dir)
+    if checkpoint:
+        metrics = parse_metrics(out_dir)
+        _record_checkpoint(metrics)
+        # Failed runs may have saved snapshots before the failing statement
+        if (metrics.get("checkpoint") or {}).get("saved", 1) and CHECKPOINT_DIR.is_dir():
+            await asyncio.to_thread(_checkpoints.evict)
+    result["resources"] = {
+        "peak_rss_mb": outcome["peak_rss_mb"],
+        "cpu_s": outcome["cpu_s"],
+        "exit_reason": outcome["exit_reason"],
+    }
+    return result
+
+
+def _evaluate(outcome: dict, out_dir: Path) -> dict:
+    success = outcome["returncode"] == 0
+    stderr = outcome["stderr"]
+    if outcome["timed_out"]:
+        return _failure(f"Execution timed out after {EXEC_TIMEOUT}s")
+    if outcome["exit_reason"] == "cpu_limit":
+        return _failure(f"Execution exceeded the CPU time limit ({EXEC_MAX_CPU_S}s)")
+    if outcome["exit_reason"] == "memory_limit":
+        limit = f"{EXEC_MAX_MEM_MB} MB" if EXEC_MAX_MEM_MB else "system memory"
+        return _failure(f"Execution exceeded the memory limit ({limit}):\n{stderr[-400:]}")
+
+    if not success:
+        return _failure(stderr[:500] if stderr else "CadQuery execution failed")
+
+    metrics = parse_metrics(out_dir)
+
+    # Validate single solid
+    if metrics["solid_count"] is not None and metrics["solid_count"] != 1:
+        return _failure(f"Expected 1 solid, got {metrics['solid_count']}", metrics)
+
+    return _read_artifacts(out_dir, metrics)
@@ -1,19 +1,27 @@
 """Claude CLI integration — prompt to CadQuery code generation.
 
 Uses `claude --print` (Claude Code CLI) which authenticates via the user's
-Max/Pro subscription.  No separate API key required.
+Max/Pro subscription.  No separate API key required. Calls go through
+llm_client.py (per-model concurrency limit, retries, hedging) onto
+pre-spawned stream-JSON sessions (see claude_sessions.py).
 """
 
 import asyncio
-import os
 import re
 
 import logging
 
-from ..config import CLAUDE_CLI, CLAUDE_MODEL, CLAUDE_TIMEOUT
+from ..config import CLAUDE_LOOKUP_TIMEOUT, CLAUDE_MODEL, CLAUDE_TIMEOUT, CLAUDE_VALIDATE_TIMEOUT
+from .claude_sessions import ClaudeCLIError, get_session_pool
+from .dimension_memo import get_dimension_memo, normalize, split_objects
+from .llm_cache import get_llm_cache, llm_cache_key
+from .llm_client import get_llm_client
+from .skill_loader import load_system_prompt
 
 log = logging.getLogger(__name__)
 
+LOOKUP_MODEL = "haiku"  # Fast model for lookup
+
 DIMENSION_LOOKUP_PROMPT = """You are a dimension lookup tool. Given the user's design request, identify the real-world objects referenced and return their EXACT physical dimensions in millimeters.
 
 RULES:
@@ -37,6 +45,12 @@ OBJECT: [name]
 User request:
 """
 
+# Appended to the lookup prompt when the dimension memo knows some objects
+LOOKUP_KNOWN_NOTE = """
+
+Dimensions of these objects are already known, do NOT list them: {names}
+Return only the other referenced real-world objects, or "NO_LOOKUP_NEEDED" if there are none."""
+
 MODIFY_WRAPPER = """You are a CadQuery code modifier. You will receive existing CadQuery code and a modification request.
 
 CRITICAL RULES:
@@ -155,70 +169,75 @@ def extract_python_code(response_text: str) -> str | None:
     return None
 
 
-async def generate_cadquery_code(
-    system_prompt: str,
-    user_prompt: str,
-    material: str = "PLA",
-) -> dict:
-    """Call Claude CLI (--print) and return extracted CadQuery code.
+async def _code_call(call_type: str, system_prompt: str, full_prompt: str, cache_key: str | None) -> dict:
+    """Run a generate/modify call (or answer it from the response cache).
 
-    Returns dict with keys: code, response_text, model, error
-    """
-    full_prompt = CODE_WRAPPER + user_prompt
-    if material != "PLA":
-        full_prompt += f"\n\nMaterial: {material}"
-
-    # Build environment — remove CLAUDECODE to avoid nesting check
-    env = {k: v for k, v in os.environ.items() if k != "CLAUDECODE"}
+    Nothing is written to the cache here: a response may still be dropped
+    (a cancelled speculative generation, code that never runs), so the
+    caller stores it under `cache_key` once it was used.
 
+    Returns dict with keys: code, response_text, model, error, cache_key, cached
+    """
+    cache = get_llm_cache()
+    cached = await asyncio.to_thread(cache.get, cache_key) if cache_key else None
+    if cached is not None:
+        log.info("LLM cache hit %s (%s)", cache_key[:12], call_type)
+        return {
+            "code": extract_python_code(cached),
+            "response_text": cached,
+            "model": CLAUDE_MODEL,
+            "error": None,
+            "cache_key": cache_key,
+            "cached": True,
+        }
     try:
-        proc = await asyncio.create_subprocess_exec(
-            CLAUDE_CLI,
-            "--print",
-            "--system-prompt", system_prompt,
-            "--model", CLAUDE_MODEL,
-            "--tools", "",
-            "--no-session-persistence",
-            full_prompt,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            env=env,
-        )
-        stdout, stderr = await asyncio.wait_for(
-            proc.communicate(), timeout=CLAUDE_TIMEOUT
+        response_text = await get_llm_client().call(
+            call_type, full_prompt, CLAUDE_MODEL, system_prompt, CLAUDE_TIMEOUT,
         )
-        response_text = stdout.decode()
-
-        if proc.returncode != 0:
-            error_text = stderr.decode()[:500]
-            return {
-                "code": None,
-                "response_text": None,
-                "model": CLAUDE_MODEL,
-                "error": f"Claude CLI error (exit {proc.returncode}): {error_text}",
-            }
-
         code = extract_python_code(response_text)
         return {
             "code": code,
             "response_text": response_text,
             "model": CLAUDE_MODEL,
             "error": None if code else "No Python code extracted from response",
+            "cache_key": cache_key if code else None,
+            "cached": False,
         }
     except asyncio.TimeoutError:
-        return {
-            "code": None,
-            "response_text": None,
-            "model": CLAUDE_MODEL,
-            "error": f"Claude CLI timed out after {CLAUDE_TIMEOUT}s",
-        }
-    except Exception as e:  # generate_cadquery_code
-        return {
-            "code": None,
-            "response_text": None,
-            "model": CLAUDE_MODEL,
-            "error": f"Claude CLI error: {e}",
-        }
+        error = f"Claude CLI timed out after {CLAUDE_TIMEOUT}s"
+    except ClaudeCLIError as e:
+        error = str(e)
+    except Exception as e:  # spawn failures etc.
+        error = f"Claude CLI error: {e}"
+    return {
+        "code": None,
+        "response_text": None,
+        "model": CLAUDE_MODEL,
+        "error": error,
+        "cache_key": None,
+        "cached": False,
+    }
+
+
+async def generate_cadquery_code(
+    system_prompt: str,
+    user_prompt: str,
+    material: str = "PLA",
+    cache: bool = False,
+) -> dict:
+    """Call Claude CLI (--print) and return extracted CadQuery code.
+
+    With `cache`, an identical earlier request (same system prompt, prompt,
+    material and model) is answered from the LLM response cache.
+
+    Returns dict with keys: code, response_text, model, error, cache_key,
+    cached (cache_key: where to store the response once used, see llm_cache)
+    """
+    full_prompt = CODE_WRAPPER + user_prompt
+    if material != "PLA":
+        full_prompt += f"\n\nMaterial: {material}"
+    key = llm_cache_key(system_prompt, CODE_WRAPPER, user_prompt, material, CLAUDE_MODEL) if cache else None
+    return await _code_call("generate", system_prompt, full_prompt, key)
 
 
 async def modify_cadquery_code(
@@ -226,65 +245,24 @@ async def modify_cadquery_code(
     previous_code: str,
     modification_prompt: str,
     material: str = "PLA",
+    cache: bool = False,
 ) -> dict:
     """Call Claude CLI to modify existing CadQuery code.
 
-    Returns dict with keys: code, response_text, model, error
+    `cache` as in generate_cadquery_code; auto-retry fixes leave it off, a
+    repeated fix prompt should get a fresh answer.
+
+    Returns dict with keys: code, response_text, model, error, cache_key, cached
     """
     full_prompt = MODIFY_WRAPPER.format(code=previous_code) + modification_prompt
     if material != "PLA":
         full_prompt += f"\n\nMaterial: {material}"
-
-    env = {k: v for k, v in os.environ.items() if k != "CLAUDECODE"}
-
-    try:
-        proc = await asyncio.create_subprocess_exec(
-            CLAUDE_CLI,
-            "--print",
-            "--system-prompt", system_prompt,
-            "--model", CLAUDE_MODEL,
-            "--tools", "",
-            "--no-session-persistence",
-            full_prompt,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            env=env,
+    key = None
+    if cache:
+        key = llm_cache_key(
+            system_prompt, MODIFY_WRAPPER, previous_code + "\n" + modification_prompt, material, CLAUDE_MODEL,
         )
-        stdout, stderr = await asyncio.wait_for(
-            proc.communicate(), timeout=CLAUDE_TIMEOUT
-        )
-        response_text = stdout.decode()
-
-        if proc.returncode != 0:
-            error_text = stderr.decode()[:500]
-            return {
-                "code": None,
-                "response_text": None,
-                "model": CLAUDE_MODEL,
-                "error": f"Claude CLI error (exit {proc.returncode}): {error_text}",
-            }
-
-        code = extract_python_code(response_text)
-        return {
-            "code": code,
-            "response_text": response_text,
-            "model": CLAUDE_MODEL,
-            "error": None if code else "No Python code extracted from response",
-        }
-    except asyncio.TimeoutError:
-        return {
-            "code": None,
-            "response_text": None,
-            "model": CLAUDE_MODEL,
-            "error": f"Claude CLI timed out after {CLAUDE_TIMEOUT}s",
-        }
-    except Exception as e:  # modify_cadquery_code
-        return {
-            "code": None,
-            "response_text": None,
-            "model": CLAUDE_MODEL,
-            "error": f"Claude CLI error: {e}",
-        }
+    return await _code_call("modify", system_prompt, full_prompt, key)
 
 
 SHAPE_VALIDATION_PROMPT = """You are a 3D shape validator. You receive SVG wireframe views of a generated 3D-printable part and the original design request. Determine if the shape correctly represents what was requested.
@@ -387,27 +365,12 @@ async def validate_shape_visually(
         svg_front=svg_front or "(not available)",
     )
 
-    env = {k: v for k, v in os.environ.items() if k != "CLAUDECODE"}
-
     try:
-        proc = await asyncio.create_subprocess_exec(
-            CLAUDE_CLI,
-            "--print",
-            "--model", CLAUDE_MODEL,
-            "--tools", "",
-            "--no-session-persistence",
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            env=env,
-        )
-        stdout, stderr = await asyncio.wait_for(
-            proc.communicate(input=full_prompt.encode()), timeout=60
-        )
-        response = stdout.decode().strip()
-
-        if proc.returncode != 0 or not response:
-            log.warning("Visual validation failed (exit %d)", proc.returncode)
+        response = (await get_llm_client().call(
+            "validate", full_prompt, CLAUDE_MODEL, None, CLAUDE_VALIDATE_TIMEOUT,
+        )).strip()
+        if not response:
+            log.warning("Visual validation failed (empty response)")
             return {"valid": True, "confidence": 0, "category": None,
                     "critique": None, "error": "validation call failed"}
 
@@ -417,12 +380,20 @@ async def validate_shape_visually(
         log.warning("Visual validation timed out")
         return {"valid": True, "confidence": 0, "category": None,
                 "critique": None, "error": "validation timed out"}
+    except ClaudeCLIError as e:
+        log.warning("Visual validation failed: %s", e)
+        return {"valid": True, "confidence": 0, "category": None,
+                "critique": None, "error": "validation call failed"}
     except Exception as e:
         log.warning("Visual validation error: %s", e)
         return {"valid": True, "confidence": 0, "category": None,
                 "critique": None, "error": str(e)}
 
 
+def _dims_text(objects: list[tuple[str, str]]) -> str | None:
+    return "\n\n".join(block for _, block in objects) or None
+
+
 async def lookup_dimensions(user_prompt: str) -> str | None:
     """Fast Claude call to look up real-world dimensions for objects in the prompt.
 
@@ -430,41 +401,63 @@ async def lookup_dimensions(user_prompt: str) -> str | None:
     knowledge for exact manufacturer specifications of any real-world object.
     No static database needed; works for any object Claude knows about.
 
+    A prompt answered before, or one naming only objects the memo already
+    knows, comes from the dimension memo (see dimension_memo.py) without a
+    Claude call. If it may name others too, the known objects are not
+    looked up again: Claude is asked for the others only, and the answers
+    are merged.
+
     Returns formatted dimension text to inject into the code generation prompt,
     or None if no lookup was needed or the call failed.
     """
-    env = {k: v for k, v in os.environ.items() if k != "CLAUDECODE"}
-
+    memo = get_dimension_memo()
+    complete, known = await asyncio.to_thread(memo.lookup, user_prompt)
+    if complete:
+        log.info("Dimension memo hit: %s", f"{len(known)} objects" if known else "no lookup needed")
+        return _dims_text(known)
+
+    prompt = DIMENSION_LOOKUP_PROMPT + user_prompt
+    if known:
+        log.info("Dimension memo knows %d objects — looking up the rest", len(known))
+        prompt += LOOKUP_KNOWN_NOTE.format(names=", ".join(name for name, _ in known))
     try:
-        proc = await asyncio.create_subprocess_exec(
-            CLAUDE_CLI,
-            "--print",
-            "--model", "haiku",  # Fast model for lookup
-            "--tools", "",
-            "--no-session-persistence",
-            DIMENSION_LOOKUP_PROMPT + user_prompt,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            env=env,
-        )
-        stdout, stderr = await asyncio.wait_for(
-            proc.communicate(), timeout=30  # Short timeout for lookup
-        )
-        response = stdout.decode().strip()
-
-        if proc.returncode != 0 or not response:
-            log.warning("Dimension lookup failed (exit %d)", proc.returncode)
-            return None
+        response = (await get_llm_client().call(
+            "lookup", prompt, LOOKUP_MODEL, None, CLAUDE_LOOKUP_TIMEOUT,
+        )).strip()
+        if not response:
+            log.warning("Dimension lookup failed (empty response)")
+            return _dims_text(known)
 
         if "NO_LOOKUP_NEEDED" in response:
-            return None
-
-        log.info("Dimension lookup returned %d chars", len(response))
-        return response
+            found = []
+        else:
+            found = split_objects(response)
+            if not found:  # unstructured answer: pass it on, don't memoize
+                return "\n\n".join(filter(None, [_dims_text(known), response]))
+            known_names = {normalize(name) for name, _ in known}
+            found = [(name, block) for name, block in found if normalize(name) not in known_names]
+            log.info("Dimension lookup returned %d objects", len(found))
+        await asyncio.to_thread(memo.store, user_prompt, found, [name for name, _ in known])
+        return _dims_text(known + found)
 
     except asyncio.TimeoutError:
         log.warning("Dimension lookup timed out")
-        return None
+    except ClaudeCLIError as e:
+        log.warning("Dimension lookup failed: %s", e)
     except Exception as e:
         log.warning("Dimension lookup error: %s", e)
-        return None
+    return _dims_text(known)
+
+
+async def startup():
+    """Boot the sessions of generation, visual validation and dimension lookup (app lifespan)."""
+    pool = get_session_pool()
+    await asyncio.gather(
+        pool.warm(CLAUDE_MODEL, load_system_prompt()),
+        pool.warm(CLAUDE_MODEL),
+        pool.warm(LOOKUP_MODEL),
+    )
+
+
+async def shutdown():
+    await get_session_pool().close()
@@ -0,0 +1,207 @@
+"""Pre-spawned Claude CLI sessions in stream-JSON mode.
+
+A plain `claude --print` call pays the CLI start-up (runtime boot, auth,
+settings) and ships the whole system prompt as an argv string on every
+request's critical path. A session is a
+`claude --print --input-format stream-json --output-format stream-json`
+process started ahead of time with its model and system prompt; a request
+is one user message written to its stdin, the answer is the `result`
+event read back from its stdout.
+
+Each session answers exactly one request (`--max-turns 1`, stdin closed
+after the message), so requests never see each other's conversation
+history. Taking a session immediately spawns its replacement in the
+background, keeping CLAUDE_SESSION_POOL idle sessions per (model, system
+prompt) — the next request finds one already booted.
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import Counter, deque
+
+from ..config import CLAUDE_CLI, CLAUDE_SESSION_POOL
+
+log = logging.getLogger(__name__)
+
+# stream-json lines carry whole assistant messages (generated code, SVGs)
+STREAM_LIMIT = 16 * 2**20  # [bytes] per line
+STDERR_TAIL = 4096  # [bytes] of stderr kept per session for error messages
+
+
+class ClaudeCLIError(RuntimeError):
+    """The CLI exited or answered with an error instead of a result."""
+
+
+class _Session:
+    def __init__(self, proc: asyncio.subprocess.Process):
+        self.proc = proc
+        self.stderr = bytearray()  # last STDERR_TAIL bytes
+        # Drained from the start, so a chatty CLI can never block on a full pipe
+        self.stderr_drained = asyncio.create_task(self._drain_stderr())
+
+    async def _drain_stderr(self):
+        while chunk := await self.proc.stderr.read(65536):
+            self.stderr += chunk
+            del self.stderr[:-STDERR_TAIL]
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.returncode is None
+
+    def kill(self):
+        if self.proc.returncode is None:
+            try:
+                self.proc.kill()
+            except ProcessLookupError:
+                pass
+
+
+class SessionPool:
+    """Idle stream-JSON sessions per (model, system prompt)."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: dict[tuple[str, str | None], deque[_Session]] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._sessions: set[_Session] = set()
+        self._starts = Counter()  # warm = idle session taken, cold = spawned for the call
+
+    async def _spawn(self, model: str, system_prompt: str | None) -> _Session:
+        args = [
+            CLAUDE_CLI, "--print",
+            "--input-format", "stream-json",
+            "--output-format", "stream-json",
+            "--verbose",  # required by the CLI for stream-json output
+            "--max-turns", "1",
+            "--model", model,
+            "--tools", "",
+            "--no-session-persistence",
+        ]
+        if system_prompt is not None:
+            args += ["--system-prompt", system_prompt]
+        # Remove CLAUDECODE to avoid the nesting check
+        env = {k: v for k, v in os.environ.items() if k != "CLAUDECODE"}
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+            limit=STREAM_LIMIT,
+        )
+        session = _Session(proc)
+        self._sessions.add(session)
+        return session
+
+    def _background(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _replenish(self, key: tuple[str, str | None]):
+        try:
+            session = await self._spawn(*key)
+        except Exception as e:
+            log.error("Could not pre-spawn Claude CLI session (%s): %s", key[0], e)
+            return
+        idle = self._idle.setdefault(key, deque())
+        if len(idle) < self.size:
+            idle.append(session)
+        else:
+            self._discard(session)
+
+    def _discard(self, session: _Session):
+        session.kill()
+        self._sessions.discard(session)
+        self._background(session.proc.wait())
+
+    async def warm(self, model: str, system_prompt: str | None = None):
+        """Fill the idle sessions of one model/system prompt up front."""
+        idle = self._idle.get((model, system_prompt), ())
+        await asyncio.gather(*(
+            self._replenish((model, system_prompt)) for _ in range(self.size - len(idle))
+        ))
+
+    async def _take(self, model: str, system_prompt: str | None) -> _Session:
+        key = (model, system_prompt)
+        idle = self._idle.get(key)
+        session = None
+        while idle:
+            candidate = idle.popleft()
+            if candidate.alive:
+                session = candidate
+                break
+            self._sessions.discard(candidate)  # exited while idle (auth error, killed, ...)
+        if self.size:
+            self._background(self._replenish(key))
+        if session is not None:
+            self._starts["warm"] += 1
+            return session
+        self._starts["cold"] += 1
+        return await self._spawn(model, system_prompt)
+
+    async def query(self, prompt: str, model: str, system_prompt: str | None, timeout: float) -> str:
+        """Send one prompt, return the result text.
+
+        Raises asyncio.TimeoutError after `timeout` seconds and ClaudeCLIError
+        if the CLI fails; the session is killed on timeout and cancellation.
+        """
+        session = await self._take(model, system_prompt)
+        message = {"type": "user", "message": {"role": "user", "content": [{"type": "text", "text": prompt}]}}
+        try:
+            return await asyncio.wait_for(self._exchange(session, message), timeout)
+        finally:
+            self._discard(session)
+
+    async def _exchange(self, session: _Session, message: dict) -> str:
+        proc = session.proc
+        try:
+            proc.stdin.write((json.dumps(message) + "\n").encode())
+            await proc.stdin.drain()
+            proc.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # exited early — reported below with its stderr
+        while line := await proc.stdout.readline():
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if event.get("type") != "result":
+                continue
+            if event.get("is_error") or event.get("subtype") != "success":
+                detail = event.get("result") or event.get("subtype")
+                raise ClaudeCLIError(f"Claude CLI error ({event.get('subtype')}): {str(detail)[:500]}")
+            return event.get("result") or ""
+        returncode = await proc.wait()
+        await asyncio.wait({session.stderr_drained}, timeout=1.0)  # EOF, unless a child holds the pipe
+        stderr = session.stderr.decode(errors="replace")
+        raise ClaudeCLIError(f"Claude CLI error (exit {returncode}): {stderr[-500:]}")
+
+    async def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        for session in list(self._sessions):
+            session.kill()
+            await session.proc.wait()
+            session.stderr_drained.cancel()
+        self._sessions.clear()
+        self._idle.clear()
+
+    def stats(self) -> dict:
+        return {
+            "pool_size": self.size,
+            "idle": sum(len(idle) for idle in self._idle.values()),
+            "warm_starts": self._starts["warm"],
+            "cold_starts": self._starts["cold"],
+        }
+
+
+_pool: SessionPool | None = None
+
+
+def get_session_pool() -> SessionPool:
+    global _pool
+    if _pool is None:
+        _pool = SessionPool(CLAUDE_SESSION_POOL)
+    return _pool
@@ -0,0 +1,238 @@
+"""Deterministic rewrites for common CadQuery failures — no LLM round trip.
+
+Rules are keyed on the error signatures of `routers.generate.error_signature`
+(fillet, wire, no_output, solids) and only run after an execution failed
+with that signature, or the static check proved it would (e.g. no
+`result`) — an advisory finding alone never triggers a rewrite. Static
+findings locate what to rewrite; when the traceback names failing lines,
+only findings in those statements are used. Each rule makes a local text
+edit at AST node positions, so comments and formatting survive, and
+returns a candidate script. The caller executes the candidates and only
+falls back to `modify_cadquery_code` when none of them yields a valid
+shape.
+"""
+import ast
+import logging
+import re
+
+from .code_lint import BOOLEAN_OPS, lint_tree, method_chain
+from .result_cache import code_fingerprint
+
+log = logging.getLogger(__name__)
+
+# Overlap added to a thread core that sits exactly on r_minor [mm]
+CORE_OVERLAP = 0.05
+
+# Failing lines: traceback frames of the script, or a stalled operation
+_TRACEBACK_LINE_RE = re.compile(r'(?:code\.py", line|stalled at line) (\d+)')
+
+
+class _Source:
+    """Source text addressable by AST (lineno, col_offset) positions.
+
+    AST columns are UTF-8 byte offsets, so edits are applied on bytes.
+    """
+
+    def __init__(self, code: str):
+        self.data = code.encode()
+        self.line_starts = [0]
+        for line in self.data.splitlines(keepends=True):
+            self.line_starts.append(self.line_starts[-1] + len(line))
+
+    def start(self, node: ast.AST) -> int:
+        return self.line_starts[node.lineno - 1] + node.col_offset
+
+    def end(self, node: ast.AST) -> int:
+        return self.line_starts[node.end_lineno - 1] + node.end_col_offset
+
+    def text(self, start: int, end: int) -> str:
+        return self.data[start:end].decode()
+
+    def edit(self, edits: list[tuple[int, int, str]]) -> str:
+        """Apply non-overlapping (start, end, replacement) edits."""
+        data = self.data
+        for start, end, text in sorted(edits, reverse=True):
+            data = data[:start] + text.encode() + data[end:]
+        return data.decode()
+
+
+def _failing_lines(error: str | None) -> set[int]:
+    return {int(n) for n in _TRACEBACK_LINE_RE.findall(error or "")}
+
+
+def _at_failure(tree: ast.Module, issues: list[dict], error: str | None) -> list[dict]:
+    """Findings inside a statement the traceback points at (all without line info)."""
+    lines = _failing_lines(error)
+    if not lines:
+        return issues
+    spans = [
+        (stmt.lineno, stmt.end_lineno) for stmt in ast.walk(tree)
+        if isinstance(stmt, ast.stmt) and not isinstance(stmt, (ast.FunctionDef, ast.ClassDef, ast.Try))
+        and any(stmt.lineno <= line <= stmt.end_lineno for line in lines)
+    ]
+    return [
+        issue for issue in issues
+        if issue["node"] is None
+        or any(start <= issue["node"].lineno and issue["node"].end_lineno <= end for start, end in spans)
+    ]
+
+
+def _fillet_selectors_start(calls: list[tuple[str, ast.Call]]) -> int:
+    """Index of the first `.edges()/.faces()` call directly before the trailing fillet."""
+    i = len(calls) - 1
+    while i > 0 and calls[i - 1][0] in ("edges", "faces"):
+        i -= 1
+    return i
+
+
+def _drop_fillet_edit(src: _Source, fillet: ast.Call) -> tuple[int, int, str]:
+    """Edit removing `.edges(...).fillet(...)` from a method chain."""
+    _, calls = method_chain(fillet)
+    first = calls[_fillet_selectors_start(calls)][1]
+    return src.end(first.func.value), src.end(fillet), ""
+
+
+def _reorder_fillets(src: _Source, tree: ast.Module, issues: list[dict], error: str) -> str | None:
+    """`a.union(b).edges(sel).fillet(r)` -> `a.edges(sel).fillet(r).union(b)`."""
+    edits = []
+    for issue in issues:
+        if issue["rule"] != "post_boolean_fillet":
+            continue
+        _, calls = method_chain(issue["node"])
+        sel = _fillet_selectors_start(calls)
+        if sel == 0 or calls[sel - 1][0] not in BOOLEAN_OPS:
+            continue  # boolean not directly before the selector — not a local swap
+        boolean = calls[sel - 1][1]
+        recv_end = src.end(boolean.func.value)
+        bool_end = src.end(boolean)
+        fillet_end = src.end(issue["node"])
+        edits.append((
+            recv_end, fillet_end,
+            src.text(bool_end, fillet_end) + src.text(recv_end, bool_end),
+        ))
+    return src.edit(edits) if edits else None
+
+
+def _drop_post_boolean_fillets(src: _Source, tree: ast.Module, issues: list[dict], error: str) -> str | None:
+    """Remove the broad-selector fillets applied after booleans."""
+    edits = [
+        _drop_fillet_edit(src, issue["node"])
+        for issue in issues if issue["rule"] == "post_boolean_fillet"
+    ]
+    return src.edit(edits) if edits else None
+
+
+def _drop_failing_fillets(src: _Source, tree: ast.Module, issues: list[dict], error: str) -> str | None:
+    """Remove the fillets on the lines the traceback points at."""
+    lines = _failing_lines(error)
+    fillets = [
+        node for node in ast.walk(tree)
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+        and node.func.attr == "fillet"
+        and any(node.lineno <= line <= node.end_lineno for line in lines)
+    ]
+    # Outermost fillet of a chain only — nested ones lie inside its span
+    outer = [f for f in fillets if not any(o is not f and src.start(o) <= src.start(f)
+                                           and src.end(f) < src.end(o) for o in fillets)]
+    edits = [_drop_fillet_edit(src, f) for f in outer]
+    return src.edit(edits) if edits else None
+
+
+def _close_wires(src: _Source, tree: ast.Module, issues: list[dict], error: str) -> str | None:
+    """Insert `.close()` after the last drawing call of an open profile."""
+    edits = [
+        (src.end(issue["node"]), src.end(issue["node"]), ".close()")
+        for issue in issues if issue["rule"] == "unclosed_wire"
+    ]
+    return src.edit(edits) if edits else None
+
+
+def _assign_result(src: _Source, tree: ast.Module, issues: list[dict], error: str) -> str | None:
+    """Assign `result` from show_object(x) or the last top-level shape variable."""
+    if not any(issue["rule"] == "missing_result" for issue in issues):
+        return None
+    name = None
+    for stmt in tree.body:
+        if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call) \
+                and isinstance(stmt.value.func, ast.Name) and stmt.value.func.id == "show_object" \
+                and stmt.value.args and isinstance(stmt.value.args[0], ast.Name):
+            name = stmt.value.args[0].id
+        elif isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 \
+                and isinstance(stmt.targets[0], ast.Name) and isinstance(stmt.value, ast.Call):
+            name = stmt.targets[0].id
+    if name is None:
+        return None
+    code = src.data.decode()
+    return code.rstrip("\n") + f"\nresult = {name}\n"
+
+
+def _core_overlap(src: _Source, tree: ast.Module, issues: list[dict], error: str) -> str | None:
+    """Grow a thread core sitting exactly on r_minor so thread and core overlap."""
+    edits = [
+        (src.start(issue["node"]), src.end(issue["node"]), f"r_minor + {CORE_OVERLAP}")
+        for issue in issues if issue["rule"] == "thread_core_overlap"
+    ]
+    return src.edit(edits) if edits else None
+
+
+# Rules per error signature, most conservative first
+RULES = {
+    "fillet": (_reorder_fillets, _drop_post_boolean_fillets, _drop_failing_fillets),
+    "wire": (_close_wires,),
+    "no_output": (_assign_result,),
+    "solids": (_core_overlap,),
+}
+
+
+def _candidates_for(code: str, signature: str, error: str | None) -> list[dict]:
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return []
+    src = _Source(code)
+    issues = _at_failure(tree, lint_tree(tree), error)
+    candidates = []
+    for rule in RULES.get(signature, ()):
+        try:
+            fixed = rule(src, tree, issues, error)
+        except Exception as e:  # a broken rule must never break the retry loop
+            log.warning("Autofix rule %s failed: %s", rule.__name__, e)
+            continue
+        if fixed is not None:
+            candidates.append({"rule": rule.__name__.lstrip("_"), "code": fixed})
+    return candidates
+
+
+def autofix_candidates(code: str, signatures: list[str], error: str | None = None) -> list[dict]:
+    """Rewritten versions of `code` for the runtime error signatures of `error`.
+
+    With several signatures the first candidate lists the first rewrite of
+    every signature applied in turn.
+    Returns a list of dicts with keys rule, code; candidates that don't
+    parse or don't change the code are left out.
+    """
+    candidates = []
+    if len(signatures) > 1:
+        combined, rules = code, []
+        for signature in signatures:
+            found = _candidates_for(combined, signature, error)
+            if found:
+                combined = found[0]["code"]
+                rules.append(found[0]["rule"])
+        if len(rules) > 1:
+            candidates.append({"rule": "+".join(rules), "code": combined})
+    for signature in signatures:
+        candidates += _candidates_for(code, signature, error)
+
+    seen = {code_fingerprint(code)}
+    unique = []
+    for candidate in candidates:
+        try:
+            ast.parse(candidate["code"])
+        except SyntaxError:
+            continue
+        fingerprint = code_fingerprint(candidate["code"])
+        if fingerprint not in seen:
+            seen.add(fingerprint)
+            unique.append(candidate)
+    return unique
@@ -0,0 +1,277 @@
+"""Static checks for known OCC crash patterns in the AST.
+
+Runs on generated CadQuery source. Findings of CERTAIN_RULES fail every
+run (syntax error, no `result`, a thread swept with cq.Solid.sweep), so
+the generate router sends such code back to Claude without executing it.
+All other findings are advisory: the code is still executed, and only
+when it fails are they added to the fix instruction. Each finding carries
+an `error` string worded like the runtime failure it predicts
+(StdFail_NotDone, Wire not closed, no output, ...), so the generate
+router's `diagnose_error` maps it to the same targeted fix hint.
+"""
+import ast
+import logging
+import re
+
+log = logging.getLogger(__name__)
+
+# Findings that fail every execution, not just risky patterns
+CERTAIN_RULES = {"syntax", "missing_result", "solid_sweep_thread"}
+# Operations after which broad-selector fillets crash the kernel
+BOOLEAN_OPS = {"union", "cut", "intersect", "shell", "cutBlind", "cutThruAll"}
+# Edge selectors broad enough to hit the seams a boolean leaves: "|Z", "|X or |Y"
+# (">Z", "<X", "%CIRCLE", ... pick one face's edges and are fine)
+PARALLEL_SELECTOR_RE = re.compile(r"\s*\|\s*[XYZ](\s+or\s+\|\s*[XYZ])*\s*")
+# Workplane 2D drawing ops that leave an open wire pending
+DRAW_OPS = {
+    "lineTo", "line", "hLine", "vLine", "hLineTo", "vLineTo", "polarLine",
+    "polarLineTo", "threePointArc", "radiusArc", "tangentArcPoint",
+    "sagittaArc", "spline", "polyline", "ellipseArc", "bezier",
+}
+CLOSE_OPS = {"close", "mirrorX", "mirrorY"}
+# Ops that turn pending wires into solids
+SOLID_OPS = {"extrude", "revolve", "twistExtrude", "cutBlind", "cutThruAll"}
+# Ops that end a drawing sequence on purpose
+WIRE_STOP_OPS = SOLID_OPS | {"workplane", "wire", "wires", "faces", "toPending", "add"}
+
+
+def method_chain(node: ast.expr) -> tuple[ast.expr, list[tuple[str, ast.Call]]]:
+    """Root and method calls of `a.b(...).c(...)`, in call order."""
+    calls = []
+    while True:
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+            calls.append((node.func.attr, node))
+            node = node.func.value
+        elif isinstance(node, ast.Attribute):
+            node = node.value
+        else:
+            break
+    calls.reverse()
+    return node, calls
+
+
+def _assigns_result(nodes: list[ast.AST]) -> bool:
+    for node in nodes:
+        if isinstance(node, ast.Name) and node.id == "result" and isinstance(node.ctx, ast.Store):
+            return True
+        if isinstance(node, ast.Global) and "result" in node.names:
+            return True
+    return False
+
+
+def _guarded_nodes(nodes: list[ast.AST]) -> set[int]:
+    """ids of nodes inside a `try:` body (e.g. a safe_fillet wrapper)."""
+    guarded = set()
+    for node in nodes:
+        if isinstance(node, ast.Try):
+            for stmt in node.body:
+                guarded.update(id(n) for n in ast.walk(stmt))
+    return guarded
+
+
+def _broad_selection(after: list[tuple[str, ast.Call]]) -> str | None:
+    """How a fillet after `after` (the calls since the boolean) selects its
+    edges, if that is broad — None for a targeted selection.
+    """
+    edges = [i for i, (name, _) in enumerate(after) if name == "edges"]
+    if not edges:
+        if any(name in ("faces", "wires", "vertices") for name, _ in after):
+            return None
+        return "all edges of the solid"
+    i = edges[-1]
+    call = after[i][1]
+    if not call.args and not call.keywords:
+        # .faces(">Z").edges() is that face's boundary, not every edge
+        if any(name in ("faces", "wires") for name, _ in after[:i]):
+            return None
+        return ".edges() (all edges)"
+    arg = call.args[0] if call.args else None
+    if isinstance(arg, ast.Constant) and isinstance(arg.value, str) \
+            and PARALLEL_SELECTOR_RE.fullmatch(arg.value):
+        return f'.edges("{arg.value}")'
+    return None
+
+
+def _check_fillets(nodes: list[ast.AST], guarded: set[int]) -> list[dict]:
+    """Fillets on parallel/all-edge selections applied after a boolean,
+    in the same chain or via a variable.
+    """
+    events = []  # (position, kind, node) in source order
+    for node in nodes:
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) \
+                and node.func.attr == "fillet" and id(node) not in guarded:
+            events.append(((node.end_lineno, node.end_col_offset), "fillet", node))
+        elif isinstance(node, ast.Assign) and len(node.targets) == 1 \
+                and isinstance(node.targets[0], ast.Name):
+            # Taint takes effect after the whole value was evaluated
+            events.append(((node.end_lineno, node.end_col_offset + 1), "assign", node))
+    events.sort(key=lambda e: e[0])
+
+    issues = []
+    post_boolean: set[str] = set()
+    for _, kind, node in events:
+        if kind == "assign":
+            root, calls = method_chain(node.value)
+            tainted = any(name in BOOLEAN_OPS for name, _ in calls) or (
+                isinstance(root, ast.Name) and root.id in post_boolean
+            )
+            (post_boolean.add if tainted else post_boolean.discard)(node.targets[0].id)
+            continue
+
+        root, calls = method_chain(node)
+        before = calls[:-1]
+        bool_idx = max((i for i, (name, _) in enumerate(before) if name in BOOLEAN_OPS), default=None)
+        if bool_idx is None and not (isinstance(root, ast.Name) and root.id in post_boolean):
+            continue
+        after = before[bool_idx + 1:] if bool_idx is not None else before
+        selection = _broad_selection(after)
+        if selection is None:
+            continue
+        source = f".{before[bool_idx][0]}()" if bool_idx is not None else f"the boolean that built `{root.id}`"
+        issues.append({
+            "rule": "post_boolean_fillet",
+            "line": node.lineno,
+            "node": node,
+            "error": (
+                f"Static check: line {node.lineno}: .fillet() on {selection} "
+                f"after {source} — OCC often raises StdFail_NotDone on this pattern"
+            ),
+        })
+    return issues
+
+
+def _closed_literal(call: ast.Call) -> bool:
+    """polyline([...]) whose literal point list ends where it starts."""
+    if not call.args or not isinstance(call.args[0], (ast.List, ast.Tuple)):
+        return False
+    pts = call.args[0].elts
+    return len(pts) > 2 and ast.dump(pts[0]) == ast.dump(pts[-1])
+
+
+def _check_wires(nodes: list[ast.AST]) -> list[dict]:
+    """2D profiles consumed by extrude/revolve without being closed."""
+    issues = []
+    for node in nodes:
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and node.func.attr in SOLID_OPS):
+            continue
+        _, calls = method_chain(node)
+        for name, call in reversed(calls[:-1]):
+            if name in CLOSE_OPS or name in WIRE_STOP_OPS:
+                break
+            if name in DRAW_OPS:
+                if name == "polyline" and _closed_literal(call):
+                    break
+                issues.append({
+                    "rule": "unclosed_wire",
+                    "line": node.lineno,
+                    "node": call,
+                    "error": (
+                        f"Static check: line {node.lineno}: {name}() profile is passed to "
+                        f"{node.func.attr}() without .close() — Wire not closed"
+                    ),
+                })
+                break
+    return issues
+
+
+def _check_threads(nodes: list[ast.AST]) -> list[dict]:
+    """Helical sweeps via Solid.sweep/Workplane.sweep and cores without overlap."""
+    issues = []
+    helix_names = set()
+    uses_pipe_shell = False
+    for node in nodes:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(n, ast.Attribute) and n.attr == "makeHelix" for n in ast.walk(node.value)
+        ):
+            helix_names.update(t.id for t in node.targets if isinstance(t, ast.Name))
+        elif isinstance(node, ast.Name) and node.id == "BRepOffsetAPI_MakePipeShell" \
+                or isinstance(node, ast.alias) and node.name == "BRepOffsetAPI_MakePipeShell":
+            uses_pipe_shell = True
+
+    for node in nodes:
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)):
+            continue
+        attr, owner = node.func.attr, node.func.value
+        if attr == "sweep":
+            solid_sweep = (isinstance(owner, ast.Attribute) and owner.attr == "Solid") or (
+                isinstance(owner, ast.Name) and owner.id == "Solid"
+            )
+            helical = any(
+                isinstance(n, ast.Name) and n.id in helix_names
+                or isinstance(n, ast.Attribute) and n.attr == "makeHelix"
+                for arg in node.args for n in ast.walk(arg)
+            )
+            if helical:
+                issues.append({
+                    "rule": "solid_sweep_thread" if solid_sweep else "helix_sweep",
+                    "line": node.lineno,
+                    "node": node,
+                    "error": (
+                        f"Static check: line {node.lineno}: thread profile swept along a helix "
+                        f"with {'cq.Solid.sweep' if solid_sweep else '.sweep()'} — the V-profile "
+                        "twists into malformed geometry"
+                    ),
+                })
+        elif uses_pipe_shell and attr in ("cylinder", "circle", "makeCylinder"):
+            pos = 1 if attr == "cylinder" else 0
+            radius = next((k.value for k in node.keywords if k.arg == "radius"), None)
+            if radius is None and len(node.args) > pos:
+                radius = node.args[pos]
+            if isinstance(radius, ast.Name) and radius.id == "r_minor":
+                issues.append({
+                    "rule": "thread_core_overlap",
+                    "line": node.lineno,
+                    "node": radius,
+                    "error": (
+                        f"Static check: line {node.lineno}: thread core radius is exactly "
+                        "r_minor — coincident thread core surfaces make the union fail"
+                    ),
+                })
+    return issues
+
+
+def lint_tree(tree: ast.Module) -> list[dict]:
+    """Findings for a parsed module, each with the offending AST `node`
+    (fillet call, open-wire draw call, sweep call or core radius) so
+    code_autofix can rewrite it. None for missing_result.
+    """
+    nodes = list(ast.walk(tree))
+    issues = []
+    if not _assigns_result(nodes):
+        issues.append({
+            "rule": "missing_result",
+            "line": None,
+            "node": None,
+            "error": "Static check: `result` is never assigned — the script would produce no output",
+        })
+    issues += _check_fillets(nodes, _guarded_nodes(nodes))
+    issues += _check_wires(nodes)
+    issues += _check_threads(nodes)
+    return sorted(issues, key=lambda i: i["line"] or 0)
+
+
+def lint_code(code: str) -> list[dict]:
+    """Statically check CadQuery code for patterns known to fail at runtime.
+
+    Returns a list of findings sorted by line, each a dict with keys
+    rule, line, error. Empty list = nothing found (not a guarantee the
+    code runs).
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return [{
+            "rule": "syntax",
+            "line": e.lineno,
+            "error": f"SyntaxError: {e.msg} (line {e.lineno})",
+        }]
+    return [
+        {key: value for key, value in issue.items() if key != "node"}
+        for issue in lint_tree(tree)
+    ]
+
+
+def certain_failures(code: str) -> list[dict]:
+    """The findings of `lint_code` that no execution of `code` survives."""
+    return [issue for issue in lint_code(code) if issue["rule"] in CERTAIN_RULES]
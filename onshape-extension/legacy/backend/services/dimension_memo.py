@@ -0,0 +1,254 @@
+"""Memo of dimension lookups per real-world object (SQLite).
+
+`lookup_dimensions` answers list one `OBJECT: <name>` block per object.
+Each block is stored under its normalized name (lowercase alphanumeric
+tokens), plus an alias: the longest token run shared by the name and the
+prompt that produced it, if it carries a model number ("raspberry pi 4"
+for "Raspberry Pi 4 Model B"). Each answered prompt is memoized by its
+normalized text with the names of its objects (none = NO_LOOKUP_NEEDED).
+
+A prompt answered before is a complete hit, assembled locally without the
+Claude round trip. So is a new prompt containing known names or aliases
+if nothing else in it looks like an object reference: no model number
+("m3", "ps5"), capitalized name ("Arduino Uno") or bare number that isn't
+a measurement ("pi 4" but not "4 holes", "3 mm"). Plain lowercase nouns
+aren't candidates, so "stand for an iphone 15 and a kindle" is answered
+with the iPhone alone. If candidates remain it is a partial hit: the
+caller looks up the rest and merges. Entries expire after
+DIMENSION_MEMO_TTL.
+
+The methods do blocking SQLite I/O (serialized by a lock); async callers
+run them via asyncio.to_thread.
+"""
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from ..config import DIMENSION_MEMO_PATH, DIMENSION_MEMO_TTL
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (name TEXT PRIMARY KEY, block TEXT NOT NULL, created REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS aliases (alias TEXT PRIMARY KEY, name TEXT NOT NULL, created REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS prompts (prompt TEXT PRIMARY KEY, names TEXT NOT NULL, created REAL NOT NULL);
+"""
+TABLES = ("objects", "aliases", "prompts")
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_RAW_TOKEN_RE = re.compile(r"[A-Za-z0-9]+(?:\.[0-9]+)?")  # _TOKEN_RE, case kept
+_MEASURE_RE = re.compile(r"[0-9.]+(?:mm|cm|m|in|deg)?")
+UNITS = {"mm", "cm", "m", "in", "inch", "inches", "deg", "degree", "degrees", "x", "by", "percent"}
+# Words before a bare number that make it a count or size, not a model number
+COUNT_WORDS = {
+    "a", "an", "the", "and", "or", "with", "of", "for", "to", "at", "by", "x", "in",
+    "on", "each", "every", "about", "around", "than", "is", "are", "be", "into",
+}
+# A prompt token right after a matched name that makes the prompt more
+# specific than the memo entry ("iphone 15" + "pro") — no match then
+MODEL_SUFFIXES = {"pro", "max", "mini", "plus", "ultra", "lite", "air", "se", "model", "gen", "mk"}
+
+
+def normalize(text: str) -> str:
+    return " ".join(_TOKEN_RE.findall(text.lower()))
+
+
+def split_objects(response: str) -> list[tuple[str, str]]:
+    """(name, block) per `OBJECT:` block of a lookup answer."""
+    objects = []
+    for line in response.splitlines():
+        if line.strip().startswith("```"):
+            continue
+        if line.startswith("OBJECT:"):
+            objects.append([line.split(":", 1)[1].strip(), [line.rstrip()]])
+        elif objects and line.strip():
+            objects[-1][1].append(line.rstrip())
+    return [(name, "\n".join(lines)) for name, lines in objects if name]
+
+
+def _shared_run(a: list[str], b: list[str]) -> list[str]:
+    """Longest contiguous token run of `a` that also occurs in `b`."""
+    best = []
+    for i in range(len(a)):
+        for j in range(len(b)):
+            k = 0
+            while i + k < len(a) and j + k < len(b) and a[i + k] == b[j + k]:
+                k += 1
+            if k > len(best):
+                best = a[i:i + k]
+    return best
+
+
+def _mentions(prompt_tokens: list[str], key: str) -> set[int]:
+    """Token positions where `key` occurs in the prompt, not followed by a
+    more specific model token (empty: not mentioned).
+    """
+    words = key.split()
+    n = len(words)
+    positions = set()
+    for i in range(len(prompt_tokens) - n + 1):
+        if prompt_tokens[i:i + n] != words:
+            continue
+        following = prompt_tokens[i + n] if i + n < len(prompt_tokens) else ""
+        if not (any(c.isdigit() for c in following) or following in MODEL_SUFFIXES):
+            positions.update(range(i, i + n))
+    return positions
+
+
+def _object_candidates(raw_tokens: list[str], covered: set[int]) -> list[str]:
+    """Tokens outside the known objects that may name another object."""
+    candidates = []
+    for i, token in enumerate(raw_tokens):
+        if i in covered:
+            continue
+        lower = token.lower()
+        previous = raw_tokens[i - 1].lower() if i else ""
+        following = raw_tokens[i + 1].lower() if i + 1 < len(raw_tokens) else ""
+        if token.replace(".", "").isdigit():
+            named = previous.isalpha() and previous not in COUNT_WORDS and following not in UNITS
+        elif any(c.isdigit() for c in token):
+            named = not _MEASURE_RE.fullmatch(lower)
+        else:
+            named = i > 0 and token[0].isupper()
+        if named:
+            candidates.append(token)
+    return candidates
+
+
+class DimensionMemo:
+    """Dimension blocks per normalized object name, with hit counters."""
+
+    def __init__(self, path: Path, ttl: int):
+        self.path = path
+        self.ttl = ttl  # [s], 0 = never expire
+        self.counts = Counter()  # complete_hits, partial_hits, misses
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def _cutoff(self) -> float:
+        return time.time() - self.ttl if self.ttl else 0.0
+
+    def _blocks(self, db: sqlite3.Connection, names: list[str], cutoff: float) -> list[tuple[str, str]] | None:
+        """(name, block) of memoized objects; None if one of them is gone."""
+        blocks = []
+        for name in names:
+            row = db.execute(
+                "SELECT block FROM objects WHERE name = ? AND created >= ?", (name, cutoff)
+            ).fetchone()
+            if row is None:
+                return None
+            blocks.append((name, row[0]))
+        return blocks
+
+    def lookup(self, prompt: str) -> tuple[bool, list[tuple[str, str]]]:
+        """(complete, [(name, block), ...]) for the objects `prompt` mentions.
+
+        complete: the prompt was answered before and all its objects are
+        still memoized (no blocks = NO_LOOKUP_NEEDED), or it names known
+        objects and no other object candidates. Otherwise the blocks are
+        the known objects found in it, which may not be all of them.
+        """
+        raw_tokens = _RAW_TOKEN_RE.findall(prompt)
+        tokens = [token.lower() for token in raw_tokens]
+        try:
+            with self._lock:
+                db = self._conn()
+                cutoff = self._cutoff()
+                row = db.execute(
+                    "SELECT names FROM prompts WHERE prompt = ? AND created >= ?", (" ".join(tokens), cutoff)
+                ).fetchone()
+                blocks = self._blocks(db, json.loads(row[0]), cutoff) if row else None
+                if blocks is not None:
+                    self.counts["complete_hits"] += 1
+                    return True, blocks
+                keys = db.execute(
+                    "SELECT name, name FROM objects WHERE created >= ? "
+                    "UNION SELECT alias, name FROM aliases WHERE created >= ?", (cutoff, cutoff),
+                ).fetchall()
+                # Longest keys first, so "iphone 15 pro" wins over "iphone 15"
+                names, covered = [], set()
+                for key, name in sorted(keys, key=lambda k: -len(k[0])):
+                    positions = _mentions(tokens, key)
+                    if positions:
+                        covered |= positions
+                        if name not in names:
+                            names.append(name)
+                blocks = [b for name in names for b in self._blocks(db, [name], cutoff) or ()]
+        except sqlite3.Error as e:
+            log.warning("Dimension memo read failed: %s", e)
+            blocks = []
+        if blocks and not _object_candidates(raw_tokens, covered):
+            self.counts["complete_hits"] += 1
+            return True, blocks
+        self.counts["partial_hits" if blocks else "misses"] += 1
+        return False, blocks
+
+    def store(self, prompt: str, found: list[tuple[str, str]], known: list[str] = ()):
+        """Remember the answer to `prompt`: `found` (name, block) pairs from
+        Claude plus the `known` object names taken from the memo ([] and []
+        = NO_LOOKUP_NEEDED).
+        """
+        tokens = normalize(prompt).split()
+        now = time.time()
+        names = list(known)
+        try:
+            with self._lock:
+                db = self._conn()
+                with db:
+                    for name, block in found:
+                        key = normalize(name)
+                        names.append(key)
+                        db.execute("INSERT OR REPLACE INTO objects VALUES (?, ?, ?)", (key, block, now))
+                        alias = _shared_run(key.split(), tokens)
+                        if len(alias) >= 2 and any(c.isdigit() for c in "".join(alias)) and " ".join(alias) != key:
+                            db.execute("INSERT OR REPLACE INTO aliases VALUES (?, ?, ?)", (" ".join(alias), key, now))
+                    db.execute(
+                        "INSERT OR REPLACE INTO prompts VALUES (?, ?, ?)",
+                        (" ".join(tokens), json.dumps(list(dict.fromkeys(names))), now),
+                    )
+                    if self.ttl:
+                        for table in TABLES:
+                            db.execute(f"DELETE FROM {table} WHERE created < ?", (self._cutoff(),))
+        except sqlite3.Error as e:
+            log.warning("Dimension memo write failed: %s", e)
+
+    def stats(self) -> dict:
+        lookups = sum(self.counts.values())
+        sizes = {}
+        if self.path.exists():
+            try:
+                with self._lock:
+                    db = self._conn()
+                    for table in TABLES:
+                        sizes[table] = db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            except sqlite3.Error:
+                pass
+        return {
+            "lookups": lookups,
+            **{key: self.counts[key] for key in ("complete_hits", "partial_hits", "misses")},
+            # Partial hits save the lookup of their known objects too
+            "hit_ratio": round((lookups - self.counts["misses"]) / lookups, 3) if lookups else None,
+            "ttl_s": self.ttl,
+            **sizes,
+        }
+
+
+_memo: DimensionMemo | None = None
+
+
+def get_dimension_memo() -> DimensionMemo:
+    global _memo
+    if _memo is None:
+        _memo = DimensionMemo(DIMENSION_MEMO_PATH, DIMENSION_MEMO_TTL)
+    return _memo
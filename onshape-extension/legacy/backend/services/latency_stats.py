@@ -0,0 +1,52 @@
+"""Rolling latency percentiles per key, for /api/stats."""
+from collections import deque
+
+
+class LatencyStats:
+    """Recent latencies per key (e.g. retry strategy) with avg/p50/p95/max.
+
+    Percentiles are computed over the last `window` samples of each key;
+    `count` is the total number recorded since startup. With `buckets`
+    (ascending upper bounds [s]), stats() adds a histogram of the window.
+    """
+
+    def __init__(self, window: int = 200, buckets: tuple[float, ...] = ()):
+        self.window = window
+        self.buckets = buckets
+        self._samples: dict[str, deque[float]] = {}
+        self._counts: dict[str, int] = {}
+
+    def record(self, key: str, seconds: float):
+        self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+        self._counts[key] = self._counts.get(key, 0) + 1
+
+    def count(self, key: str) -> int:
+        return self._counts.get(key, 0)
+
+    def percentile(self, key: str, q: float) -> float | None:
+        """q-quantile (0..1) of the recent samples of `key`, None if none yet."""
+        samples = sorted(self._samples.get(key, ()))
+        return samples[int(q * (len(samples) - 1))] if samples else None
+
+    def _histogram(self, samples: list[float]) -> dict[str, int]:
+        histogram = {f"le_{bound:g}s": 0 for bound in self.buckets}
+        histogram["inf"] = 0
+        for sample in samples:
+            bound = next((b for b in self.buckets if sample <= b), None)
+            histogram[f"le_{bound:g}s" if bound is not None else "inf"] += 1
+        return histogram
+
+    def stats(self) -> dict:
+        data = {}
+        for key, window in self._samples.items():
+            samples = sorted(window)
+            data[key] = {
+                "count": self._counts[key],
+                "avg_s": round(sum(samples) / len(samples), 3),
+                "p50_s": round(samples[int(0.50 * (len(samples) - 1))], 3),
+                "p95_s": round(samples[int(0.95 * (len(samples) - 1))], 3),
+                "max_s": round(samples[-1], 3),
+            }
+            if self.buckets:
+                data[key]["histogram"] = self._histogram(samples)
+        return data
@@ -0,0 +1,150 @@
+"""Persistent cache of Claude code-generation responses (SQLite).
+
+Key = sha256 of (system prompt, wrapper template, user prompt, material,
+model), so any change to the SKILL.md files or the prompt templates
+misses. Only the response text is cached — the code it contains is still
+executed like a fresh one — and only once a request used it (see
+routers.generate), never a response that was dropped. Rows are evicted
+least recently used once the stored responses exceed LLM_CACHE_MAX_MB.
+
+The methods do blocking SQLite I/O (serialized by a lock); async callers
+run them via asyncio.to_thread.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from ..config import LLM_CACHE_MAX_MB, LLM_CACHE_PATH
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+
+def llm_cache_key(system_prompt: str, wrapper: str, prompt: str, material: str, model: str) -> str:
+    payload = json.dumps([system_prompt, wrapper, prompt, material, model])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed LRU of response texts, bounded by total bytes."""
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(SCHEMA)
+        return self._db
+
+    def get(self, key: str) -> str | None:
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                db = self._conn()
+                row = db.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                with db:
+                    db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            log.warning("LLM cache read failed: %s", e)
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, model: str, response: str):
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                db = self._conn()
+                with db:
+                    db.execute(
+                        "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, model, response, len(response.encode()), now, now),
+                    )
+                self._evict(db)
+        except sqlite3.Error as e:
+            log.warning("LLM cache write failed: %s", e)
+
+    def discard(self, key: str):
+        """Forget a response (e.g. its code never produced a valid shape)."""
+        if not self.enabled:
+            return
+        try:
+            with self._lock:
+                db = self._conn()
+                with db:
+                    db.execute("DELETE FROM responses WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            log.warning("LLM cache delete failed: %s", e)
+
+    def _evict(self, db: sqlite3.Connection):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        with db:
+            for key, size in db.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        entries, size = 0, 0
+        if self.enabled and self.path.exists():
+            try:
+                with self._lock:
+                    entries, size = self._conn().execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                    ).fetchone()
+            except sqlite3.Error:
+                pass
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+_cache: LLMCache | None = None
+
+
+def get_llm_cache() -> LLMCache:
+    global _cache
+    if _cache is None:
+        _cache = LLMCache(LLM_CACHE_PATH, LLM_CACHE_MAX_MB * 1_000_000)
+    return _cache
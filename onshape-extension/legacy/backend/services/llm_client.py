@@ -0,0 +1,169 @@
+"""One client for every Claude call — concurrency limits, retries, hedging.
+
+All calls of claude_service go through `LLMClient.call(call_type, ...)`:
+- at most CLAUDE_MAX_IN_FLIGHT calls run per model (CLAUDE_MODEL_LIMITS
+  overrides per model), the rest wait — the subscription's rate limit is
+  shared by every user of the backend
+- failed CLI calls (ClaudeCLIError) are retried CLAUDE_RETRIES times with
+  jittered exponential backoff; timeouts are not retried
+- a call still running past the CLAUDE_HEDGE_QUANTILE latency of its call
+  type gets a duplicate (only if the model has a free slot, so hedges never
+  queue behind real work); the first answer wins, the loser is cancelled
+- latency per call type is kept as percentiles + histogram for /api/stats
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import Counter
+
+from ..config import (
+    CLAUDE_BACKOFF_S, CLAUDE_HEDGE_MIN_SAMPLES, CLAUDE_HEDGE_QUANTILE,
+    CLAUDE_MAX_IN_FLIGHT, CLAUDE_MODEL_LIMITS, CLAUDE_RETRIES,
+)
+from .claude_sessions import ClaudeCLIError, get_session_pool
+from .latency_stats import LatencyStats
+
+log = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (1, 2, 5, 10, 20, 30, 60, 120)  # [s]
+
+
+class LLMClient:
+    """Claude calls over the session pool, limited per model and hedged per call type."""
+
+    def __init__(
+        self, max_in_flight: int, model_limits: dict[str, int], retries: int,
+        backoff_s: float, hedge_quantile: float, hedge_min_samples: int,
+    ):
+        self.max_in_flight = max_in_flight
+        self.model_limits = model_limits
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self._slots: dict[str, asyncio.Semaphore] = {}
+        self._in_flight = Counter()
+        self._latency = LatencyStats(buckets=LATENCY_BUCKETS)  # end to end, per call type
+        self._attempts = LatencyStats()  # successful single attempts, hedge threshold
+        self._events: dict[str, Counter] = {}  # per call type: retries, hedges, hedge_wins, errors, timeouts
+
+    def _limit(self, model: str) -> int:
+        return self.model_limits.get(model, self.max_in_flight)
+
+    def _semaphore(self, model: str) -> asyncio.Semaphore:
+        if model not in self._slots:
+            self._slots[model] = asyncio.Semaphore(self._limit(model))
+        return self._slots[model]
+
+    def _count(self, call_type: str, event: str):
+        self._events.setdefault(call_type, Counter())[event] += 1
+
+    async def _attempt(
+        self, call_type: str, prompt: str, model: str, system_prompt: str | None, timeout: float,
+    ) -> str:
+        async with self._semaphore(model):
+            self._in_flight[model] += 1
+            t0 = time.monotonic()
+            try:
+                text = await get_session_pool().query(prompt, model, system_prompt, timeout)
+            finally:
+                self._in_flight[model] -= 1
+        self._attempts.record(call_type, time.monotonic() - t0)
+        return text
+
+    def _hedge_after(self, call_type: str) -> float | None:
+        if not self.hedge_quantile or self._attempts.count(call_type) < self.hedge_min_samples:
+            return None
+        return self._attempts.percentile(call_type, self.hedge_quantile)
+
+    async def _hedged(
+        self, call_type: str, prompt: str, model: str, system_prompt: str | None, timeout: float,
+    ) -> str:
+        t0 = time.monotonic()
+        tasks = {asyncio.create_task(self._attempt(call_type, prompt, model, system_prompt, timeout))}
+        hedge = None
+        try:
+            threshold = self._hedge_after(call_type)
+            if threshold is not None and threshold < timeout:
+                done, _ = await asyncio.wait(tasks, timeout=threshold)
+                if not done and not self._semaphore(model).locked():
+                    remaining = timeout - (time.monotonic() - t0)
+                    log.info("Hedging %s call to %s after %.1fs", call_type, model, threshold)
+                    self._count(call_type, "hedges")
+                    hedge = asyncio.create_task(
+                        self._attempt(call_type, prompt, model, system_prompt, remaining)
+                    )
+                    tasks.add(hedge)
+            error = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count(call_type, "hedge_wins")
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()  # loser of a hedge race / caller cancelled
+
+    async def call(
+        self, call_type: str, prompt: str, model: str, system_prompt: str | None, timeout: float,
+    ) -> str:
+        """Run one Claude call, return the response text.
+
+        `call_type` (generate, modify, validate, lookup) groups latencies
+        and hedge thresholds. Raises asyncio.TimeoutError or, once the
+        retries are used up, ClaudeCLIError.
+        """
+        t0 = time.monotonic()
+        for attempt in range(self.retries + 1):
+            try:
+                text = await self._hedged(call_type, prompt, model, system_prompt, timeout)
+            except asyncio.TimeoutError:
+                self._count(call_type, "timeouts")
+                raise
+            except ClaudeCLIError as e:
+                if attempt == self.retries:
+                    self._count(call_type, "errors")
+                    raise
+                delay = self.backoff_s * 2 ** attempt * random.uniform(0.5, 1.5)
+                log.warning("%s call failed (%s), retrying in %.1fs", call_type, e, delay)
+                self._count(call_type, "retries")
+                await asyncio.sleep(delay)
+                continue
+            self._latency.record(call_type, time.monotonic() - t0)
+            return text
+
+    def stats(self) -> dict:
+        models = set(self._slots) | set(self.model_limits)
+        latency = self._latency.stats()
+        return {
+            "limits": {model: self._limit(model) for model in sorted(models)},
+            "default_limit": self.max_in_flight,
+            "in_flight": {model: n for model, n in self._in_flight.items() if n},
+            "hedge_quantile": self.hedge_quantile or None,
+            "hedge_after_s": {
+                call_type: round(threshold, 3)
+                for call_type in latency
+                if (threshold := self._hedge_after(call_type)) is not None
+            },
+            "latency": latency,
+            "events": {call_type: dict(events) for call_type, events in self._events.items()},
+        }
+
+
+_client: LLMClient | None = None
+
+
+def get_llm_client() -> LLMClient:
+    global _client
+    if _client is None:
+        _client = LLMClient(
+            CLAUDE_MAX_IN_FLIGHT, CLAUDE_MODEL_LIMITS, CLAUDE_RETRIES,
+            CLAUDE_BACKOFF_S, CLAUDE_HEDGE_QUANTILE, CLAUDE_HEDGE_MIN_SAMPLES,
+        )
+    return _client
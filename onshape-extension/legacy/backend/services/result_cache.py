@@ -0,0 +1,181 @@
+"""Content-addressed geometry result cache.
+
+Key = sha256 of the normalized CadQuery source plus the export settings.
+Each entry is a directory holding the exported artifacts (STEP/STL/SVG)
+and a `meta.json` with the parsed metrics and its creation time. Entries
+expire RESULT_CACHE_TTL seconds after creation if a TTL is set (lookups
+and eviction both check `created`), and the least recently used are
+evicted once the cache exceeds RESULT_CACHE_MAX_MB. Last use is the entry
+directory's mtime, touched on every hit — as for the checkpoint snapshots
+that share this class.
+"""
+import ast
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+from ..config import RESULT_CACHE_DIR, RESULT_CACHE_MAX_MB, RESULT_CACHE_TTL
+
+log = logging.getLogger(__name__)
+
+META_FILE = "meta.json"
+
+
+def code_fingerprint(code: str) -> str:
+    """Normalize CadQuery source so comment/whitespace-only edits compare equal.
+
+    Uses the AST dump (no line numbers) when the code parses, otherwise
+    falls back to the source with trailing whitespace and blank lines
+    stripped.
+    """
+    try:
+        normalized = ast.dump(ast.parse(code))
+    except SyntaxError:
+        normalized = "\n".join(
+            line.rstrip() for line in code.strip().splitlines() if line.strip()
+        )
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def cache_key(code: str, settings: dict) -> str:
+    """Cache key for `code` executed with the given export settings."""
+    payload = code_fingerprint(code) + json.dumps(settings, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.iterdir() if f.is_file())
+
+
+class ResultCache:
+    """On-disk cache of execution results, bounded by total bytes."""
+
+    def __init__(self, root: Path, max_bytes: int, ttl: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl = ttl  # [s], 0 = never expire
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _expired(self, created: float, now: float) -> bool:
+        return bool(self.ttl) and now - created > self.ttl
+
+    def get(self, key: str) -> dict | None:
+        """Return {"dir": Path, "meta": dict} for a live entry, or None."""
+        if not self.enabled:
+            return None
+        entry = self.root / key
+        try:
+            meta = json.loads((entry / META_FILE).read_text())
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        if self._expired(meta.get("created", 0), time.time()):
+            shutil.rmtree(entry, ignore_errors=True)
+            self.misses += 1
+            return None
+        try:
+            self._touch(entry, time.time())
+        except FileNotFoundError:
+            self.misses += 1  # evicted concurrently
+            return None
+        self.hits += 1
+        return {"dir": entry, "meta": meta}
+
+    def put(self, key: str, src_dir: Path, files: list[str], meta: dict) -> Path | None:
+        """Copy `files` from `src_dir` into the cache under `key`.
+
+        Returns the entry directory, None if caching is disabled, the write
+        failed or the entry was evicted right away.
+        """
+        if not self.enabled:
+            return None
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = self.root / f".tmp-{uuid.uuid4().hex}"
+        try:
+            staging.mkdir()
+            for name in files:
+                if (src_dir / name).exists():
+                    shutil.copyfile(src_dir / name, staging / name)
+            created = time.time()
+            (staging / META_FILE).write_text(json.dumps({**meta, "created": created}))
+            self._touch(staging, created)
+            entry = self.root / key
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(staging, entry)  # atomic publish
+        except OSError as e:
+            log.warning("Result cache write failed: %s", e)
+            shutil.rmtree(staging, ignore_errors=True)
+            return None
+        self.evict()
+        return entry if entry.is_dir() else None
+
+    @staticmethod
+    def _touch(entry: Path, now: float):
+        os.utime(entry, (now, now))  # last use, for LRU eviction
+
+    def _created(self, entry: Path) -> float:
+        """Creation time from meta.json; directories without one (checkpoint
+        snapshots share this class) fall back to their mtime.
+        """
+        try:
+            return float(json.loads((entry / META_FILE).read_text()).get("created", 0))
+        except FileNotFoundError:
+            return entry.stat().st_mtime
+        except ValueError:
+            return 0.0  # unreadable meta: get() treats it as missing, evict first
+
+    def _entries(self) -> list[tuple[float, float, int, Path]]:
+        """(last_used, created, size, dir) of every entry."""
+        entries = []
+        for entry in self.root.iterdir():
+            if entry.is_dir() and not entry.name.startswith(".tmp-"):
+                try:
+                    last_used = entry.stat().st_mtime
+                    entries.append((last_used, self._created(entry), _dir_size(entry), entry))
+                except FileNotFoundError:
+                    continue  # evicted concurrently
+        return entries
+
+    def evict(self):
+        """Drop expired entries, then the least recently used above max_bytes."""
+        entries = sorted(self._entries())  # least recently used first
+        total = sum(size for _, _, size, _ in entries)
+        now = time.time()
+        for _, created, size, entry in entries:
+            expired = self._expired(created, now)
+            if total <= self.max_bytes and not expired:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        entries = self._entries() if self.enabled and self.root.exists() else []
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "entries": len(entries),
+            "bytes": sum(size for _, _, size, _ in entries),
+        }
+
+
+_cache: ResultCache | None = None
+
+
+def get_result_cache() -> ResultCache:
+    global _cache
+    if _cache is None:
+        _cache = ResultCache(RESULT_CACHE_DIR, RESULT_CACHE_MAX_MB * 1_000_000, RESULT_CACHE_TTL)
+    return _cache
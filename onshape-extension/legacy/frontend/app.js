@@ -128,6 +128,8 @@
       };
       if (lastCode) {
         payload.previous_code = lastCode;
+        // Modifications skip visual validation, so no SVGs are needed — export STEP only
+        payload.lazy_export = true;
       }
 
       const resp = await fetch(API_BASE + "/api/generate", {
@@ -178,6 +180,9 @@
     if (m && m.volume) {
       html += `<b>Volume:</b> <span>${m.volume.toFixed(0)} mm&sup3;</span><br>`;
     }
+    if (m && m.surface_area) {
+      html += `<b>Surface:</b> <span>${m.surface_area.toFixed(0)} mm&sup2;</span><br>`;
+    }
     if (m && m.solid_count) {
       html += `<b>Solids:</b> <span>${m.solid_count}</span><br>`;
     }
@@ -203,8 +208,8 @@
     }
     metricsEl.innerHTML = html;
 
-    downloadStepBtn.style.display = data.step_base64 ? "inline-block" : "none";
-    downloadStlBtn.style.display = data.stl_base64 ? "inline-block" : "none";
+    downloadStepBtn.style.display = data.artifact_id ? "inline-block" : "none";
+    downloadStlBtn.style.display = data.artifact_id ? "inline-block" : "none";
   }
 
   function showError(msg) {
@@ -212,28 +217,24 @@
     errorText.textContent = msg;
   }
 
-  // --- Downloads ---
-  function downloadBase64(base64, filename, mime) {
-    const bytes = Uint8Array.from(atob(base64), c => c.charCodeAt(0));
-    const blob = new Blob([bytes], { type: mime });
-    const url = URL.createObjectURL(blob);
+  // --- Downloads (streamed from the server, never through JS memory) ---
+  function downloadUrl(url, filename) {
     const a = document.createElement("a");
-    a.href = url;
+    a.href = API_BASE + url;
     a.download = filename;
     a.click();
-    URL.revokeObjectURL(url);
   }
 
   downloadStepBtn.addEventListener("click", () => {
-    if (lastResult && lastResult.step_base64) {
-      downloadBase64(lastResult.step_base64, lastResult.filename || "output.step", "application/step");
+    if (lastResult && lastResult.step_url) {
+      downloadUrl(lastResult.step_url, lastResult.filename || "output.step");
     }
   });
 
   downloadStlBtn.addEventListener("click", () => {
-    if (lastResult && lastResult.stl_base64) {
+    if (lastResult && lastResult.stl_url) {
       const stlName = (lastResult.filename || "output.step").replace(".step", ".stl");
-      downloadBase64(lastResult.stl_base64, stlName, "application/sla");
+      downloadUrl(lastResult.stl_url, stlName);
     }
   });
 
@@ -242,7 +243,7 @@
   let lastSourceElementId = null;
 
   uploadBtn.addEventListener("click", async () => {
-    if (!lastResult || !lastResult.step_base64 || !ctx) return;
+    if (!lastResult || !lastResult.artifact_id || !ctx) return;
 
     uploadBtn.disabled = true;
     uploadStatus.textContent = "Importing into Part Studio...";
@@ -255,7 +256,7 @@
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
-          step_base64: lastResult.step_base64,
+          artifact_id: lastResult.artifact_id,
           filename: fname,
           document_id: ctx.documentId,
           workspace_id: ctx.workspaceId,
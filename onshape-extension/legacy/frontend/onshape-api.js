@@ -26,12 +26,12 @@ const OnshapeAPI = (() => {
    *
    * When element_id is available (Onshape iframe), the backend:
    *   1. Cleans up previous source tab + Derived feature (if re-uploading)
-   *   2. Uploads STEP → creates source Part Studio
+   *   2. Uploads the artifact's STEP (read server-side) → creates source Part Studio
    *   3. Adds a Derived feature to the current Part Studio
    *   → Source tab stays alive (Derived needs the live reference)
    *   → On next upload, old source + Derived are cleaned up
    */
-  async function uploadSTEP(stepBase64, filename, derivedFeatureId, sourceElementId) {
+  async function uploadSTEP(artifactId, filename, derivedFeatureId, sourceElementId) {
     const ctx = getContext();
     if (!ctx) throw new Error("No Onshape document context (not in iframe?)");
 
@@ -39,7 +39,7 @@ const OnshapeAPI = (() => {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({
-        step_base64: stepBase64,
+        artifact_id: artifactId,
         filename: filename,
         document_id: ctx.documentId,
         workspace_id: ctx.workspaceId,
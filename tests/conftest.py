@@ -0,0 +1,5 @@
+"""Make the legacy backend importable as `backend` for the unit tests."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "onshape-extension" / "legacy"))
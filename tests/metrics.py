@@ -2,13 +2,17 @@
 
 Computes: Chamfer Distance, Bounding Box Similarity, Volume Ratio.
 Trimesh is optional — if unavailable, geometric metrics return None.
+
+Meshes are read from STL/OBJ files or from the pipeline's tessellation
+buffers (`mesh_<tier>.npz` per quality tier, float32 vertices + uint32
+triangles), and each file is loaded once per comparison.
 """
 from __future__ import annotations
 
 import logging
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
 logger = logging.getLogger(__name__)
 
@@ -37,14 +41,25 @@ class MetricsResult:
     error: Optional[str] = None
 
 
+MeshSource = Union[Path, "trimesh.Trimesh"]
+
+
 def _load_mesh(path: Path) -> "trimesh.Trimesh":
-    """Load an STL/OBJ file and return a single trimesh."""
+    """Load an STL/OBJ file or a mesh_<tier>.npz buffer and return a single trimesh."""
+    if path.suffix == ".npz":
+        with np.load(path) as buf:
+            return trimesh.Trimesh(vertices=buf["vertices"], faces=buf["triangles"])
     mesh = trimesh.load(path, force="mesh")
     if not isinstance(mesh, trimesh.Trimesh):
         raise ValueError(f"Expected single mesh, got {type(mesh).__name__}")
     return mesh
 
 
+def _as_mesh(source: MeshSource) -> "trimesh.Trimesh":
+    """Pass already-loaded meshes through, load paths."""
+    return source if isinstance(source, trimesh.Trimesh) else _load_mesh(Path(source))
+
+
 def _sample_points(mesh: "trimesh.Trimesh", n: int = 10_000) -> "np.ndarray":
     """Uniformly sample points on mesh surface."""
     points, _ = trimesh.sample.sample_surface(mesh, n)
@@ -52,13 +67,13 @@ def _sample_points(mesh: "trimesh.Trimesh", n: int = 10_000) -> "np.ndarray":
 
 
 def chamfer_distance(
-    gt_path: Path, gen_path: Path, n_samples: int = 10_000, normalize: bool = True
+    gt_path: MeshSource, gen_path: MeshSource, n_samples: int = 10_000, normalize: bool = True
 ) -> float:
     """Bidirectional Chamfer Distance between two meshes.
 
     Args:
-        gt_path: Ground truth mesh file.
-        gen_path: Generated mesh file.
+        gt_path: Ground truth mesh file (or loaded mesh).
+        gen_path: Generated mesh file (or loaded mesh).
         n_samples: Points to sample on each mesh.
         normalize: If True, divide by ground truth bounding box diagonal.
 
@@ -68,8 +83,8 @@ def chamfer_distance(
     if not HAS_TRIMESH:
         raise RuntimeError("trimesh required for chamfer_distance")
 
-    gt_mesh = _load_mesh(gt_path)
-    gen_mesh = _load_mesh(gen_path)
+    gt_mesh = _as_mesh(gt_path)
+    gen_mesh = _as_mesh(gen_path)
 
     pts_gt = _sample_points(gt_mesh, n_samples)
     pts_gen = _sample_points(gen_mesh, n_samples)
@@ -90,7 +105,7 @@ def chamfer_distance(
     return cd
 
 
-def bbox_similarity(gt_path: Path, gen_path: Path) -> tuple[float, list[float], list[float]]:
+def bbox_similarity(gt_path: MeshSource, gen_path: MeshSource) -> tuple[float, list[float], list[float]]:
     """Bounding box dimension similarity.
 
     Returns:
@@ -99,8 +114,8 @@ def bbox_similarity(gt_path: Path, gen_path: Path) -> tuple[float, list[float],
     if not HAS_TRIMESH:
         raise RuntimeError("trimesh required for bbox_similarity")
 
-    gt_mesh = _load_mesh(gt_path)
-    gen_mesh = _load_mesh(gen_path)
+    gt_mesh = _as_mesh(gt_path)
+    gen_mesh = _as_mesh(gen_path)
 
     gt_dims = (gt_mesh.bounds[1] - gt_mesh.bounds[0]).tolist()
     gen_dims = (gen_mesh.bounds[1] - gen_mesh.bounds[0]).tolist()
@@ -116,7 +131,7 @@ def bbox_similarity(gt_path: Path, gen_path: Path) -> tuple[float, list[float],
     return score, gt_dims, gen_dims
 
 
-def volume_ratio(gt_path: Path, gen_path: Path) -> tuple[float, float, float]:
+def volume_ratio(gt_path: MeshSource, gen_path: MeshSource) -> tuple[float, float, float]:
     """Volume ratio between generated and ground truth meshes.
 
     Returns:
@@ -125,8 +140,8 @@ def volume_ratio(gt_path: Path, gen_path: Path) -> tuple[float, float, float]:
     if not HAS_TRIMESH:
         raise RuntimeError("trimesh required for volume_ratio")
 
-    gt_mesh = _load_mesh(gt_path)
-    gen_mesh = _load_mesh(gen_path)
+    gt_mesh = _as_mesh(gt_path)
+    gen_mesh = _as_mesh(gen_path)
 
     gt_vol = abs(float(gt_mesh.volume)) if gt_mesh.is_watertight else 0.0
     gen_vol = abs(float(gen_mesh.volume)) if gen_mesh.is_watertight else 0.0
@@ -160,12 +175,19 @@ def compute_all_metrics(gt_path: Path, gen_path: Path) -> MetricsResult:
         return result
 
     try:
-        result.chamfer_distance = chamfer_distance(gt_path, gen_path)
+        gt_mesh = _load_mesh(gt_path)
+        gen_mesh = _load_mesh(gen_path)
+    except Exception as e:
+        result.error = f"Mesh load failed: {e}"
+        return result
+
+    try:
+        result.chamfer_distance = chamfer_distance(gt_mesh, gen_mesh)
     except Exception as e:
         logger.warning("Chamfer distance failed for %s: %s", gen_path.name, e)
 
     try:
-        score, gt_dims, gen_dims = bbox_similarity(gt_path, gen_path)
+        score, gt_dims, gen_dims = bbox_similarity(gt_mesh, gen_mesh)
         result.bbox_similarity = score
         result.gt_bbox = gt_dims
         result.gen_bbox = gen_dims
@@ -173,7 +195,7 @@ def compute_all_metrics(gt_path: Path, gen_path: Path) -> MetricsResult:
         logger.warning("BBox similarity failed for %s: %s", gen_path.name, e)
 
     try:
-        ratio, gt_vol, gen_vol = volume_ratio(gt_path, gen_path)
+        ratio, gt_vol, gen_vol = volume_ratio(gt_mesh, gen_mesh)
         result.volume_ratio = ratio
         result.gt_volume = gt_vol
         result.gen_volume = gen_vol
@@ -0,0 +1,94 @@
+"""Artifact downloads: ETag, single byte ranges and 416."""
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from backend.routers import artifacts  # noqa: E402
+from backend.routers.artifacts import RangeNotSatisfiable, _parse_range  # noqa: E402
+
+DATA = bytes(range(256)) * 4  # 1024 bytes
+
+
+class _Request:
+    def __init__(self, **headers):
+        self.headers = {name.replace("_", "-"): value for name, value in headers.items()}
+
+
+@pytest.fixture
+def fetch(monkeypatch, tmp_path):
+    path = tmp_path / "a1.stl"
+    path.write_bytes(DATA)
+
+    async def export_artifact(artifact_id, fmt, view="iso", quality=None, material=None):
+        return path
+
+    monkeypatch.setattr(artifacts, "export_artifact", export_artifact)
+
+    def run(**headers):
+        return asyncio.run(artifacts.get_artifact(_Request(**headers), "a1", "stl"))
+
+    return run
+
+
+def _body(response) -> bytes:
+    iterator = response.body_iterator
+    if hasattr(iterator, "__aiter__"):
+        async def collect():
+            return b"".join([chunk async for chunk in iterator])
+        return asyncio.run(collect())
+    return b"".join(iterator)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=1000-", (1000, 1023)),
+    ("bytes=1000-5000", (1000, 1023)),
+    ("bytes=-24", (1000, 1023)),
+    ("bytes=-5000", (0, 1023)),
+])
+def test_parse_range(header, expected):
+    assert _parse_range(header, len(DATA)) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=", "bytes=-", "items=0-9", "bytes=abc", "bytes=0-9,20-29", "bytes=9-0"])
+def test_parse_range_ignores_malformed(header):
+    assert _parse_range(header, len(DATA)) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=1024-", "bytes=5000-6000", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(RangeNotSatisfiable):
+        _parse_range(header, len(DATA))
+
+
+def test_full_download_and_etag(fetch):
+    response = fetch()
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["accept-ranges"] == "bytes"
+    assert fetch(if_none_match=etag).status_code == 304
+    assert fetch(if_none_match='"other"').status_code == 200
+
+
+def test_range(fetch):
+    response = fetch(range="bytes=10-19")
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 10-19/1024"
+    assert _body(response) == DATA[10:20]
+
+
+def test_stale_if_range_gets_full_body(fetch):
+    assert fetch(range="bytes=10-19", if_range='"stale"').status_code == 200
+
+
+def test_malformed_range_gets_full_body(fetch):
+    for header in ("bytes=oops", "bytes=0-9,20-29", "bytes=9-0"):
+        assert fetch(range=header).status_code == 200
+
+
+def test_unsatisfiable_range(fetch):
+    response = fetch(range="bytes=2000-")
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
@@ -0,0 +1,90 @@
+"""Statement checkpoints of the CadQuery runner: resume and fall-back."""
+import json
+import textwrap
+
+import pytest
+
+cq = pytest.importorskip("cadquery")
+
+from backend.services import cadquery_runner  # noqa: E402
+
+HARNESS = """
+import json as _json
+_json.dump({"volume": result.val().Volume(), "checkpoint": __cadgen__["checkpoint"]}, open("out.json", "w"))
+"""
+
+
+def _run(tmp_path, name, user_code):
+    user_code = textwrap.dedent(user_code).strip() + "\n"
+    out_dir = tmp_path / name
+    out_dir.mkdir()
+    script = out_dir / "script.py"
+    script.write_text(user_code + HARNESS)
+    returncode = cadquery_runner.run_script(
+        str(script), str(out_dir), watch_lines=len(user_code.splitlines()),
+        checkpoint={"dir": str(tmp_path / "checkpoints"), "min_s": 0.5},
+    )
+    assert returncode == 0, (out_dir / cadquery_runner.STDERR_FILE).read_text()
+    return json.loads((out_dir / "out.json").read_text())
+
+
+def _hole_script(prefix, diameter):
+    return prefix + f"result = top.hole({diameter})\n"
+
+
+def test_resumes_from_solid_workplane(tmp_path):
+    prefix = """
+import time
+import cadquery as cq
+base = cq.Workplane("XY").box(10, 10, 10)
+time.sleep(0.6)
+"""
+    first = _run(tmp_path, "a", prefix + "result = base.faces('>Z').workplane().hole(3)\n")
+    assert first["checkpoint"]["saved"] >= 1
+    second = _run(tmp_path, "b", prefix + "result = base.faces('>Z').workplane().hole(4)\n")
+    assert second["checkpoint"]["resumed_at"] == 4
+    assert second["volume"] < first["volume"]
+
+
+def test_workplane_derived_plane_is_not_snapshotted(tmp_path):
+    prefix = """
+import time
+import cadquery as cq
+base = cq.Workplane("XY").box(10, 10, 10)
+top = base.faces(">Z").workplane()
+time.sleep(0.6)
+"""
+    first = _run(tmp_path, "a", _hole_script(prefix, 3))
+    second = _run(tmp_path, "b", _hole_script(prefix, 4))
+    # `top` only rebuilds through its parent chain: no checkpoint after it
+    assert second["checkpoint"]["resumed_at"] <= 3
+    assert second["volume"] < first["volume"]
+
+
+def test_tagged_workplane_is_not_snapshotted(tmp_path):
+    prefix = """
+import time
+import cadquery as cq
+base = cq.Workplane("XY").box(10, 10, 10).tag("base")
+time.sleep(0.6)
+"""
+    _run(tmp_path, "a", prefix + "result = base.faces('>Z').workplane().hole(3)\n")
+    second = _run(tmp_path, "b", prefix + "result = base.faces('>Z').workplane().hole(4)\n")
+    assert second["checkpoint"]["resumed_at"] <= 2
+
+
+def test_failed_resume_reruns_from_scratch(tmp_path, monkeypatch):
+    # Snapshot everything, as if a Workplane had been restored incompletely
+    monkeypatch.setattr(cadquery_runner, "_restorable", lambda cq, wp: True)
+    prefix = """
+import time
+import cadquery as cq
+base = cq.Workplane("XY").box(10, 10, 10)
+top = base.faces(">Z").workplane()
+time.sleep(0.6)
+"""
+    first = _run(tmp_path, "a", _hole_script(prefix, 3))
+    second = _run(tmp_path, "b", _hole_script(prefix, 4))
+    assert second["checkpoint"]["resume_failed"] == 5
+    assert second["checkpoint"]["resumed_at"] == 0
+    assert second["volume"] < first["volume"]
@@ -0,0 +1,53 @@
+"""Rule-based rewrites only follow a matching runtime failure."""
+from backend.services.code_autofix import autofix_candidates
+
+CODE = """import cadquery as cq
+body = cq.Workplane("XY").box(20, 20, 10)
+hole = cq.Workplane("XY").cylinder(10, 3)
+rim = body.union(hole).edges("|Z").fillet(1)
+result = rim.cut(hole).edges(">Z").fillet(1)
+"""
+
+
+def _trace(line: int, message: str) -> str:
+    return f'Traceback (most recent call last):\n  File "/tmp/job/code.py", line {line}, in <module>\n{message}'
+
+
+def _rules(candidates: list[dict]) -> list[str]:
+    return [c["rule"] for c in candidates]
+
+
+def test_no_rewrite_without_matching_signature():
+    # The |Z fillet is a static finding, but the run failed for another reason
+    error = _trace(5, "ValueError: boom")
+    assert autofix_candidates(CODE, ["generic"], error) == []
+    assert autofix_candidates(CODE, ["wire"], error) == []
+
+
+def test_fillet_failure_rewrites_the_failing_statement_only():
+    candidates = autofix_candidates(CODE, ["fillet"], _trace(4, "StdFail_NotDone"))
+    # drop_failing_fillets would repeat drop_post_boolean_fillets here
+    assert _rules(candidates) == ["reorder_fillets", "drop_post_boolean_fillets"]
+    reordered = candidates[0]["code"].splitlines()
+    assert reordered[3] == 'rim = body.edges("|Z").fillet(1).union(hole)'
+    assert reordered[4] == 'result = rim.cut(hole).edges(">Z").fillet(1)'
+
+
+def test_targeted_fillet_failure_is_not_reordered():
+    # A ">Z" fillet after cut() is no finding: reordering it would change the
+    # geometry, only the fillet the traceback points at is dropped
+    candidates = autofix_candidates(CODE, ["fillet"], _trace(5, "StdFail_NotDone"))
+    assert _rules(candidates) == ["drop_failing_fillets"]
+    assert candidates[0]["code"].splitlines()[4] == "result = rim.cut(hole)"
+
+
+def test_wire_failure_closes_the_profile():
+    code = 'import cadquery as cq\nresult = cq.Workplane("XY").lineTo(10, 0).lineTo(10, 10).extrude(5)\n'
+    (candidate,) = autofix_candidates(code, ["wire"], _trace(2, "ValueError: Wire not closed"))
+    assert ".lineTo(10, 10).close().extrude(5)" in candidate["code"]
+
+
+def test_no_output_assigns_result():
+    code = 'import cadquery as cq\npart = cq.Workplane("XY").box(1, 1, 1)\n'
+    (candidate,) = autofix_candidates(code, ["no_output"], "Code ran but produced no output")
+    assert candidate["code"].endswith("result = part\n")
@@ -0,0 +1,71 @@
+"""Static check findings: true and false positives."""
+import textwrap
+
+import pytest
+
+from backend.services.code_lint import certain_failures, lint_code
+
+HEADER = """
+import cadquery as cq
+body = cq.Workplane("XY").box(20, 20, 10)
+hole = cq.Workplane("XY").cylinder(10, 3)
+"""
+
+
+def _rules(code: str) -> list[str]:
+    return [issue["rule"] for issue in lint_code(textwrap.dedent(HEADER + code))]
+
+
+@pytest.mark.parametrize("code", [
+    'result = body.cut(hole).edges("|Z").fillet(1)\n',
+    'result = body.union(hole).edges("|X or |Y").fillet(1)\n',
+    "result = body.cut(hole).edges().fillet(1)\n",
+    "result = body.cut(hole).fillet(1)\n",
+    'cut = body.cut(hole)\nresult = cut.edges("|Z").fillet(1)\n',
+])
+def test_post_boolean_fillet_flagged(code):
+    assert _rules(code) == ["post_boolean_fillet"]
+
+
+@pytest.mark.parametrize("code", [
+    'result = body.cut(hole).edges(">Z").fillet(1)\n',
+    'result = body.cut(hole).edges("<X").fillet(1)\n',
+    'result = body.cut(hole).edges("%CIRCLE").fillet(1)\n',
+    'result = body.cut(hole).faces(">Z").edges().fillet(1)\n',
+    "result = body.cut(hole).edges(cq.selectors.NearestToPointSelector((0, 0, 5))).fillet(1)\n",
+    'result = body.edges("|Z").fillet(1).cut(hole)\n',
+    'cut = body.cut(hole)\nresult = cut.edges(">Z").fillet(1)\n',
+    'cut = body.cut(hole)\ntry:\n    result = cut.edges("|Z").fillet(1)\nexcept Exception:\n    result = cut\n',
+])
+def test_targeted_fillet_not_flagged(code):
+    assert _rules(code) == []
+
+
+def test_fillet_message_names_the_boolean():
+    (issue,) = lint_code(textwrap.dedent(HEADER + 'cut = body.cut(hole)\nresult = cut.edges("|Z").fillet(1)\n'))
+    assert 'on .edges("|Z") after the boolean that built `cut`' in issue["error"]
+    assert ")()" not in issue["error"]
+    (issue,) = lint_code(textwrap.dedent(HEADER + "result = body.union(hole).fillet(1)\n"))
+    assert "on all edges of the solid after .union()" in issue["error"]
+
+
+def test_unclosed_wire():
+    code = 'result = cq.Workplane("XY").lineTo(10, 0).lineTo(10, 10).extrude(5)\n'
+    assert _rules(code) == ["unclosed_wire"]
+    assert _rules(code.replace(".extrude", ".close().extrude")) == []
+
+
+def test_missing_result_and_syntax():
+    assert _rules("shape = body.cut(hole)\n") == ["missing_result"]
+    assert _rules("result = body.cut(hole\n") == ["syntax"]
+
+
+def test_only_solid_sweep_along_helix_is_certain():
+    helix = "helix = cq.Wire.makeHelix(1.5, 10, 4)\n"
+    solid = helix + "result = cq.Solid.sweep(profile, [], helix)\n"
+    workplane = helix + "result = body.sweep(helix)\n"
+    assert _rules(solid) == ["solid_sweep_thread"]
+    assert _rules(workplane) == ["helix_sweep"]
+    assert _rules("result = cq.Solid.sweep(profile, [], path)\n") == []
+    assert [i["rule"] for i in certain_failures(textwrap.dedent(HEADER + solid))] == ["solid_sweep_thread"]
+    assert certain_failures(textwrap.dedent(HEADER + workplane)) == []
@@ -0,0 +1,119 @@
+"""Dimension memo: round trip, aliases, partial hits merged with a lookup."""
+import asyncio
+
+import pytest
+
+from backend.services import claude_service, dimension_memo
+from backend.services.dimension_memo import DimensionMemo, split_objects
+
+IPHONE = "OBJECT: iPhone 15\n  length: 147.6\n  width: 71.6"
+PI = "OBJECT: Raspberry Pi 4 Model B\n  length: 85\n  width: 56"
+
+
+@pytest.fixture
+def memo(tmp_path):
+    return DimensionMemo(tmp_path / "dims.sqlite3", ttl=3600)
+
+
+def test_round_trip(memo):
+    assert memo.lookup("case for iphone 15") == (False, [])
+    memo.store("case for iphone 15", split_objects(f"```\n{IPHONE}\n```"))
+    assert memo.lookup("Case for iPhone 15!") == (True, [("iphone 15", IPHONE)])
+    # Another prompt naming only that object: no lookup needed either
+    assert memo.lookup("Holder for my iPhone 15 with 2 mm walls") == (True, [("iphone 15", IPHONE)])
+    # One that may name more: partial
+    assert memo.lookup("holder for my iphone 15 and a pixel 8") == (False, [("iphone 15", IPHONE)])
+    assert memo.lookup("a cube") == (False, [])
+    stats = memo.stats()
+    assert (stats["complete_hits"], stats["partial_hits"], stats["misses"]) == (2, 1, 2)
+    assert stats["hit_ratio"] == 0.6
+
+
+@pytest.mark.parametrize("rest, named", [
+    ("with 4 holes and 3mm walls", False),
+    ("on a 20 x 30 base", False),
+    ("and a kindle", False),  # plain nouns aren't candidates
+    ("and an Arduino Uno", True),
+    ("with M3 screws", True),
+    ("and a pixel 8", True),
+])
+def test_other_object_candidates(memo, rest, named):
+    memo.store("case for iphone 15", split_objects(IPHONE))
+    complete, blocks = memo.lookup(f"stand for an iphone 15 {rest}")
+    assert complete is not named and blocks == [("iphone 15", IPHONE)]
+
+
+def test_no_lookup_needed(memo):
+    memo.store("a cube 20mm", [])
+    assert memo.lookup("A cube, 20 mm") == (False, [])  # different tokens
+    assert memo.lookup("a cube 20mm") == (True, [])
+
+
+def test_alias_and_specificity(memo):
+    memo.store("case for raspberry pi 4", split_objects(PI))
+    assert memo.lookup("enclosure for Raspberry Pi 4")[1] == [("raspberry pi 4 model b", PI)]
+    assert memo.lookup("enclosure for raspberry pi 5")[1] == []
+    memo.store("iphone 15 case", split_objects(IPHONE))
+    assert memo.lookup("iphone 15 pro max case")[1] == []
+
+
+def test_expired(tmp_path, monkeypatch):
+    memo = DimensionMemo(tmp_path / "dims.sqlite3", ttl=10)
+    memo.store("case for iphone 15", split_objects(IPHONE))
+    now = dimension_memo.time.time()
+    monkeypatch.setattr(dimension_memo.time, "time", lambda: now + 11)
+    assert memo.lookup("case for iphone 15") == (False, [])
+
+
+class _FakeClient:
+    def __init__(self, answer):
+        self.answer = answer
+        self.prompts = []
+
+    async def call(self, call_type, prompt, model, system_prompt, timeout):
+        self.prompts.append(prompt)
+        if isinstance(self.answer, Exception):
+            raise self.answer
+        return self.answer
+
+
+@pytest.fixture
+def lookup(monkeypatch, memo):
+    monkeypatch.setattr(dimension_memo, "_memo", memo)
+
+    def run(prompt, answer):
+        client = _FakeClient(answer)
+        monkeypatch.setattr(claude_service, "get_llm_client", lambda: client)
+        return asyncio.run(claude_service.lookup_dimensions(prompt)), client.prompts
+
+    return run
+
+
+def test_partial_hit_looks_up_the_rest(lookup, memo):
+    memo.store("case for iphone 15", split_objects(IPHONE))
+    prompt = "dock for an iphone 15 and a raspberry pi 4"
+    dims, prompts = lookup(prompt, f"```\n{PI}\n{IPHONE}\n```")
+    assert dims == f"{IPHONE}\n\n{PI}"  # memo block + new one, iPhone not repeated
+    assert "do NOT list them: iphone 15" in prompts[0]
+    # Now the whole prompt is known
+    assert lookup(prompt, AssertionError("no call expected"))[0] == dims
+
+
+def test_known_objects_only_skip_the_call(lookup, memo):
+    memo.store("case for iphone 15", split_objects(IPHONE))
+    dims, prompts = lookup("stand for an iphone 15", AssertionError("no call expected"))
+    assert dims == IPHONE and prompts == []
+
+
+def test_partial_hit_without_other_objects(lookup, memo):
+    memo.store("case for iphone 15", split_objects(IPHONE))
+    dims, prompts = lookup("stand for an iphone 15 in Matte Black", "NO_LOOKUP_NEEDED")
+    assert dims == IPHONE and len(prompts) == 1
+    assert memo.lookup("stand for an iphone 15 in Matte Black") == (True, [("iphone 15", IPHONE)])
+
+
+def test_failed_lookup_keeps_known_objects(lookup, memo):
+    memo.store("case for iphone 15", split_objects(IPHONE))
+    dims, _ = lookup("stand for an iphone 15 and a Kindle", asyncio.TimeoutError())
+    assert dims == IPHONE
+    assert memo.lookup("stand for an iphone 15 and a Kindle")[0] is False  # not memoized
@@ -0,0 +1,153 @@
+"""Auto-retry loop of /api/generate: only certain static findings replace execution."""
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from backend.routers import generate as g  # noqa: E402
+
+HEADER = 'import cadquery as cq\nbody = cq.Workplane("XY").box(20, 20, 10)\nhole = cq.Workplane("XY").cylinder(10, 3)\n'
+BROAD = HEADER + 'result = body.union(hole).edges("|Z").fillet(1)\n'
+TARGETED = HEADER + 'result = body.cut(hole).edges(">Z").fillet(1)\n'
+FIXED = HEADER + "result = body.cut(hole)\n"
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Claude and the executor replaced; `failures` maps code -> runtime error."""
+    state = {"code": None, "failures": {}, "executed": [], "instructions": [], "fixes": []}
+
+    async def generate_code(system_prompt, prompt, material, **kw):
+        return {"code": state["code"], "error": None, "model": "m", "cached": False}
+
+    async def modify_code(system_prompt, code, instruction, material, **kw):
+        state["instructions"].append(instruction)
+        fix = state["fixes"].pop(0) if state["fixes"] else FIXED
+        return {"code": fix, "error": None, "model": "m"}
+
+    async def execute(code, **kw):
+        state["executed"].append(code)
+        error = state["failures"].get(code)
+        return {"success": error is None, "error": error, "metrics": {}, "artifact_id": "a", "svg_iso": None}
+
+    async def no_lookup(prompt):
+        return None
+
+    async def no_previews(exec_result):
+        pass
+
+    monkeypatch.setattr(g, "generate_cadquery_code", generate_code)
+    monkeypatch.setattr(g, "modify_cadquery_code", modify_code)
+    monkeypatch.setattr(g, "execute_and_export", execute)
+    monkeypatch.setattr(g, "lookup_dimensions", no_lookup)
+    monkeypatch.setattr(g, "_ensure_previews", no_previews)
+    monkeypatch.setattr(g, "_get_system_prompt", lambda: "system")
+    return state
+
+
+def _generate(strategy="serial"):
+    return asyncio.run(g.generate(g.GenerateRequest(prompt="a bracket", retry_strategy=strategy)))
+
+
+def _trace(code: str, message: str) -> str:
+    line = len(code.splitlines())
+    return f'Traceback (most recent call last):\n  File "/tmp/job/code.py", line {line}, in <module>\n{message}'
+
+
+@pytest.mark.parametrize("strategy", ["serial", "speculative"])
+def test_flagged_code_that_runs_is_kept(pipeline, strategy):
+    pipeline["code"] = BROAD
+    response = _generate(strategy)
+    assert response.success and response.attempts == 1
+    assert response.code == BROAD
+    assert pipeline["executed"] == [BROAD] and pipeline["instructions"] == []
+
+
+def test_unrelated_failure_goes_to_claude_with_advice(pipeline):
+    pipeline["code"] = BROAD
+    pipeline["failures"][BROAD] = _trace(BROAD, "ValueError: boom")
+    response = _generate()
+    assert response.success and response.code == FIXED
+    assert pipeline["executed"] == [BROAD, FIXED]  # no fillet rewrite for a ValueError
+    (instruction,) = pipeline["instructions"]
+    assert instruction.startswith("Fix this runtime error")
+    assert "static check also flagged" in instruction and '.edges("|Z")' in instruction
+
+
+def test_matching_failure_is_autofixed(pipeline):
+    pipeline["code"] = BROAD
+    pipeline["failures"][BROAD] = _trace(BROAD, "StdFail_NotDone")
+    response = _generate()
+    assert response.success and pipeline["instructions"] == []
+    assert response.code.endswith('result = body.edges("|Z").fillet(1).union(hole)\n')
+
+
+def test_targeted_fillet_is_never_reordered(pipeline):
+    pipeline["code"] = TARGETED
+    pipeline["failures"][TARGETED] = _trace(TARGETED, "StdFail_NotDone")
+    _generate()
+    assert not any(".fillet(1).cut(hole)" in code for code in pipeline["executed"])
+
+
+def test_duplicate_fix_is_reprompted(pipeline):
+    pipeline["code"] = TARGETED
+    pipeline["failures"][TARGETED] = _trace(TARGETED, "ValueError: boom")
+    pipeline["fixes"] = [TARGETED.replace("import cadquery as cq", "import cadquery as cq  # fixed")]
+    response = _generate()
+    assert response.success and response.code == FIXED
+    assert pipeline["instructions"][1].startswith(g.DUPLICATE_FIX_INSTRUCTION)
+
+
+def test_missing_result_is_fixed_without_executing_it(pipeline):
+    pipeline["code"] = HEADER + "shape = body.cut(hole)\n"
+    response = _generate()
+    assert response.success and response.code.endswith("result = shape\n")
+    assert pipeline["executed"] == [response.code] and pipeline["instructions"] == []
+
+
+@pytest.mark.parametrize("strategy", ["serial", "speculative"])
+def test_solid_sweep_thread_goes_to_claude_without_executing(pipeline, strategy):
+    pipeline["code"] = HEADER + (
+        "helix = cq.Wire.makeHelix(1.5, 10, 4)\n"
+        "result = body.union(cq.Workplane(obj=cq.Solid.sweep(body.val(), [], helix)))\n"
+    )
+    response = _generate(strategy)
+    assert response.success and response.code == FIXED
+    assert pipeline["executed"] == [FIXED]
+    assert "BRepOffsetAPI_MakePipeShell" in pipeline["instructions"][0]
+
+
+@pytest.mark.parametrize("backend, cancelled", [("subprocess", True), ("fork", True), ("pool", False)])
+def test_speculative_losers_cancelled_unless_pool(pipeline, monkeypatch, backend, cancelled):
+    slow = HEADER + "result = body  # slow\n"
+    state = {}
+
+    async def execute(code, req):
+        if code != slow:
+            return {"success": True, "error": None, "metrics": {}, "artifact_id": "a"}
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    monkeypatch.setattr(g, "EXEC_BACKEND", backend)
+    monkeypatch.setattr(g, "RETRY_FIX_VARIANTS", 1)
+    monkeypatch.setattr(g, "_execute", execute)
+    monkeypatch.setattr(g, "autofix_candidates", lambda *a: [{"rule": "slow", "code": slow}])
+
+    async def race():
+        req = g.GenerateRequest(prompt="a bracket")
+        round_ = await g._speculative_fix("system", BROAD, ["fillet"], "", "fix", req, set())
+        await asyncio.sleep(0)
+        outcome = state.get("cancelled", False), list(g._detached)
+        for task in outcome[1]:  # the still running pool execution
+            task.cancel()
+        await asyncio.gather(*outcome[1], return_exceptions=True)
+        return round_, outcome
+
+    round_, (was_cancelled, detached) = asyncio.run(race())
+    assert round_["winner"] == "llm" and round_["code"] == FIXED
+    assert was_cancelled is cancelled
+    assert len(detached) == (0 if cancelled else 1)
@@ -0,0 +1,122 @@
+"""LLM response cache: round trip, LRU bound, and what generate stores."""
+import asyncio
+import itertools
+
+import pytest
+
+from backend.services import llm_cache
+from backend.services.llm_cache import LLMCache, llm_cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(llm_cache.time, "time", lambda: float(next(ticks)))
+
+
+def test_round_trip(tmp_path):
+    cache = LLMCache(tmp_path / "llm.sqlite3", 10_000)
+    key = llm_cache_key("system", "wrapper", "a plate", "PLA", "sonnet")
+    assert cache.get(key) is None
+    cache.put(key, "sonnet", "```python\nresult = 1\n```")
+    assert cache.get(key) == "```python\nresult = 1\n```"
+    assert cache.get(llm_cache_key("system", "wrapper", "a plate", "PETG", "sonnet")) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+    cache.discard(key)
+    assert cache.get(key) is None
+
+
+def test_reopened_cache_keeps_entries(tmp_path):
+    LLMCache(tmp_path / "llm.sqlite3", 10_000).put("k", "m", "response")
+    assert LLMCache(tmp_path / "llm.sqlite3", 10_000).get("k") == "response"
+
+
+def test_used_from_worker_threads(tmp_path):
+    cache = LLMCache(tmp_path / "llm.sqlite3", 10_000)
+    cache.put("k", "m", "response")  # connection opened on this thread
+
+    async def from_threads():
+        return await asyncio.gather(*(asyncio.to_thread(cache.get, "k") for _ in range(4)))
+
+    assert asyncio.run(from_threads()) == ["response"] * 4
+
+
+def test_least_recently_used_evicted(tmp_path, clock):
+    cache = LLMCache(tmp_path / "llm.sqlite3", 500)
+    cache.put("a", "m", "x" * 200)
+    cache.put("b", "m", "x" * 200)
+    cache.get("a")
+    cache.put("c", "m", "x" * 200)
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    assert cache.stats()["bytes"] <= 500
+
+
+def test_disabled(tmp_path):
+    cache = LLMCache(tmp_path / "llm.sqlite3", 0)
+    cache.put("k", "m", "response")
+    assert cache.get("k") is None and not (tmp_path / "llm.sqlite3").exists()
+
+
+class _FakeClient:
+    def __init__(self):
+        self.prompts = []
+
+    async def call(self, call_type, prompt, model, system_prompt, timeout):
+        self.prompts.append(prompt)
+        await asyncio.sleep(0.05)
+        return "```python\nimport cadquery as cq\nresult = cq.Workplane().box(1, 1, 1)\n```"
+
+
+@pytest.fixture
+def generate(monkeypatch, tmp_path):
+    pytest.importorskip("fastapi")
+    from backend.routers import generate as g
+    from backend.services import claude_service
+
+    cache = LLMCache(tmp_path / "llm.sqlite3", 1_000_000)
+    monkeypatch.setattr(llm_cache, "_cache", cache)
+    monkeypatch.setattr(claude_service, "get_llm_client", _FakeClient)
+    monkeypatch.setattr(g, "SPECULATIVE_GENERATION", True)
+    monkeypatch.setattr(g, "_get_system_prompt", lambda: "system")
+
+    async def execute(code, **kw):
+        ok = "fail" not in code
+        return {"success": ok, "error": None if ok else "boom", "metrics": {}, "artifact_id": "a", "svg_iso": None}
+
+    async def no_previews(exec_result):
+        pass
+
+    monkeypatch.setattr(g, "execute_and_export", execute)
+    monkeypatch.setattr(g, "_ensure_previews", no_previews)
+
+    def key(prompt, dims):
+        user_prompt = g._with_references(prompt, dims, g.find_matching_references(prompt))
+        return llm_cache_key("system", claude_service.CODE_WRAPPER, user_prompt, "PLA", claude_service.CLAUDE_MODEL)
+
+    def run(prompt, dims, lookup_s=0.01):
+        async def lookup(p):
+            await asyncio.sleep(lookup_s)
+            return dims
+        monkeypatch.setattr(g, "lookup_dimensions", lookup)
+        return asyncio.run(g.generate(g.GenerateRequest(prompt=prompt)))
+
+    return cache, key, run
+
+
+@pytest.mark.parametrize("lookup_s", [0.01, 0.2])  # speculative answer pending / already in
+def test_dropped_speculative_answer_not_cached(generate, lookup_s):
+    cache, key, run = generate
+    dims = "OBJECT: widget\n- width: 10 mm"
+    assert run("a widget holder", dims, lookup_s).success
+    assert cache.stats()["entries"] == 1
+    assert cache.get(key("a widget holder", dims)) is not None
+    assert cache.get(key("a widget holder", None)) is None
+
+
+def test_used_speculative_answer_cached(generate):
+    cache, key, run = generate
+    assert run("a small plate", None).success
+    assert cache.get(key("a small plate", None)) is not None
+    response = run("a small plate", None)
+    assert response.llm_cached
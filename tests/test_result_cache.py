@@ -0,0 +1,76 @@
+"""Result cache: hit, TTL on the `created` clock, LRU eviction."""
+import json
+import os
+
+import pytest
+
+from backend.services import result_cache
+from backend.services.result_cache import META_FILE, ResultCache, cache_key, code_fingerprint
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(result_cache.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def src(tmp_path):
+    path = tmp_path / "job"
+    path.mkdir()
+    (path / "output.step").write_bytes(b"x" * 100)
+    return path
+
+
+def test_fingerprint_ignores_comments_and_blank_lines():
+    code = "import cadquery as cq\nresult = cq.Workplane().box(1, 1, 1)\n"
+    assert code_fingerprint(code) == code_fingerprint("# part\n" + code.replace("\n", "  # c\n\n"))
+    assert cache_key(code, {"quality": "standard"}) != cache_key(code, {"quality": "print"})
+
+
+def test_hit(tmp_path, src, clock):
+    cache = ResultCache(tmp_path / "cache", 10_000, 0)
+    assert cache.get("k") is None
+    entry = cache.put("k", src, ["output.step", "missing.stl"], {"volume": 1.0})
+    hit = cache.get("k")
+    assert hit["dir"] == entry and hit["meta"] == {"volume": 1.0, "created": clock[0]}
+    assert sorted(os.listdir(entry)) == [META_FILE, "output.step"]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_ttl(tmp_path, src, clock):
+    cache = ResultCache(tmp_path / "cache", 10_000, 60)
+    cache.put("k", src, ["output.step"], {})
+    clock[0] += 59
+    assert cache.get("k") is not None
+    clock[0] += 2
+    assert cache.get("k") is None
+    assert not (tmp_path / "cache" / "k").exists()
+
+
+def test_evict_expires_by_created_not_mtime(tmp_path, src, clock):
+    cache = ResultCache(tmp_path / "cache", 10_000, 60)
+    cache.put("old", src, ["output.step"], {})
+    clock[0] += 61
+    os.utime(tmp_path / "cache" / "old")  # touched, but created long ago
+    cache.put("new", src, ["output.step"], {})
+    assert sorted(os.listdir(tmp_path / "cache")) == ["new"]
+
+
+def test_evict_least_recently_used_first(tmp_path, src, clock):
+    cache = ResultCache(tmp_path / "cache", 450, 0)  # 3 entries of ~130 bytes
+    for key in ("a", "b", "c"):
+        cache.put(key, src, ["output.step"], {})
+        clock[0] += 1
+    assert cache.get("a") is not None  # oldest created, but just read
+    cache.put("d", src, ["output.step"], {})
+    assert sorted(os.listdir(tmp_path / "cache")) == ["a", "c", "d"]
+    created = json.loads((tmp_path / "cache" / "a" / META_FILE).read_text())["created"]
+    assert created == clock[0] - 3  # a hit doesn't extend the TTL
+
+
+def test_disabled(tmp_path, src):
+    cache = ResultCache(tmp_path / "cache", 0, 0)
+    assert cache.put("k", src, ["output.step"], {}) is None
+    assert cache.get("k") is None